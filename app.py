@@ -1,12 +1,13 @@
 import streamlit as st
 import pandas as pd
 import plotly.graph_objects as go
-import json
 import os
 import random
+import uuid
 from datetime import date, timedelta
 from collections import defaultdict
 import anthropic
+from mooncyc import content, ratelimit, storage, usage
 
 # ----------------------------------------
 # PAGE CONFIGURATION
@@ -109,66 +110,36 @@ st.markdown("""
 # ----------------------------------------
 # STORAGE
 # ----------------------------------------
-CYCLE_FILE = "cycle_data.json"
-TASKS_FILE = "tasks.json"
+# Data is stored per user (see mooncyc/storage.py). The user id lives in
+# the ?user= query parameter, so bookmarking the page brings you back.
+
+def resolve_user_id():
+    user_id = st.query_params.get("user")
+    if not storage.valid_user_id(user_id):
+        user_id = uuid.uuid4().hex
+        st.query_params["user"] = user_id
+    return user_id
 
 
 def load_cycle_data():
-    if os.path.exists(CYCLE_FILE):
-        with open(CYCLE_FILE, "r") as f:
-            data = json.load(f)
-        if data.get("last_period"):
-            data["last_period"] = date.fromisoformat(data["last_period"])
-        for entry in data.get("symptoms_log", []):
-            if "date" in entry:
-                entry["date"] = date.fromisoformat(entry["date"])
-        return data
-    return {
-        "last_period": None,
-        "cycle_length": 28,
-        "period_length": 5,
-        "symptoms_log": []
-    }
+    return storage.load_cycle_data(st.session_state.user_id)
 
 
 def save_cycle_data(data):
-    data_copy = data.copy()
-    if data_copy.get("last_period"):
-        data_copy["last_period"] = data_copy["last_period"].isoformat()
-    symptoms_copy = []
-    for entry in data_copy.get("symptoms_log", []):
-        entry_copy = entry.copy()
-        if "date" in entry_copy:
-            entry_copy["date"] = entry_copy["date"].isoformat()
-        symptoms_copy.append(entry_copy)
-    data_copy["symptoms_log"] = symptoms_copy
-    
-    with open(CYCLE_FILE, "w") as f:
-        json.dump(data_copy, f, indent=2)
+    storage.save_cycle_data(st.session_state.user_id, data)
 
 
 def load_tasks():
-    if os.path.exists(TASKS_FILE):
-        with open(TASKS_FILE, "r") as f:
-            tasks = json.load(f)
-        for task in tasks:
-            if task.get("deadline"):
-                task["deadline"] = date.fromisoformat(task["deadline"])
-        return tasks
-    return []
+    return storage.load_tasks(st.session_state.user_id)
 
 
 def save_tasks(tasks):
-    tasks_copy = []
-    for task in tasks:
-        t = task.copy()
-        if t.get("deadline"):
-            t["deadline"] = t["deadline"].isoformat()
-        tasks_copy.append(t)
-    with open(TASKS_FILE, "w") as f:
-        json.dump(tasks_copy, f, indent=2)
+    storage.save_tasks(st.session_state.user_id, tasks)
 
 
+if "user_id" not in st.session_state:
+    st.session_state.user_id = resolve_user_id()
+
 if "cycle_data" not in st.session_state:
     st.session_state.cycle_data = load_cycle_data()
 
@@ -185,7 +156,10 @@ def get_claude_client():
     Initialize Claude API client
     User pastes their API key in the sidebar
     """
-    api_key = st.session_state.get("anthropic_api_key")
+    api_key  = st.session_state.get("anthropic_api_key")
+    stub_url = os.getenv("MOONCYC_STUB_URL", "").rstrip("/")   # offline stubs: python -m mooncyc.stubs
+    if stub_url:
+        return anthropic.Anthropic(api_key=api_key or "stub", base_url=stub_url)
     if not api_key:
         return None
     try:
@@ -220,7 +194,8 @@ Create a personalized 5-minute guided meditation script. Format:
 
 Make it gentle, empowering, and specifically tailored to this phase and these symptoms."""
 
-        message = client.messages.create(
+        message = usage.tracked_call(
+            "meditation", ratelimit.limited("anthropic", client.messages.create),
             model="claude-sonnet-4-20250514",
             max_tokens=1000,
             messages=[{"role": "user", "content": prompt}]
@@ -262,7 +237,8 @@ Format:
 
 Be specific with meal names, make them appealing, and base recommendations on hormonal science."""
 
-        message = client.messages.create(
+        message = usage.tracked_call(
+            "meal_plan", ratelimit.limited("anthropic", client.messages.create),
             model="claude-sonnet-4-20250514",
             max_tokens=800,
             messages=[{"role": "user", "content": prompt}]
@@ -322,7 +298,8 @@ Provide a natural remedy in this exact format:
 
 Focus on safe, natural approaches. Be specific and actionable."""
 
-        message = client.messages.create(
+        message = usage.tracked_call(
+            "remedy", ratelimit.limited("anthropic", client.messages.create),
             model="claude-sonnet-4-20250514",
             max_tokens=500,
             messages=[{"role": "user", "content": prompt}]
@@ -357,134 +334,15 @@ Focus on safe, natural approaches. Be specific and actionable."""
 # ----------------------------------------
 
 def get_meditation_fallback(phase):
-    meditations = {
-        "Menstrual": {
-            "script": """**Rest & Release Meditation**
-**Duration:** 5 minutes
-
-Find a comfortable position, lying down or seated with support.
-
-Close your eyes. Take three deep breaths — in through your nose, out through your mouth.
-
-Place your hands on your lower belly. Feel the warmth of your palms.
-
-Say to yourself: *"My body is doing sacred work. I honor this time of release."*
-
-Visualize a warm, golden light filling your belly — soothing, melting away tension.
-
-With each exhale, imagine releasing what no longer serves you.
-
-Rest here for 3-5 minutes. You are exactly where you need to be.""",
-            "generated_by": "Pre-written"
-        },
-        "Follicular": {
-            "script": """**Energy & Possibility Meditation**
-**Duration:** 5 minutes
-
-Sit upright with your spine tall. Roll your shoulders back.
-
-Take a deep breath in — feel your lungs expand. Exhale fully.
-
-Say to yourself: *"I am rising. I am ready. I am capable."*
-
-Visualize a bright, spring-green light starting at your feet, rising up through your body.
-
-With each breath, feel energy building — like a seed sprouting toward the sun.
-
-Notice any new ideas or intentions that arise. Welcome them.
-
-Take one final deep breath. Open your eyes feeling refreshed.""",
-            "generated_by": "Pre-written"
-        },
-        "Ovulation": {
-            "script": """**Confidence & Clarity Meditation**
-**Duration:** 3 minutes
-
-Stand tall or sit upright. Feel your strength.
-
-Take three powerful breaths — sharp inhale, full exhale.
-
-Say to yourself: *"I am powerful. I am magnetic. I am clear."*
-
-Visualize a bright white light at the crown of your head — radiating confidence outward.
-
-Feel yourself standing in your full power. You have everything you need.
-
-This is your moment. Use it.
-
-Open your eyes when ready.""",
-            "generated_by": "Pre-written"
-        },
-        "Luteal": {
-            "script": """**Grounding & Compassion Meditation**
-**Duration:** 7 minutes
-
-Lie down or sit with your back supported. Close your eyes.
-
-Take slow, deep breaths — 4 counts in, 4 counts out.
-
-Say to yourself: *"I am allowed to slow down. I am enough as I am."*
-
-Visualize roots growing from your body into the earth — grounding you, holding you.
-
-With each exhale, release self-criticism. With each inhale, breathe in gentleness.
-
-Place your hand on your heart. Feel your heartbeat.
-
-You are doing your best. That is enough.
-
-Rest here as long as you need.""",
-            "generated_by": "Pre-written"
-        }
-    }
-    return meditations.get(phase, meditations["Follicular"])
+    return content.meditation_fallback(phase)
 
 
 def get_meal_plan_fallback(phase):
-    plans = {
-        "Menstrual": {
-            "breakfast": "🍳 Scrambled eggs with spinach and avocado",
-            "lunch": "🥩 Grilled steak salad with dark leafy greens",
-            "dinner": "🐟 Baked salmon with roasted sweet potato",
-            "snacks": "🍫 Dark chocolate, dates, handful of almonds",
-            "why": "Replenish iron lost during bleeding. Magnesium reduces cramps.",
-            "generated_by": "Pre-written"
-        },
-        "Follicular": {
-            "breakfast": "🥣 Greek yogurt with berries and flaxseeds",
-            "lunch": "🥗 Grilled chicken quinoa bowl with broccoli",
-            "dinner": "🍜 Miso soup with tofu and fermented vegetables",
-            "snacks": "🥕 Carrot sticks with hummus, apple slices",
-            "why": "Support rising estrogen with fiber and fermented foods.",
-            "generated_by": "Pre-written"
-        },
-        "Ovulation": {
-            "breakfast": "🥑 Avocado toast with poached egg and tomato",
-            "lunch": "🌯 Whole grain wrap with grilled veggies and chickpeas",
-            "dinner": "🍗 Herb-roasted chicken with quinoa and asparagus",
-            "snacks": "🍊 Orange slices, bell pepper strips, mixed nuts",
-            "why": "Balance peak estrogen. Antioxidants support detoxification.",
-            "generated_by": "Pre-written"
-        },
-        "Luteal": {
-            "breakfast": "🥞 Oatmeal with banana, cinnamon, and walnuts",
-            "lunch": "🍠 Sweet potato and black bean bowl with brown rice",
-            "dinner": "🍝 Whole wheat pasta with lentil bolognese",
-            "snacks": "🍌 Banana with almond butter, yogurt with honey",
-            "why": "Complex carbs stabilize blood sugar and serotonin.",
-            "generated_by": "Pre-written"
-        }
-    }
-    return plans.get(phase, plans["Follicular"])
+    return content.meal_plan_fallback(phase)
 
 
 def get_remedy_fallback(symptom):
-    return {
-        "remedy": "🌿 General wellness approach",
-        "how": "Hydrate well, rest when needed, and consider gentle movement.",
-        "why": "Basic self-care supports overall wellbeing during hormonal changes.",
-        "generated_by": "Pre-written (symptom not in database)"
-    }
+    return content.remedy_fallback()
 
 
 # ----------------------------------------
@@ -514,69 +372,15 @@ def get_cycle_phase(cycle_data, target_date=None):
 
 
 def get_phase_energy_level(phase):
-    energy_map = {
-        "Menstrual": 2,
-        "Follicular": 4,
-        "Ovulation": 5,
-        "Luteal": 3
-    }
-    return energy_map.get(phase, 3)
+    return content.phase_energy_level(phase)
 
 
 def get_phase_description(phase):
-    descriptions = {
-        "Menstrual": {
-            "emoji": "🩸",
-            "summary": "Your body is shedding the uterine lining",
-            "hormones": "Both estrogen and progesterone are at their lowest",
-            "feeling": "It's completely normal to feel drained, emotional, or want to curl up in bed. Your body is doing intense biological work — be kind to yourself.",
-            "tip": "This is your body's natural reset. Honor the need for rest, warmth, and gentle movement."
-        },
-        "Follicular": {
-            "emoji": "🌱",
-            "summary": "Your body is preparing to release an egg",
-            "hormones": "Estrogen is rising steadily",
-            "feeling": "You might notice your mood lifting, energy returning, and skin glowing. This is your 'spring' phase — new ideas and motivation come naturally.",
-            "tip": "Harness this energy! Start new projects, have difficult conversations, tackle your hardest tasks."
-        },
-        "Ovulation": {
-            "emoji": "✨",
-            "summary": "Your body releases an egg — peak fertility",
-            "hormones": "Estrogen and testosterone peak together",
-            "feeling": "This is your superpower window. You feel confident, social, strong, and clear-headed. Everything feels easier right now.",
-            "tip": "Schedule presentations, workouts, social events, and challenging tasks here. You're literally at your best."
-        },
-        "Luteal": {
-            "emoji": "🌙",
-            "summary": "Your body prepares for either pregnancy or menstruation",
-            "hormones": "Progesterone rises, then both hormones drop sharply before your period",
-            "feeling": "It's completely normal to feel drained, irritable, or foggy — especially in the second half. The hormone crash is real and it's not in your head.",
-            "tip": "This is your 'autumn' phase. Focus on finishing what you started, not starting new things. Rest is productive."
-        }
-    }
-    return descriptions.get(phase, descriptions["Follicular"])
+    return content.phase_description(phase)
 
 
 def get_exercise_recommendation(phase):
-    recommendations = {
-        "Menstrual": {
-            "type": "🧘 Gentle yoga, walking, stretching",
-            "why": "Low progesterone and estrogen — your body needs rest and gentle movement."
-        },
-        "Follicular": {
-            "type": "🏃 HIIT, running, strength training",
-            "why": "Rising estrogen boosts energy and muscle building capacity."
-        },
-        "Ovulation": {
-            "type": "💪 Peak performance training, heavy lifting",
-            "why": "Testosterone and estrogen peak — your strongest days."
-        },
-        "Luteal": {
-            "type": "🚴 Moderate cardio, pilates, swimming",
-            "why": "Progesterone rises — focus on steady-state endurance."
-        }
-    }
-    return recommendations.get(phase, recommendations["Follicular"])
+    return content.exercise_recommendation(phase)
 
 
 # ----------------------------------------
@@ -592,6 +396,7 @@ with st.sidebar:
 
     st.title("🌙 Mooncyc")
     st.caption("*Your daily organizer buddy who gets your cycle*")
+    st.caption(f"👤 Your Mooncyc ID: `{st.session_state.user_id}` — bookmark this page to come back to your data")
     st.divider()
     
     # LLM API KEY INPUT
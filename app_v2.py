@@ -1,26 +1,16 @@
+import os
 import streamlit as st
 import pandas as pd
-import plotly.graph_objects as go
-import json
-import os
-import random
-import requests
-import cohere
+import uuid
 from datetime import date, timedelta
-from collections import defaultdict
-from dotenv import load_dotenv
-
-# ─────────────────────────────────────────────────
-# LOAD API KEYS
-# Your .env file should contain:
-#   COHERE_API_KEY=your_key_here
-#   ELEVENLABS_API_KEY=your_key_here
-# ─────────────────────────────────────────────────
-load_dotenv()
-COHERE_API_KEY    = os.getenv("COHERE_API_KEY", "")
-ELEVENLABS_API_KEY = os.getenv("ELEVENLABS_API_KEY", "")
-
-co = cohere.ClientV2(COHERE_API_KEY) if COHERE_API_KEY else None
+from mooncyc import (analytics, content, cooccurrence, cycle, energy, figures, forecast, history, ics, importer, jobs, plan,
+                     ratelimit, retrieval, rollups, search, singleflight, storage, usage)
+# Every AI call lives in mooncyc/ai.py (shared with the HTTP API in mooncyc/api.py);
+# API keys and MOONCYC_STUB_URL are read there.
+from mooncyc.ai import (COHERE_API_KEY, ELEVENLABS_API_KEY, GENERATION_ERRORS, STUB_URL, co, find_or_write_meditation,
+                        get_cycle_plan, get_cycle_quote, get_fasting_advice, get_llm_meal_plan, get_llm_remedies,
+                        get_symptom_insights, meditation_conversation, parse_fasting_advice, refine_meditation,
+                        regenerate_plan_day, text_to_speech)
 
 
 # ─────────────────────────────────────────────────
@@ -113,517 +103,197 @@ st.markdown("""
 # ─────────────────────────────────────────────────
 # STORAGE
 # ─────────────────────────────────────────────────
-CYCLE_FILE = "cycle_data.json"
-TASKS_FILE = "tasks.json"
+# Data is stored per user (see mooncyc/storage.py). The user id lives in
+# the ?user= query parameter, so bookmarking the page brings you back.
+
+def resolve_user_id() -> str:
+    user_id = st.query_params.get("user")
+    if not storage.valid_user_id(user_id):
+        user_id = uuid.uuid4().hex
+        st.query_params["user"] = user_id
+    return user_id
 
 
 def load_cycle_data():
-    if os.path.exists(CYCLE_FILE):
-        with open(CYCLE_FILE, "r") as f:
-            data = json.load(f)
-        if data.get("last_period"):
-            data["last_period"] = date.fromisoformat(data["last_period"])
-        for entry in data.get("symptoms_log", []):
-            if "date" in entry:
-                entry["date"] = date.fromisoformat(entry["date"])
-        return data
-    return {"last_period": None, "cycle_length": 28, "period_length": 5, "symptoms_log": []}
+    return storage.load_cycle_data(st.session_state.user_id)
 
 
 def save_cycle_data(data):
-    data_copy = data.copy()
-    if data_copy.get("last_period"):
-        data_copy["last_period"] = data_copy["last_period"].isoformat()
-    symptoms_copy = []
-    for entry in data_copy.get("symptoms_log", []):
-        entry_copy = entry.copy()
-        if "date" in entry_copy:
-            entry_copy["date"] = entry_copy["date"].isoformat()
-        symptoms_copy.append(entry_copy)
-    data_copy["symptoms_log"] = symptoms_copy
-    with open(CYCLE_FILE, "w") as f:
-        json.dump(data_copy, f, indent=2)
+    storage.save_cycle_data(st.session_state.user_id, data)
 
 
 def load_tasks():
-    if os.path.exists(TASKS_FILE):
-        with open(TASKS_FILE, "r") as f:
-            tasks = json.load(f)
-        for task in tasks:
-            if task.get("deadline"):
-                task["deadline"] = date.fromisoformat(task["deadline"])
-        return tasks
-    return []
+    return storage.load_tasks(st.session_state.user_id)
 
 
 def save_tasks(tasks):
-    tasks_copy = []
-    for task in tasks:
-        t = task.copy()
-        if t.get("deadline"):
-            t["deadline"] = t["deadline"].isoformat()
-        tasks_copy.append(t)
-    with open(TASKS_FILE, "w") as f:
-        json.dump(tasks_copy, f, indent=2)
+    storage.save_tasks(st.session_state.user_id, tasks)
+
+
+def remember_generation(kind: str, output, phase: str = None, **inputs):
+    """Saves a successful AI output (text or a dict of fields) to the user's
+    generation history and search index. Errors and placeholders are skipped."""
+    if isinstance(output, dict) and output.get("generated_by") == "Pre-written":
+        return
+    text = "\n".join(str(v) for v in output.values() if v) if isinstance(output, dict) else output
+    if not co or not text or text.startswith(GENERATION_ERRORS):
+        return
+    folder = storage.user_dir(st.session_state.user_id)
+    gen_id = history.record(folder, kind, output, date.today(), phase,
+                            current_cycle_start(st.session_state.cycle_data), inputs)
+    search.add_document(folder, kind, text, date.today(), gen_id)
+
+
+# Generation kind -> the session_state slot it is shown from
+HISTORY_SLOTS = {"meditation": "current_meditation", "meal_plan": "current_meal_plan",
+                 "remedy": "current_remedy", "fasting": "fasting_advice", "insights": "monthly_insights"}
+
+
+def show_plan_day(day_plan):
+    """Puts a stored cycle-plan day (mooncyc/plan.py) on today's meal, fasting and meditation cards."""
+    if day_plan is None:
+        return
+    if day_plan["meal"]:
+        st.session_state.current_meal_plan = day_plan["meal"]
+    if day_plan["fasting"]:
+        st.session_state.fasting_advice = day_plan["fasting"]
+    st.session_state.plan_meditation = day_plan["meditation"]
+
+
+def pin_to_plan(part: str, output: dict, phase: str):
+    """A one-off generation for today replaces that part of today's planned day."""
+    text = " ".join(str(v) for v in output.values() if v)
+    if output.get("generated_by") == "Pre-written" or not co or not text or text.startswith(GENERATION_ERRORS):
+        return
+    plan.override(storage.user_dir(st.session_state.user_id), date.today(), phase,
+                  current_cycle_start(st.session_state.cycle_data), **{part: output})
+
+
+def rehydrate_from_history(phase: str):
+    """Fills empty dashboard cards with today's cycle-plan day, then this cycle's latest
+    generations for the current phase (insights: for the whole cycle), so a refresh
+    doesn't cost a new LLM call."""
+    folder      = storage.user_dir(st.session_state.user_id)
+    show_plan_day(plan.for_day(folder, date.today()))
+    cycle_start = current_cycle_start(st.session_state.cycle_data)
+    restored    = history.latest_by_kind(folder, [k for k in HISTORY_SLOTS if k != "insights"], phase, cycle_start)
+    restored.update(history.latest_by_kind(folder, ["insights"], cycle_start=cycle_start))
+    for kind, row in restored.items():
+        if st.session_state[HISTORY_SLOTS[kind]] is None:
+            st.session_state[HISTORY_SLOTS[kind]] = row["output"]
+    if "meditation" in restored and not st.session_state.meditation_messages:
+        inputs = restored["meditation"]["inputs"]
+        st.session_state.meditation_messages = meditation_conversation(
+            phase, inputs.get("mood", "Neutral"), inputs.get("symptoms", []), inputs.get("age"),
+            restored["meditation"]["output"])
+
+
+# ─────────────────────────────────────────────────
+# BACKGROUND JOBS
+# ─────────────────────────────────────────────────
+# Slow AI calls and audio run on the shared job queue (see mooncyc/jobs.py) so
+# the page stays usable. The session only remembers which job fills which
+# card; job_card polls it once a second and hands the result over when done.
+
+def job_caller(card: str) -> str:
+    """This session's id for `card` on the shared queue, so duplicate jobs know who's waiting."""
+    return f"{st.session_state.session_token}:{card}"
+
+
+def start_job(card: str, kind: str, fn, *args, **kwargs):
+    st.session_state.job_errors.pop(card, None)
+    st.session_state.jobs[card] = jobs.queue().submit(kind, fn, *args, caller=job_caller(card), **kwargs).id
+
+
+@st.fragment(run_every=1)
+def job_progress(card: str, label: str, on_done):
+    job = jobs.queue().get(st.session_state.jobs.get(card))
+    if job is not None and job.status in jobs.PENDING:
+        st.progress(job.progress, text=f"{job.message or label} ({job.elapsed:.0f}s)")
+        if st.button("✖️ Cancel", key=f"cancel_{card}"):
+            jobs.queue().cancel(job.id, job_caller(card))
+            st.session_state.jobs.pop(card, None)
+            st.rerun()
+        return
+    st.session_state.jobs.pop(card, None)
+    if job is not None and job.status == "done":
+        on_done(job.result)
+    elif job is not None and job.status == "failed":
+        st.session_state.job_errors[card] = job.error
+    st.rerun()
+
+
+def job_card(card: str, label: str, on_done):
+    """Progress + cancel for the card's running job, or the error its last job ended with."""
+    if card in st.session_state.jobs:
+        job_progress(card, label, on_done)
+    if card in st.session_state.job_errors:
+        st.error(st.session_state.job_errors[card])
 
 
 # ─────────────────────────────────────────────────
 # SESSION STATE
 # ─────────────────────────────────────────────────
+if "user_id"             not in st.session_state: st.session_state.user_id = resolve_user_id()
 if "cycle_data"          not in st.session_state: st.session_state.cycle_data = load_cycle_data()
 if "tasks"               not in st.session_state: st.session_state.tasks = load_tasks()
 if "meditation_messages" not in st.session_state: st.session_state.meditation_messages = []
 if "current_meditation"  not in st.session_state: st.session_state.current_meditation = None
 if "meditation_audio"    not in st.session_state: st.session_state.meditation_audio = None
+if "meditation_id"       not in st.session_state: st.session_state.meditation_id = None      # row in the meditation library
+if "meditation_reused"   not in st.session_state: st.session_state.meditation_reused = False
+if "meditation_rated"    not in st.session_state: st.session_state.meditation_rated = False
 if "current_meal_plan"   not in st.session_state: st.session_state.current_meal_plan = None
 if "current_remedy"      not in st.session_state: st.session_state.current_remedy = None
 if "monthly_insights"    not in st.session_state: st.session_state.monthly_insights = None
 if "fasting_advice"      not in st.session_state: st.session_state.fasting_advice = None
+if "plan_meditation"     not in st.session_state: st.session_state.plan_meditation = None   # today's theme from the cycle plan
 if "quote_refresh_count" not in st.session_state: st.session_state.quote_refresh_count = 0
+if "figure_cache"        not in st.session_state: st.session_state.figure_cache = figures.FigureCache()
+if "jobs"                not in st.session_state: st.session_state.jobs = {}         # card -> running job id
+if "session_token"       not in st.session_state: st.session_state.session_token = uuid.uuid4().hex
+if "job_errors"          not in st.session_state: st.session_state.job_errors = {}   # card -> last failure
 
 
 # ─────────────────────────────────────────────────
 # CYCLE LOGIC
 # ─────────────────────────────────────────────────
+# The rules live in mooncyc/cycle.py so the calendar export uses the same ones.
 def get_cycle_phase(cycle_data, target_date=None):
-    if not cycle_data["last_period"]:
-        return None
-    if target_date is None:
-        target_date = date.today()
-    days_since = (target_date - cycle_data["last_period"]).days
-    day_in_cycle = days_since % cycle_data["cycle_length"]
-    period_len = cycle_data["period_length"]
-    if day_in_cycle < period_len:       return "Menstrual"
-    elif day_in_cycle < 14:             return "Follicular"
-    elif day_in_cycle < 16:             return "Ovulation"
-    else:                               return "Luteal"
-
-
-def get_phase_energy_level(phase):
-    return {"Menstrual": 2, "Follicular": 4, "Ovulation": 5, "Luteal": 3}.get(phase, 3)
+    return cycle.phase_on(cycle_data, target_date)
 
 
-def get_phase_description(phase):
-    descriptions = {
-        "Menstrual": {
-            "emoji": "🩸", "summary": "Your body is shedding the uterine lining",
-            "hormones": "Both estrogen and progesterone are at their lowest",
-            "feeling": "It's completely normal to feel drained, emotional, or want to curl up in bed. Your body is doing intense biological work — be kind to yourself.",
-            "tip": "This is your body's natural reset. Honor the need for rest, warmth, and gentle movement."
-        },
-        "Follicular": {
-            "emoji": "🌱", "summary": "Your body is preparing to release an egg",
-            "hormones": "Estrogen is rising steadily",
-            "feeling": "You might notice your mood lifting, energy returning, and skin glowing. This is your spring phase — new ideas and motivation come naturally.",
-            "tip": "Harness this energy! Start new projects, have difficult conversations, tackle your hardest tasks."
-        },
-        "Ovulation": {
-            "emoji": "✨", "summary": "Your body releases an egg — peak fertility",
-            "hormones": "Estrogen and testosterone peak together",
-            "feeling": "This is your superpower window. You feel confident, social, strong, and clear-headed. Everything feels easier right now.",
-            "tip": "Schedule presentations, workouts, social events, and challenging tasks here. You're literally at your best."
-        },
-        "Luteal": {
-            "emoji": "🌙", "summary": "Your body prepares for either pregnancy or menstruation",
-            "hormones": "Progesterone rises, then both hormones drop sharply before your period",
-            "feeling": "It's completely normal to feel drained, irritable, or foggy — especially in the second half. The hormone crash is real and it's not in your head.",
-            "tip": "This is your autumn phase. Focus on finishing what you started, not starting new things. Rest is productive."
-        }
-    }
-    return descriptions.get(phase, descriptions["Follicular"])
-
+def current_cycle_start(cycle_data, target_date=None):
+    """First day of the cycle `target_date` falls in (None without a last period)."""
+    return cycle.cycle_start(cycle_data, target_date)
 
-def get_exercise_recommendation(phase):
-    recommendations = {
-        "Menstrual": {"type": "🧘 Gentle yoga, walking, stretching", "why": "Low progesterone and estrogen — your body needs rest and gentle movement."},
-        "Follicular": {"type": "🏃 HIIT, running, strength training", "why": "Rising estrogen boosts energy and muscle building capacity."},
-        "Ovulation":  {"type": "💪 Peak performance training, heavy lifting", "why": "Testosterone and estrogen peak — your strongest days."},
-        "Luteal":     {"type": "🚴 Moderate cardio, pilates, swimming", "why": "Progesterone rises — focus on steady-state endurance."}
-    }
-    return recommendations.get(phase, recommendations["Follicular"])
 
+def cycle_tensor(cycle_data):
+    """Multi-cycle analytics (mooncyc/analytics.py) for this session, rebuilt only when the data changes."""
+    key = (storage.dataset_version(st.session_state.user_id), len(cycle_data["symptoms_log"]),
+           cycle_data["last_period"], cycle_data["cycle_length"], len(cycle_data.get("period_starts", ())))
+    cached = st.session_state.get("cycle_tensor")
+    if cached is None or cached[0] != key:
+        cached = st.session_state.cycle_tensor = (key, analytics.CycleTensor(cycle_data))
+    return cached[1]
 
-# ─────────────────────────────────────────────────
-# FEATURE 1: DAILY QUOTE (ZenQuotes API)
-# ─────────────────────────────────────────────────
-# ZenQuotes is free, no API key needed, and has 100s of quotes.
-# It returns a fresh random quote on every call.
-# We also keep a large per-phase fallback list so the button
-# always produces a different quote even if the API is down.
-
-FALLBACK_QUOTES = {
-    "Menstrual": [
-        {"content": "Rest when you're weary. Refresh and renew yourself, your body, your mind, your spirit.", "author": "Ralph Marston"},
-        {"content": "Almost everything will work again if you unplug it for a few minutes, including you.", "author": "Anne Lamott"},
-        {"content": "Self-care is not self-indulgence. Self-care is self-preservation.", "author": "Audre Lorde"},
-        {"content": "You don't have to be positive all the time. It's perfectly okay to feel sad, angry, annoyed, or overwhelmed.", "author": "Lori Deschene"},
-        {"content": "Be gentle with yourself. You are a child of the universe, no less than the trees and the stars.", "author": "Max Ehrmann"},
-        {"content": "Nourishing yourself in a way that helps you blossom in the direction you want to go is attainable.", "author": "Deborah Day"},
-        {"content": "Rest and self-care are so important. When you take time to replenish your spirit, it allows you to serve others.", "author": "Eleanor Brown"},
-        {"content": "To love oneself is the beginning of a lifelong romance.", "author": "Oscar Wilde"},
-    ],
-    "Follicular": [
-        {"content": "The secret of getting ahead is getting started.", "author": "Mark Twain"},
-        {"content": "Each day is a new beginning. The sky is clearing and the sun shines anew.", "author": "Sarah Ban Breathnach"},
-        {"content": "With the new day comes new strength and new thoughts.", "author": "Eleanor Roosevelt"},
-        {"content": "The beginning is always today.", "author": "Mary Wollstonecraft"},
-        {"content": "Every day is a new opportunity to grow.", "author": "Roy T. Bennett"},
-        {"content": "Start where you are. Use what you have. Do what you can.", "author": "Arthur Ashe"},
-        {"content": "Do something today that your future self will thank you for.", "author": "Sean Patrick Flanery"},
-        {"content": "Believe you can and you're halfway there.", "author": "Theodore Roosevelt"},
-    ],
-    "Ovulation": [
-        {"content": "You are braver than you believe, stronger than you seem, and smarter than you think.", "author": "A.A. Milne"},
-        {"content": "The most courageous act is still to think for yourself. Aloud.", "author": "Coco Chanel"},
-        {"content": "She believed she could, so she did.", "author": "R.S. Grey"},
-        {"content": "You have within you right now, everything you need to deal with whatever the world can throw at you.", "author": "Brian Tracy"},
-        {"content": "The question isn't who's going to let me; it's who is going to stop me.", "author": "Ayn Rand"},
-        {"content": "I am not afraid. I was born to do this.", "author": "Joan of Arc"},
-        {"content": "Your potential is limitless. Keep going.", "author": "Roy T. Bennett"},
-        {"content": "Confidence is not 'they will like me'. Confidence is 'I'll be fine if they don't'.", "author": "Christina Grimmie"},
-    ],
-    "Luteal": [
-        {"content": "In the middle of difficulty lies opportunity.", "author": "Albert Einstein"},
-        {"content": "Patience is not the ability to wait, but the ability to keep a good attitude while waiting.", "author": "Joyce Meyer"},
-        {"content": "Wisdom is knowing what to do next, virtue is doing it.", "author": "David Starr Jordan"},
-        {"content": "The quieter you become, the more you are able to hear.", "author": "Rumi"},
-        {"content": "Almost everything will work again if you unplug it for a few minutes, including you.", "author": "Anne Lamott"},
-        {"content": "Within you there is a stillness and a sanctuary to which you can retreat at any time.", "author": "Hermann Hesse"},
-        {"content": "Grant me the serenity to accept the things I cannot change.", "author": "Reinhold Niebuhr"},
-        {"content": "Nothing is permanent. This too shall pass.", "author": "Persian proverb"},
-    ]
-}
-
-
-def get_cycle_quote(phase: str, previous_content: str = "") -> dict:
-    try:
-        response = requests.get("https://zenquotes.io/api/random", timeout=5)
-        if response.status_code == 200:
-            data = response.json()
-            # ZenQuotes returns a list with one item: [{"q": "quote", "a": "author"}]
-            if data and data[0].get("q") and data[0]["q"] != previous_content:
-                return {"content": data[0]["q"], "author": data[0]["a"]}
-    except requests.exceptions.RequestException:
-        pass
-
-    # Fallback: pick randomly from the curated per-phase list,
-    # avoiding the previous quote so it always feels fresh
-    options = [q for q in FALLBACK_QUOTES.get(phase, FALLBACK_QUOTES["Follicular"])
-               if q["content"] != previous_content]
-    if not options:
-        options = FALLBACK_QUOTES.get(phase, FALLBACK_QUOTES["Follicular"])
-    return random.choice(options)
-
-
-# ─────────────────────────────────────────────────
-# FEATURE 2: AI MEDITATION + ITERATIVE REFINEMENT
-# ─────────────────────────────────────────────────
-def get_initial_meditation(phase: str, mood: str, symptoms: list, age: int) -> str:
-    if not co:
-        return "Add COHERE_API_KEY to your .env file to unlock AI meditations."
-
-    symptom_str = ", ".join(symptoms) if symptoms else "no specific symptoms"
-    age_context = f"The user is {age} years old." if age else ""
-
-    system_message = """You are a compassionate mindfulness guide who specializes in 
-    menstrual cycle wellness. You write personalized, gentle, and grounding meditation 
-    scripts. Your scripts are warm, poetic, and practical. Each step is a short paragraph."""
-
-    user_message = f"""Write a personalized meditation script for someone in their {phase} phase.
-{age_context}
-Current mood: {mood}
-Symptoms today: {symptom_str}
-
-The meditation should:
-- Start by acknowledging exactly how they feel right now
-- Use imagery that matches the energy of the {phase} phase
-- Be gentle and compassionate in tone
-- End with an empowering affirmation suited to this phase
-- Be 5-7 minutes long (mention the duration at the start)
-
-Write the full script, ready to be read or followed."""
-
-    try:
-        response = co.chat(
-            model="command-r-plus-08-2024",
-            messages=[
-                {"role": "system", "content": system_message},
-                {"role": "user",   "content": user_message}
-            ]
-        )
-        return response.message.content[0].text
-    except Exception as e:
-        return f"Could not connect to Cohere: {str(e)}"
-
-
-def refine_meditation(messages_history: list, user_feedback: str) -> tuple:
-    if not co:
-        return "Add COHERE_API_KEY to your .env file.", messages_history
-
-    updated_history = messages_history + [{
-        "role": "user",
-        "content": f"This meditation didn't quite work for me. Here is what I would like changed: {user_feedback}\n\nCan you rewrite the meditation taking this into account? Keep the same warm, guided format."
-    }]
-
-    try:
-        response = co.chat(model="command-r-plus-08-2024", messages=updated_history)
-        new_meditation = response.message.content[0].text
-        updated_history.append({"role": "assistant", "content": new_meditation})
-        return new_meditation, updated_history
-    except Exception as e:
-        return f"Could not connect to Cohere: {str(e)}", messages_history
 
-
-# ─────────────────────────────────────────────────
-# ELEVENLABS TEXT-TO-SPEECH
-# ─────────────────────────────────────────────────
-# Converts the LLM meditation script to MP3 audio.
-
-def text_to_speech(text: str) -> tuple:
-    """Returns (audio_bytes_or_None, error_message_or_None)"""
-    if not ELEVENLABS_API_KEY:
-        return None, "No ElevenLabs API key found. Add ELEVENLABS_API_KEY to your .env file."
-
-    VOICE_ID = "21m00Tcm4TlvDq8ikWAM"
-    url      = f"https://api.elevenlabs.io/v1/text-to-speech/{VOICE_ID}"
-    headers  = {"xi-api-key": ELEVENLABS_API_KEY, "Content-Type": "application/json"}
-    payload  = {
-        "text": text[:2500],   # trim to stay inside free tier
-        "model_id": "eleven_turbo_v2",
-        "voice_settings": {"stability": 0.80, "similarity_boost": 0.75, "speed": 0.75}
-    }
-
-    try:
-        response = requests.post(url, json=payload, headers=headers, timeout=30)
-        if response.status_code == 200:
-            return response.content, None
-        else:
-            # Show the actual ElevenLabs error so we can debug it
-            try:
-                body = response.json()
-                msg  = body.get("detail", {}).get("message", str(body))
-            except Exception:
-                msg = f"HTTP {response.status_code}"
-            return None, f"ElevenLabs error: {msg}"
-    except requests.exceptions.RequestException as e:
-        return None, f"Network error contacting ElevenLabs: {str(e)}"
-
-
-# ─────────────────────────────────────────────────
-# FEATURE 3: AI MEAL PLAN
-# ─────────────────────────────────────────────────
-def get_llm_meal_plan(phase: str, symptoms: list, age: int) -> dict:
-    if not co:
-        return {"breakfast": "Add COHERE_API_KEY to .env to unlock AI meal plans",
-                "lunch": "", "dinner": "", "snacks": "", "why": ""}
-
-    symptom_str = ", ".join(symptoms) if symptoms else "no specific symptoms"
-    age_context = f"The user is {age} years old." if age else ""
-
-    system_message = """You are a nutritionist specializing in cycle-syncing nutrition. 
-    You create personalized, practical meal plans that support hormonal health at each 
-    phase of the menstrual cycle. Your suggestions are realistic, delicious, and evidence-based."""
-
-    user_message = f"""Create a one-day meal plan for someone in their {phase} phase.
-{age_context}
-Current symptoms: {symptom_str}
-
-Respond ONLY in this exact format with no extra text before or after:
-BREAKFAST: [meal with emoji]
-LUNCH: [meal with emoji]
-DINNER: [meal with emoji]
-SNACKS: [snacks with emoji]
-WHY: [1-2 sentences on the nutritional logic for this phase, symptoms, and age]"""
-
-    try:
-        response = co.chat(
-            model="command-r-plus-08-2024",
-            messages=[{"role": "system", "content": system_message},
-                      {"role": "user",   "content": user_message}]
-        )
-        raw    = response.message.content[0].text
-        result = {"breakfast": "", "lunch": "", "dinner": "", "snacks": "", "why": ""}
-        for line in raw.strip().split("\n"):
-            if   line.startswith("BREAKFAST:"): result["breakfast"] = line.replace("BREAKFAST:", "").strip()
-            elif line.startswith("LUNCH:"):     result["lunch"]     = line.replace("LUNCH:", "").strip()
-            elif line.startswith("DINNER:"):    result["dinner"]    = line.replace("DINNER:", "").strip()
-            elif line.startswith("SNACKS:"):    result["snacks"]    = line.replace("SNACKS:", "").strip()
-            elif line.startswith("WHY:"):       result["why"]       = line.replace("WHY:", "").strip()
-        if not result["breakfast"]:
-            result["breakfast"] = "Could not parse — try regenerating"
-        return result
-    except Exception as e:
-        return {"breakfast": f"Error: {str(e)}", "lunch": "", "dinner": "", "snacks": "", "why": ""}
+def my_library():
+    """This user's meditation library (mooncyc/retrieval.py)."""
+    return retrieval.library(st.session_state.user_id)
 
 
-# ─────────────────────────────────────────────────
-# FEATURE 4: AI NATURAL REMEDIES
-# ─────────────────────────────────────────────────
-def get_llm_remedies(symptoms: list, phase: str, age: int) -> str:
-    if not co:
-        return "Add COHERE_API_KEY to your .env file to unlock AI remedies."
-    if not symptoms:
-        return "No symptoms logged. Track how you are feeling above to get personalized remedies."
-
-    symptom_str = ", ".join(symptoms)
-    age_context = f"The user is {age} years old." if age else ""
-
-    system_message = """You are a holistic women's health coach with expertise in natural, 
-    evidence-based remedies for menstrual cycle symptoms. You give warm, practical advice 
-    grounded in science. Always remind users to consult a healthcare provider for severe symptoms."""
-
-    user_message = f"""The user is in their {phase} phase and is experiencing: {symptom_str}
-{age_context}
-
-For each symptom, provide a natural remedy:
-**[Symptom name]**
-Remedy: [what to do]
-How: [specific, actionable instructions]
-Why it works: [brief science-backed explanation, 1 sentence]
-
-After all symptoms, add one short closing note about how these remedies interact 
-with the {phase} phase specifically. Keep each remedy concise and practical."""
-
-    try:
-        response = co.chat(
-            model="command-r-plus-08-2024",
-            messages=[{"role": "system", "content": system_message},
-                      {"role": "user",   "content": user_message}]
-        )
-        return response.message.content[0].text
-    except Exception as e:
-        return f"Could not connect to Cohere: {str(e)}"
+def energy_model(cycle_data):
+    """Expected energy by day of cycle, learned from this user's logged energy (mooncyc/energy.py)."""
+    return energy.model_for(st.session_state.user_id, cycle_data)
 
 
-# ─────────────────────────────────────────────────
-# FEATURE 5: INTERMITTENT FASTING ADVISOR
-# ─────────────────────────────────────────────────
-# LLM receives the cycle phase, cycle day number, age, and current symptoms — then decides:
-#   - Is today a good day to fast? (yes/no + reason)
-#   - If yes: what is the maximum safe fasting window?
-#   - If no: what should the user eat instead?
-
-def get_fasting_advice(phase: str, day_in_cycle: int, symptoms: list, age: int) -> str:
-    if not co:
-        return "Add COHERE_API_KEY to your .env file to unlock fasting advice."
-
-    symptom_str  = ", ".join(symptoms) if symptoms else "no specific symptoms"
-    age_context  = f"The user is {age} years old." if age else ""
-
-    system_message = """You are a women's health nutritionist with expertise in 
-    intermittent fasting and menstrual cycle nutrition. You give evidence-based, 
-    safety-conscious advice on whether fasting is appropriate at each cycle phase. 
-    You are direct and practical. You always prioritize the user's wellbeing and 
-    remind them to consult a doctor if they have any health conditions."""
-
-    user_message = f"""Should this person do intermittent fasting today?
-
-Cycle phase: {phase}
-Day in cycle: {day_in_cycle}
-Current symptoms: {symptom_str}
-{age_context}
-
-Please respond in this exact format:
-RECOMMENDATION: [Good day to fast / Not recommended today]
-MAX HOURS: [e.g. 14 hours, or N/A if not recommended]
-REASON: [2-3 sentences explaining why, referencing the specific phase and symptoms]
-TIP: [One specific, practical tip for today — either how to do the fast safely, or what to eat instead if not fasting]"""
-
-    try:
-        response = co.chat(
-            model="command-r-plus-08-2024",
-            messages=[{"role": "system", "content": system_message},
-                      {"role": "user",   "content": user_message}]
-        )
-        return response.message.content[0].text
-    except Exception as e:
-        return f"Could not connect to Cohere: {str(e)}"
-
-
-def parse_fasting_advice(raw: str) -> dict:
-    """Parses the structured LLM fasting response into a dict for display."""
-    result = {"recommendation": "", "max_hours": "", "reason": "", "tip": ""}
-    for line in raw.strip().split("\n"):
-        if   line.startswith("RECOMMENDATION:"): result["recommendation"] = line.replace("RECOMMENDATION:", "").strip()
-        elif line.startswith("MAX HOURS:"):       result["max_hours"]      = line.replace("MAX HOURS:", "").strip()
-        elif line.startswith("REASON:"):          result["reason"]         = line.replace("REASON:", "").strip()
-        elif line.startswith("TIP:"):             result["tip"]            = line.replace("TIP:", "").strip()
-    if not result["recommendation"]:
-        result["recommendation"] = raw  # show raw text if parsing fails
-    return result
+def get_phase_description(phase):
+    return content.phase_description(phase)
 
 
-# ─────────────────────────────────────────────────
-# FEATURE 6: SYMPTOM PATTERN ANALYZER
-# ─────────────────────────────────────────────────
-def build_symptom_analysis_prompt(symptoms_log: list, cycle_length: int, age: int) -> str:
-    if not symptoms_log:
-        return ""
-
-    phase_symptoms = defaultdict(list)
-    phase_moods    = defaultdict(list)
-    phase_energy   = defaultdict(list)
-
-    for entry in symptoms_log:
-        p = entry.get("phase", "Unknown")
-        if p and p != "Unknown":
-            for symptom in entry.get("symptoms", []):
-                if symptom != "None":
-                    phase_symptoms[p].append(symptom)
-            if entry.get("mood"):   phase_moods[p].append(entry["mood"])
-            if entry.get("energy"): phase_energy[p].append(entry["energy"])
-
-    phase_symptom_counts = {}
-    for p, slist in phase_symptoms.items():
-        counts = defaultdict(int)
-        for s in slist: counts[s] += 1
-        phase_symptom_counts[p] = sorted(counts.items(), key=lambda x: x[1], reverse=True)[:5]
-
-    avg_energy = {}
-    for p, energies in phase_energy.items():
-        avg_energy[p] = round(sum(energies) / len(energies), 1) if energies else "N/A"
-
-    age_context = f"The user is {age} years old." if age else ""
-    prompt = f"""You are a compassionate women's health coach analyzing a user's menstrual cycle data.
-{age_context}
-The user has a {cycle_length}-day cycle and has logged {len(symptoms_log)} days of data.
-
-Symptom and mood pattern by cycle phase:
-"""
-    for p in ["Menstrual", "Follicular", "Ovulation", "Luteal"]:
-        top = phase_symptom_counts.get(p, [])
-        avg_e = avg_energy.get(p, "N/A")
-        moods = phase_moods.get(p, [])
-        prompt += f"\n**{p} Phase** (average energy: {avg_e}/5):\n"
-        prompt += f"  Symptoms: {', '.join([f'{s} (x{c})' for s,c in top]) if top else 'none logged yet'}\n"
-        if moods: prompt += f"  Recent moods: {', '.join(moods[-3:])}\n"
-
-    prompt += """
-Based on this data, provide:
-1. **Top 3 Pattern Observations** — be concrete, reference the actual data.
-2. **Personalized Recommendations for Next Cycle** — 3 specific suggestions, each mentioning which phase.
-3. **One Thing to Watch** — one symptom or trend to monitor next cycle, and why.
-
-Warm, supportive tone. Concise. Address the user as "you".
-"""
-    return prompt
-
-
-def get_symptom_insights(symptoms_log: list, cycle_length: int, age: int) -> str:
-    if not co:
-        return "Add COHERE_API_KEY to your .env file to unlock AI cycle analysis."
-    if len(symptoms_log) < 5:
-        return "Log at least 5 days of symptoms to unlock your personalized cycle insights."
-
-    prompt = build_symptom_analysis_prompt(symptoms_log, cycle_length, age)
-    try:
-        response = co.chat(
-            model="command-r-plus-08-2024",
-            messages=[{"role": "user", "content": prompt}]
-        )
-        return response.message.content[0].text
-    except Exception as e:
-        return f"Could not connect to Cohere: {str(e)}"
+def get_exercise_recommendation(phase):
+    return content.exercise_recommendation(phase)
 
 
 # ─────────────────────────────────────────────────
@@ -632,8 +302,11 @@ def get_symptom_insights(symptoms_log: list, cycle_length: int, age: int) -> str
 with st.sidebar:
     st.title("🌙 Mooncyc")
     st.caption("*Your daily cycle buddy*")
+    st.caption(f"👤 Your Mooncyc ID: `{st.session_state.user_id}` — bookmark this page to come back to your data")
     st.divider()
 
+    if STUB_URL:
+        st.info(f"🧪 Offline stubs: {STUB_URL}")
     if co:
         st.success("🤖 AI features: Active")
     else:
@@ -659,12 +332,162 @@ with st.sidebar:
     user_age = st.number_input("My Age", min_value=13, max_value=60, value=25, step=1)
 
     if st.button("💾 Save My Info"):
-        st.session_state.cycle_data["last_period"]  = last_period
         st.session_state.cycle_data["cycle_length"] = cycle_length
         st.session_state.cycle_data["period_length"]= period_length
+        # every recorded start is a real cycle boundary for the pattern charts;
+        # moving the date by less than half a cycle corrects the last one
+        cycle.record_period_start(st.session_state.cycle_data, last_period)
         save_cycle_data(st.session_state.cycle_data)
         st.success("✨ Saved")
 
+    starts = st.session_state.cycle_data.get("period_starts") or []
+    if starts:
+        with st.expander(f"🩸 Recorded period starts ({len(starts)})"):
+            wrong = st.multiselect("Remove starts logged by mistake", starts,
+                                   format_func=lambda d: d.strftime("%b %d, %Y"))
+            if wrong and st.button("Remove selected"):
+                st.session_state.cycle_data["period_starts"] = [d for d in starts if d not in wrong]
+                save_cycle_data(st.session_state.cycle_data)
+                st.rerun()
+
+    st.divider()
+    with st.expander("💾 My data (JSON)"):
+        if st.button("Prepare export"):
+            st.session_state.export_json = storage.export_json(st.session_state.user_id)
+        if st.session_state.get("export_json"):
+            st.download_button("⬇️ Download cycle_data.json", st.session_state.export_json,
+                               file_name="cycle_data.json", mime="application/json")
+        uploaded = st.file_uploader("Import a cycle_data.json", type="json")
+        if uploaded and st.button("Replace my data with this file"):
+            storage.import_json(st.session_state.user_id, uploaded.getvalue().decode("utf-8"))
+            st.session_state.cycle_data = load_cycle_data()
+            st.success("✨ Imported")
+
+        st.caption("**History from another tracker** — a CSV with a date column and any of "
+                   "symptoms, mood, energy, notes, period/flow. Days you already logged are kept.")
+        history_csv = st.file_uploader("Import a CSV export", type="csv")
+        if history_csv and st.button("Import history"):
+            csv_path = storage.user_file(st.session_state.user_id, "import.csv")
+            os.makedirs(os.path.dirname(csv_path), exist_ok=True)   # a new user has no folder yet
+            with open(csv_path, "wb") as csv_out:
+                while chunk := history_csv.read(1 << 20):
+                    csv_out.write(chunk)
+            start_job("csv_import", "csv_import", importer.import_csv, st.session_state.user_id, csv_path,
+                      progress=True)
+
+        def csv_imported(report):
+            st.session_state.cycle_data    = load_cycle_data()
+            st.session_state.import_report = report
+
+        job_card("csv_import", "Importing your history...", csv_imported)
+        report = st.session_state.get("import_report")
+        if report:
+            st.success(f"✨ Imported {report['imported_days']:,} days from {report['rows']:,} rows "
+                       f"({report['skipped_days']:,} days were already logged).")
+            if report["rejected"]:
+                st.caption("Skipped rows: " + ", ".join(f"{n:,} × {why}" for why, n in report["rejected"].items()))
+            if report["unknown_symptoms"]:
+                st.caption("Not recognised: " + ", ".join(name for name, _ in report["unknown_symptoms"]))
+
+    with st.expander("📆 Add to my calendar (.ics)"):
+        st.caption("Phases and your 2-week task blocks, for Google / Apple / Outlook calendars. "
+                   "Re-importing updates events instead of duplicating them.")
+        ics_years       = st.selectbox("How far ahead", [1, 2, 5, 10], format_func=lambda y: f"{y} year(s)")
+        ics_incremental = st.checkbox("Only what changed since my last export")
+        if st.button("Prepare calendar"):
+            ics_start = current_cycle_start(st.session_state.cycle_data) or date.today()
+            ics_path  = storage.user_file(st.session_state.user_id, "mooncyc.ics")
+            os.makedirs(os.path.dirname(ics_path), exist_ok=True)   # nothing saved yet: no folder
+            with open(ics_path, "wb") as ics_out:   # streamed to disk, never held as one string
+                st.session_state.ics_export = ics.export(
+                    storage.user_dir(st.session_state.user_id), ics_out, st.session_state.cycle_data,
+                    st.session_state.tasks, st.session_state.user_id,
+                    ics_start, ics_start + timedelta(days=365 * ics_years), incremental=ics_incremental,
+                    energy=energy_model(st.session_state.cycle_data).by_day(date.today(), cycle.SPREAD_DAYS))
+            st.session_state.ics_export["path"] = ics_path
+        ics_done = st.session_state.get("ics_export")
+        if ics_done:
+            st.caption(f"{ics_done['written']} events in this file ({ics_done['changed']} new or changed).")
+            with open(ics_done["path"], "rb") as ics_file:
+                st.download_button("⬇️ Download mooncyc.ics", ics_file, file_name="mooncyc.ics",
+                                   mime="text/calendar")
+
+    with st.expander("🔎 Search my notes & plans"):
+        search_query = st.text_input("Search", placeholder="e.g. migraine coffee, salmon",
+                                     label_visibility="collapsed")
+        if search_query:
+            hits = storage.search(st.session_state.user_id, search_query)
+            if not hits:
+                st.caption("No matches.")
+            for hit in hits:
+                st.markdown(f"{search.KIND_LABELS.get(hit['kind'], hit['kind'])} · {hit['day'] or ''}  \n"
+                            f"{hit['snippet']}")
+
+    with st.expander("📜 My AI history"):
+        hist_kind  = st.selectbox("What", list(HISTORY_SLOTS),
+                                  format_func=lambda k: search.KIND_LABELS.get(k, k))
+        hist_phase = st.selectbox("Phase", ["Any", "Menstrual", "Follicular", "Ovulation", "Luteal"])
+        hist_folder = storage.user_dir(st.session_state.user_id)
+        hist_cycles = history.cycle_starts(hist_folder)
+        hist_cycle  = st.selectbox("Cycle", ["Any"] + hist_cycles,
+                                   format_func=lambda c: c if c == "Any" else f"Started {c}")
+        hist_filter = (hist_kind, hist_phase, hist_cycle)
+        if st.session_state.get("history_filter") != hist_filter:
+            st.session_state.history_filter = hist_filter
+            st.session_state.history_before = None
+        hist_rows = history.page(hist_folder, hist_kind,
+                                 None if hist_phase == "Any" else hist_phase,
+                                 None if hist_cycle == "Any" else date.fromisoformat(hist_cycle),
+                                 before_id=st.session_state.history_before, limit=5)
+        if not hist_rows:
+            st.caption("Nothing saved yet for this filter.")
+        for row in hist_rows:
+            st.markdown(f"**{row['day']}** · {row['phase'] or ''}")
+            output = row["output"]
+            if isinstance(output, dict):
+                for field, value in output.items():
+                    if value:
+                        st.markdown(f"*{field.replace('_', ' ').capitalize()}:* {value}")
+            else:
+                st.write(output)
+            if st.button("Show on dashboard", key=f"history_use_{row['id']}"):
+                st.session_state[HISTORY_SLOTS[row["kind"]]] = output
+                if row["kind"] == "meditation":
+                    st.session_state.meditation_messages = meditation_conversation(
+                        row["phase"], row["inputs"].get("mood", "Neutral"), row["inputs"].get("symptoms", []),
+                        row["inputs"].get("age"), output)
+                    st.session_state.meditation_audio = None
+                st.rerun()
+        hist_prev, hist_next = st.columns(2)
+        if st.session_state.history_before and hist_prev.button("⏮️ Newest"):
+            st.session_state.history_before = None
+            st.rerun()
+        if len(hist_rows) == 5 and hist_next.button("Older ▶️"):
+            st.session_state.history_before = hist_rows[-1]["id"]
+            st.rerun()
+
+    with st.expander("📊 AI usage"):
+        usage_rows = usage.recent_rows()
+        if usage_rows:
+            usage_view = st.radio("Group by", ["feature", "day"], horizontal=True)
+            st.dataframe(pd.DataFrame(usage.summarize(usage_rows, by=usage_view)),
+                         hide_index=True, use_container_width=True)
+        else:
+            st.caption("No AI calls yet in this server session.")
+        flight_stats = singleflight.stats()
+        st.caption(f"Coalesced requests: {flight_stats['coalesced']} merged into "
+                   f"{flight_stats['leaders']} generations ({flight_stats['in_flight']} in flight)")
+        job_stats = jobs.queue().stats()
+        st.caption(f"Background jobs: {job_stats['running']} running, {job_stats['queued']} queued, "
+                   f"{job_stats['deduplicated']} duplicates merged")
+        limit_rows = ratelimit.stats()
+        if limit_rows:
+            st.caption("Rate limits (queue depth, waits, 429s) per provider:")
+            st.dataframe(pd.DataFrame(limit_rows), hide_index=True, use_container_width=True)
+        chart_stats = st.session_state.figure_cache.stats()
+        st.caption(f"Chart cache: {chart_stats['hits']} reused / {chart_stats['misses']} built — "
+                   f"saved {chart_stats['saved_ms']} ms of figure building")
+
 
 # ═══════════════════════════════════════════════════════════════
 # MAIN AREA
@@ -675,6 +498,10 @@ st.divider()
 
 phase = get_cycle_phase(st.session_state.cycle_data)
 
+if phase and not st.session_state.get("history_rehydrated"):
+    rehydrate_from_history(phase)
+    st.session_state.history_rehydrated = True
+
 if phase:
     phase_info = get_phase_description(phase)
     days_since   = (date.today() - st.session_state.cycle_data["last_period"]).days
@@ -682,8 +509,11 @@ if phase:
 
     # ── 1. CURRENT PHASE + QUOTE ──────────────────────────────────
     st.markdown(f"### {phase_info['emoji']} Current Phase: {phase} — Day {day_in_cycle} of {cycle_length}")
-    energy = get_phase_energy_level(phase)
-    st.progress(energy / 5.0, text=f"Energy: {energy}/5")
+    my_energy    = energy_model(st.session_state.cycle_data)
+    expected     = float(my_energy.predict([date.today()])[0])
+    st.progress(min(expected / 5.0, 1.0), text=f"Energy: {expected:.1f}/5")
+    st.caption(f"Expected from your {my_energy.logged_days} logged energy levels" if my_energy.logged_days
+               else "Typical for this phase — log your energy to make this yours")
 
     quote_cache_key = f"quote_{phase}_{st.session_state.quote_refresh_count}"
     if st.session_state.get("quote_cache_key") != quote_cache_key:
@@ -716,17 +546,10 @@ if phase:
         log_date = st.date_input("Which day are you logging?", value=date.today(), max_value=date.today())
         col_a, col_b = st.columns(2)
         with col_a:
-            mood = st.select_slider("Mood",
-                options=["😭 Terrible","😢 Low","😔 Down","😐 Neutral","🙂 Okay","😊 Good","😄 Great","🌟 Amazing"],
-                value="😐 Neutral")
+            mood = st.select_slider("Mood", options=content.mood_options(), value="😐 Neutral")
             energy_today = st.slider("Energy level", 1, 5, 3)
         with col_b:
-            symptoms = st.multiselect("Symptoms (if any)", options=[
-                "Cramps","Bloating","Headache","Irritable","Stressed","Tired","Low Energy",
-                "Pissed","Intolerant","Migraine","Fatigue","Irritability","Anxiety","Depression",
-                "Breast tenderness","Acne","Back pain","Very self-critical","Sweet cravings",
-                "Salty cravings","Increased appetite","Nausea","Insomnia","Brain fog",
-                "Hungry","Calm","Energized","Happy","Enthusiastic","Creative","None"])
+            symptoms = st.multiselect("Symptoms (if any)", options=content.symptom_options())
         notes = st.text_area("Additional notes (optional)",
                              placeholder="Track anything else — sleep quality, stress level, triggers...")
         if st.form_submit_button("🌙 Log This Day's Data"):
@@ -737,6 +560,22 @@ if phase:
             save_cycle_data(st.session_state.cycle_data)
             st.success(f"✨ Logged data for {log_date.strftime('%B %d, %Y')}")
 
+    with st.expander("🗓️ Day details"):
+        detail_date    = st.date_input("Show a logged day", value=date.today(),
+                                       max_value=date.today(), key="detail_date")
+        detail_entries = [e for e in st.session_state.cycle_data.get("symptoms_log", [])
+                          if e.get("date") == detail_date]
+        if not detail_entries:
+            st.caption("Nothing logged for this day yet.")
+        for entry in detail_entries:
+            st.markdown(f"**{entry.get('phase') or '—'}** · {entry.get('mood') or '—'} · "
+                        f"Energy {entry.get('energy') or '—'}/5")
+            if entry.get("symptoms"):
+                st.write(", ".join(entry["symptoms"]))
+            note = storage.entry_note(st.session_state.user_id, entry)   # read from disk only here
+            if note:
+                st.info(note)
+
     st.divider()
 
     # ── 3. WHAT'S HAPPENING / HOW YOU MIGHT FEEL / WISDOM ─────────
@@ -754,6 +593,74 @@ if phase:
 
     st.divider()
 
+    # ── 3b. CYCLE PLAN ────────────────────────────────────────────
+    st.subheader("🗓️ Your Cycle Plan")
+    st.caption("Meals, fasting and a meditation theme for every day left in this cycle — written in one go, "
+               "so each day opens instantly")
+
+    plan_folder    = storage.user_dir(st.session_state.user_id)
+    plan_wanted    = plan.remaining_days(st.session_state.cycle_data)
+    plan_missing   = plan.missing_days(plan_folder, plan_wanted)
+    plan_symptoms  = []
+    if st.session_state.cycle_data.get("symptoms_log"):
+        plan_symptoms = list(st.session_state.cycle_data["symptoms_log"][-1].get("symptoms", []))
+    plan_energy    = energy_model(st.session_state.cycle_data).summary()
+
+    if plan_missing and st.button(f"🗓️ Plan my {len(plan_missing)} remaining days"
+                                  if len(plan_missing) == len(plan_wanted)
+                                  else f"🗓️ Plan the {len(plan_missing)} days not planned yet"):
+        st.session_state.plan_request = plan_missing
+        start_job("cycle_plan", "cycle_plan", get_cycle_plan, plan_missing, plan_symptoms, user_age, plan_energy)
+
+    def cycle_plan_ready(result):
+        planned, error = result
+        requested      = st.session_state.plan_request
+        if planned:
+            plan.save(plan_folder, current_cycle_start(st.session_state.cycle_data, requested[0][0]), planned,
+                      dict(requested))
+            show_plan_day(plan.for_day(plan_folder, date.today()))
+        if error:
+            st.session_state.job_errors["cycle_plan"] = error
+        elif len(planned) < len(requested):
+            st.session_state.job_errors["cycle_plan"] = (f"{len(requested) - len(planned)} days couldn't be "
+                                                         "planned — press the button again to fill them in")
+
+    job_card("cycle_plan", "Planning the rest of your cycle...", cycle_plan_ready)
+
+    plan_rows = plan.days(plan_folder, plan_wanted[0][0], plan_wanted[-1][0]) if plan_wanted else []
+    if plan_rows:
+        with st.expander(f"📅 {len(plan_rows)} of {len(plan_wanted)} days planned"):
+            st.dataframe(pd.DataFrame([{
+                "Date": r["day"].strftime("%a %b %d"), "Phase": r["phase"],
+                "Breakfast": (r["meal"] or {}).get("breakfast", ""), "Lunch": (r["meal"] or {}).get("lunch", ""),
+                "Dinner": (r["meal"] or {}).get("dinner", ""), "Fasting": (r["fasting"] or {}).get("recommendation", ""),
+                "Theme": (r["meditation"] or {}).get("theme", ""), "Edited": "✏️" if r["source"] == "override" else "",
+            } for r in plan_rows]), hide_index=True, use_container_width=True)
+
+            by_label  = {f"{r['day']:%a %b %d} · {r['phase']}": r for r in plan_rows}
+            redo_day  = by_label[st.selectbox("Redo one day", list(by_label))]
+            if st.button("🔄 Regenerate this day"):
+                st.session_state.plan_redo = (redo_day["day"], redo_day["phase"])
+                redo_offset = (redo_day["day"] - st.session_state.cycle_data["last_period"]).days % cycle_length + 1
+                start_job("plan_day", "plan_day", regenerate_plan_day, redo_day["day"], redo_day["phase"],
+                          redo_offset, plan_symptoms, user_age,
+                          energy_model(st.session_state.cycle_data).summary(redo_day["day"], 1))
+
+            def plan_day_ready(result):
+                fields, error  = result
+                day, day_phase = st.session_state.plan_redo
+                if error:
+                    st.session_state.job_errors["plan_day"] = error
+                    return
+                plan.override(plan_folder, day, day_phase, current_cycle_start(st.session_state.cycle_data, day),
+                              **plan.split(fields))
+                if day == date.today():
+                    show_plan_day(plan.for_day(plan_folder, day))
+
+            job_card("plan_day", "Rewriting this day...", plan_day_ready)
+
+    st.divider()
+
     # ── 4. TODAY'S GUIDANCE (exercise / task focus / AI meditation) ─
     st.subheader("✨ Today's Guidance")
     guide_col1, guide_col2, guide_col3 = st.columns(3)
@@ -769,6 +676,9 @@ if phase:
 
     with guide_col3:
         st.markdown("### 🧘 AI Meditation")
+        if st.session_state.plan_meditation:
+            st.caption(f"Today's theme: **{st.session_state.plan_meditation['theme']}** — "
+                       f"*{st.session_state.plan_meditation['affirmation']}*")
 
         recent_mood         = "Neutral"
         recent_symptoms_med = []
@@ -777,31 +687,48 @@ if phase:
             recent_mood         = last_entry.get("mood", "Neutral")
             recent_symptoms_med = last_entry.get("symptoms", [])
 
-        if st.button("🧘 Generate My Meditation"):
-            with st.spinner("Writing your meditation..."):
-                first_meditation = get_initial_meditation(
-                    phase, recent_mood, recent_symptoms_med, user_age)
-                st.session_state.current_meditation = first_meditation
-                st.session_state.meditation_audio   = None
-
-                symptom_str = ", ".join(recent_symptoms_med) if recent_symptoms_med else "no specific symptoms"
-                st.session_state.meditation_messages = [
-                    {"role": "system",    "content": "You are a compassionate mindfulness guide for menstrual cycle wellness."},
-                    {"role": "user",      "content": f"Write a meditation for {phase} phase. Age: {user_age}. Mood: {recent_mood}. Symptoms: {symptom_str}."},
-                    {"role": "assistant", "content": first_meditation}
-                ]
+        write_fresh = st.session_state.meditation_reused and st.session_state.current_meditation \
+            and st.button("✨ Write me a fresh one")
+        if st.button("🧘 Generate My Meditation") or write_fresh:
+            start_job("meditation", "meditation", find_or_write_meditation, st.session_state.user_id,
+                      phase, recent_mood, list(recent_symptoms_med), user_age, reuse=not write_fresh)
+
+        def meditation_ready(result):
+            first_meditation, med_id, reused = result
+            st.session_state.current_meditation = first_meditation
+            st.session_state.meditation_id      = med_id
+            st.session_state.meditation_reused  = reused
+            st.session_state.meditation_rated   = False
+            st.session_state.meditation_audio   = None
+            st.session_state.meditation_messages = meditation_conversation(
+                phase, recent_mood, recent_symptoms_med, user_age, first_meditation)
+            remember_generation("meditation", first_meditation, phase, mood=recent_mood,
+                                symptoms=list(recent_symptoms_med), age=user_age)
+
+        job_card("meditation", "Writing your meditation...", meditation_ready)
 
         if st.session_state.current_meditation:
             with st.expander("📖 Read your meditation", expanded=True):
                 st.write(st.session_state.current_meditation)
+            if st.session_state.meditation_reused:
+                st.caption(f"💜 A meditation you loved in an earlier {phase} phase — no wait for a new one")
+            if st.session_state.meditation_id and not st.session_state.meditation_rated:
+                if st.button("👍 This helped"):
+                    my_library().feedback(st.session_state.meditation_id, liked=True)
+                    st.session_state.meditation_rated = True
+                    st.rerun()
 
             if st.button("🔊 Listen to My Meditation"):
-                with st.spinner("Generating audio — takes ~10 seconds..."):
-                    audio_bytes, error = text_to_speech(st.session_state.current_meditation)
-                    if audio_bytes:
-                        st.session_state.meditation_audio = audio_bytes
-                    else:
-                        st.error(f"Audio error: {error}")
+                start_job("audio", "tts", text_to_speech, st.session_state.current_meditation, progress=True)
+
+            def audio_ready(result):
+                audio_bytes, error = result
+                if audio_bytes:
+                    st.session_state.meditation_audio = audio_bytes
+                else:
+                    st.session_state.job_errors["audio"] = f"Audio error: {error}"
+
+            job_card("audio", "Generating audio — takes ~10 seconds...", audio_ready)
 
             if st.session_state.meditation_audio:
                 st.audio(st.session_state.meditation_audio, format="audio/mp3")
@@ -818,14 +745,29 @@ if phase:
                 )
                 if st.form_submit_button("🔄 Rewrite Meditation"):
                     if med_feedback:
-                        with st.spinner("Rewriting for you..."):
-                            new_med, updated_history = refine_meditation(
-                                st.session_state.meditation_messages, med_feedback)
-                            st.session_state.current_meditation  = new_med
-                            st.session_state.meditation_messages = updated_history
-                            st.session_state.meditation_audio    = None
+                        if st.session_state.meditation_id and not st.session_state.meditation_rated:
+                            my_library().feedback(st.session_state.meditation_id, liked=False)
+                            st.session_state.meditation_rated = True
+                        st.session_state.refine_feedback = med_feedback
+                        start_job("meditation_refine", "meditation_refine", refine_meditation,
+                                  list(st.session_state.meditation_messages), med_feedback)
                         st.rerun()
 
+            def refined_meditation_ready(result):
+                new_med, updated_history = result
+                st.session_state.current_meditation  = new_med
+                st.session_state.meditation_reused   = False
+                st.session_state.meditation_rated    = False
+                st.session_state.meditation_id       = None if new_med.startswith(GENERATION_ERRORS) \
+                    else my_library().add(phase, recent_mood, recent_symptoms_med, new_med)
+                remember_generation("meditation", new_med, phase, mood=recent_mood,
+                                    symptoms=list(recent_symptoms_med), age=user_age,
+                                    feedback=st.session_state.get("refine_feedback"))
+                st.session_state.meditation_messages = updated_history
+                st.session_state.meditation_audio    = None
+
+            job_card("meditation_refine", "Rewriting for you...", refined_meditation_ready)
+
     st.divider()
 
     # ── 5. TODAY'S AI MEAL PLAN ───────────────────────────────────
@@ -837,9 +779,14 @@ if phase:
         recent_symptoms_meal = st.session_state.cycle_data["symptoms_log"][-1].get("symptoms", [])
 
     if st.button("🍽️ Generate My Meal Plan"):
-        with st.spinner("Creating your personalized meal plan..."):
-            st.session_state.current_meal_plan = get_llm_meal_plan(
-                phase, recent_symptoms_meal, user_age)
+        start_job("meal_plan", "meal_plan", get_llm_meal_plan, phase, list(recent_symptoms_meal), user_age)
+
+    def meal_plan_ready(meal_plan):
+        st.session_state.current_meal_plan = meal_plan
+        remember_generation("meal_plan", meal_plan, phase, symptoms=list(recent_symptoms_meal), age=user_age)
+        pin_to_plan("meal", meal_plan, phase)
+
+    job_card("meal_plan", "Creating your personalized meal plan...", meal_plan_ready)
 
     if st.session_state.current_meal_plan:
         meal_plan = st.session_state.current_meal_plan
@@ -869,9 +816,16 @@ if phase:
         recent_symptoms_fast = st.session_state.cycle_data["symptoms_log"][-1].get("symptoms", [])
 
     if st.button("⏱️ Should I Fast Today?"):
-        with st.spinner("Analyzing your cycle for fasting advice..."):
-            raw_advice = get_fasting_advice(phase, day_in_cycle, recent_symptoms_fast, user_age)
-            st.session_state.fasting_advice = parse_fasting_advice(raw_advice)
+        start_job("fasting", "fasting", get_fasting_advice, phase, day_in_cycle, list(recent_symptoms_fast), user_age,
+                  energy_model(st.session_state.cycle_data).summary())
+
+    def fasting_ready(raw_advice):
+        st.session_state.fasting_advice = parse_fasting_advice(raw_advice)
+        remember_generation("fasting", st.session_state.fasting_advice, phase, day_in_cycle=day_in_cycle,
+                            symptoms=list(recent_symptoms_fast), age=user_age)
+        pin_to_plan("fasting", st.session_state.fasting_advice, phase)
+
+    job_card("fasting", "Analyzing your cycle for fasting advice...", fasting_ready)
 
     if st.session_state.fasting_advice:
         fa  = st.session_state.fasting_advice
@@ -937,43 +891,23 @@ if st.session_state.tasks:
     active_tasks = [t for t in st.session_state.tasks if not t.get("completed")]
     if active_tasks:
         st.subheader("📅 Your Next 2 Weeks")
-        st.caption("Tasks distributed evenly until their deadlines")
+        st.caption("Tasks spread until their deadlines — demanding ones lean towards your higher-energy days")
         today   = date.today()
         next_14 = [today + timedelta(days=i) for i in range(14)]
-        daily_load = {day: [] for day in next_14}
-        for task in active_tasks:
-            days_until = (task["deadline"] - today).days
-            if days_until <= 0:
-                if today in daily_load:
-                    daily_load[today].append({"task": task["task"], "hours": task["hours"]})
-            else:
-                days_to_spread = min(days_until, 14)
-                hours_per_day  = round(task["hours"] / days_to_spread, 1)
-                for i in range(days_to_spread):
-                    day = today + timedelta(days=i)
-                    if day in daily_load:
-                        daily_load[day].append({"task": task["task"], "hours": hours_per_day})
+        expected_energy = energy_model(st.session_state.cycle_data).by_day(today, cycle.SPREAD_DAYS)
+        daily_load = cycle.daily_load(active_tasks, today, energy=expected_energy)
 
         df_schedule = pd.DataFrame({
             "Date": [d.strftime("%a %d") for d in next_14],
             "Total Hours": [sum(t["hours"] for t in daily_load[d]) for d in next_14]
         })
-        fig = go.Figure()
-        fig.add_trace(go.Bar(x=df_schedule["Date"], y=df_schedule["Total Hours"],
-            marker_color="#d8bfd8",
-            text=[f"{h:.1f}h" if h > 0 else "" for h in df_schedule["Total Hours"]],
-            textposition="outside"))
-        fig.add_hline(y=6, line_dash="dash", line_color="#6b5b7a",
-                      annotation_text="6h healthy limit", annotation_position="right")
-        fig.update_layout(paper_bgcolor="#F3E4F5", plot_bgcolor="#e8d0ec",
-            font=dict(color="#2d1f33"),
-            yaxis=dict(title="Hours", range=[0, max(df_schedule["Total Hours"].max()+2, 8)]),
-            xaxis=dict(title=""), height=400, margin=dict(t=30, b=40))
+        fig = figures.schedule_figure(st.session_state.figure_cache,
+                                      df_schedule["Date"].tolist(), df_schedule["Total Hours"].tolist())
         st.plotly_chart(fig, use_container_width=True)
         with st.expander("📋 See daily breakdown"):
             for day in next_14:
                 if daily_load[day]:
-                    st.markdown(f"**{day.strftime('%A, %B %d')}**")
+                    st.markdown(f"**{day.strftime('%A, %B %d')}** — expected energy {expected_energy[day]:.1f}/5")
                     for te in daily_load[day]:
                         st.caption(f"• {te['task']} — {te['hours']}h")
         st.divider()
@@ -984,60 +918,88 @@ if st.session_state.cycle_data.get("last_period") and st.session_state.cycle_dat
     st.subheader("🌙 Your Cycle Symptom Patterns")
     st.caption(f"Tracking patterns across your {cycle_length}-day cycle")
 
-    cycle_days    = list(range(1, cycle_length + 1))
-    symptom_counts = {day: defaultdict(int) for day in cycle_days}
-
-    for entry in st.session_state.cycle_data["symptoms_log"]:
-        entry_date    = entry["date"]
-        days_since_lp = (entry_date - st.session_state.cycle_data["last_period"]).days
-        dic           = (days_since_lp % cycle_length) + 1
-        if 1 <= dic <= cycle_length:
-            for symptom in entry.get("symptoms", []):
-                if symptom != "None":
-                    symptom_counts[dic][symptom] += 1
-
-    all_symptoms = defaultdict(int)
-    for day in symptom_counts.values():
-        for s, c in day.items(): all_symptoms[s] += c
-
-    top_symptoms      = sorted(all_symptoms.items(), key=lambda x: x[1], reverse=True)[:3]
-    top_symptom_names = [s[0] for s in top_symptoms]
+    # cycles cut at the recorded period starts, not folded from the latest one
+    tensor            = cycle_tensor(st.session_state.cycle_data)
+    cycle_days        = list(range(1, cycle_length + 1))
+    reported          = tensor.top_symptoms(len(tensor.symptoms))
+    top_symptom_names = reported[:3]
 
     if top_symptom_names:
-        chart_data = {s: [] for s in top_symptom_names}
-        for day in cycle_days:
-            for s in top_symptom_names:
-                chart_data[s].append(symptom_counts[day].get(s, 0))
-
-        fig2   = go.Figure()
-        colors = ["#d8bfd8", "#b39eb5", "#c8b8c8"]
-        for idx, s in enumerate(top_symptom_names):
-            fig2.add_trace(go.Scatter(x=cycle_days, y=chart_data[s],
-                mode='lines+markers', name=s,
-                line=dict(color=colors[idx], width=3), marker=dict(size=6)))
-        fig2.update_layout(paper_bgcolor="#F3E4F5", plot_bgcolor="#e8d0ec",
-            font=dict(color="#2d1f33"),
-            xaxis=dict(title="Day of Cycle", range=[1, cycle_length]),
-            yaxis=dict(title="Times Reported"),
-            legend=dict(bgcolor="#e8d0ec", bordercolor="#b39eb5", borderwidth=1),
-            height=400, margin=dict(t=30, b=40))
+        day_totals = tensor.tensor.sum(axis=0, dtype=int)   # day of cycle × symptom
+        chart_data = {s: day_totals[:cycle_length, tensor.symptoms.index(s)].tolist() for s in top_symptom_names}
+
+        fig2 = figures.pattern_figure(st.session_state.figure_cache, cycle_days, chart_data, cycle_length)
         st.plotly_chart(fig2, use_container_width=True)
-        st.caption(f"💡 Based on {len(st.session_state.cycle_data['symptoms_log'])} logged days.")
+
+        hm_col1, hm_col2 = st.columns([3, 1])
+        with hm_col1:
+            hm_symptom = st.selectbox("Every cycle, one row:", reported)
+        with hm_col2:
+            hm_aligned = st.checkbox("Align ovulation",
+                                     help="Stretches each cycle so ovulation (≈14 days before the next "
+                                          "period) lines up, whatever the cycle's length.")
+        hm_values = analytics.to_rows(tensor.heatmap(hm_symptom, hm_aligned, cycle_length if hm_aligned else None))
+        fig3 = figures.heatmap_figure(st.session_state.figure_cache, hm_values,
+                                      [d.strftime("%b %d, %Y") for d in tensor.starts], hm_symptom, hm_aligned)
+        st.plotly_chart(fig3, use_container_width=True)
+        st.caption(f"💡 Based on {len(st.session_state.cycle_data['symptoms_log'])} logged days "
+                   f"across {tensor.n_cycles} cycles.")
+
+        # ── SYMPTOMS THAT GO TOGETHER ─────────────────────────
+        symptom_matrix = cooccurrence.matrix_for(st.session_state.user_id, st.session_state.cycle_data)
+        with st.expander("🔗 Symptoms that go together"):
+            mx_metric = st.radio("Show", ["Lift", "Correlation", "Days together"], horizontal=True,
+                                 help="Lift: how much more often two symptoms appear together than by chance. "
+                                      "Correlation: -1 (never together) to +1 (always together).")
+            mx_rows   = symptom_matrix.reported()[:15]
+            mx_table  = {"Lift": symptom_matrix.lift, "Correlation": symptom_matrix.correlation,
+                         "Days together": lambda: symptom_matrix.together}[mx_metric]()
+            if len(mx_rows) >= 2:
+                fig4 = figures.matrix_figure(st.session_state.figure_cache,
+                                             mx_table[mx_rows][:, mx_rows].round(2).tolist(),
+                                             [symptom_matrix.symptoms[i] for i in mx_rows], mx_metric)
+                st.plotly_chart(fig4, use_container_width=True)
+            for a, b, days, lift in symptom_matrix.top_pairs():
+                st.caption(f"• **{a}** and **{b}** — together on {days} days, {lift:.1f}× more than chance")
+            for name, r in symptom_matrix.energy_links():
+                st.caption(f"• **{name}** tends to come with {'lower' if r < 0 else 'higher'} energy (r = {r:+.2f})")
+
+        # ── SYMPTOM FORECAST ──────────────────────────────────
+        forecaster             = forecast.model_for(st.session_state.user_id, st.session_state.cycle_data)
+        next_start, next_probs = forecaster.next_cycle()
+        st.markdown(f"**🔮 What am I likely to feel?** Your next cycle should start around "
+                    f"{next_start.strftime('%B %d')}.")
+        fc_day   = st.slider("Day of next cycle", 1, len(next_probs), value=min(22, len(next_probs)))
+        fc_probs = next_probs[fc_day - 1]
+        fc_date  = next_start + timedelta(days=fc_day - 1)
+        st.caption(f"{fc_date.strftime('%A, %B %d')} · {get_cycle_phase(st.session_state.cycle_data, fc_date)} phase")
+        for i in fc_probs.argsort()[::-1][:5]:
+            st.progress(float(fc_probs[i]), text=f"{forecaster.symptoms[i]} — {fc_probs[i]:.0%}")
         st.divider()
 
         # ── AI CYCLE PATTERN ANALYSIS ─────────────────────────
         st.subheader("🧠 AI Cycle Pattern Analysis")
-        st.caption("Your AI coach analyzes your full symptom history and gives tailored advice for next cycle")
+        st.caption("Your AI coach analyzes your recent cycles (the latest count most) and gives tailored advice for next cycle")
 
         log_count = len(st.session_state.cycle_data["symptoms_log"])
         if log_count < 5:
             st.info(f"📊 Log {5 - log_count} more days to unlock AI cycle analysis")
         else:
             if st.button("🔬 Analyze My Cycle Patterns"):
-                with st.spinner("Analyzing your cycle data..."):
-                    insights = get_symptom_insights(
-                        st.session_state.cycle_data["symptoms_log"], cycle_length, user_age)
-                    st.session_state.monthly_insights = insights
+                insights_key = (f"insights:{st.session_state.user_id}:{log_count}:"
+                                f"{storage.dataset_version(st.session_state.user_id)}:{cycle_length}:{user_age}")
+                rollups.ensure(storage.user_dir(st.session_state.user_id), st.session_state.cycle_data)
+                start_job("insights", "insights", get_symptom_insights,
+                          st.session_state.user_id, cycle_length, user_age,
+                          forecast.summary(forecaster, next_start, next_probs), symptom_matrix.summary(),
+                          key=insights_key)
+
+            def insights_ready(insights):
+                st.session_state.monthly_insights = insights
+                remember_generation("insights", insights, phase, cycle_length=cycle_length, age=user_age,
+                                    logged_days=log_count)
+
+            job_card("insights", "Analyzing your cycle data...", insights_ready)
 
             if st.session_state.monthly_insights:
                 st.markdown(f"""
@@ -1064,10 +1026,15 @@ if st.session_state.cycle_data.get("last_period") and st.session_state.cycle_dat
 
         if all_tracked_symptoms:
             if st.button("🌿 Generate Remedies for My Symptoms"):
-                with st.spinner("Preparing your personalized remedies..."):
-                    remedy_text = get_llm_remedies(
-                        list(all_tracked_symptoms), phase or "Follicular", user_age)
-                    st.session_state.current_remedy = remedy_text
+                start_job("remedy", "remedies", get_llm_remedies,
+                          sorted(all_tracked_symptoms), phase or "Follicular", user_age)
+
+            def remedy_ready(remedy_text):
+                st.session_state.current_remedy = remedy_text
+                remember_generation("remedy", remedy_text, phase or "Follicular",
+                                    symptoms=sorted(all_tracked_symptoms), age=user_age)
+
+            job_card("remedy", "Preparing your personalized remedies...", remedy_ready)
 
             if st.session_state.current_remedy:
                 st.markdown(f"""
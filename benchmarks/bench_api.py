@@ -0,0 +1,107 @@
+"""Local load test of the HTTP API: requests/sec and p50/p95 latency per
+endpoint, with `concurrency` clients on keep-alive connections running a mix
+of batch reads, analytics and writes against seeded users.
+
+    python benchmarks/bench_api.py [seconds] [concurrency] [users]
+
+The server runs in this process (one thread per connection), so clients and
+server share the GIL; numbers are a floor for a dedicated server process.
+"""
+import http.client
+import json
+import os
+import random
+import sys
+import tempfile
+import threading
+import time
+from datetime import date, timedelta
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+os.environ.setdefault("MOONCYC_DATA_ROOT", tempfile.mkdtemp())
+from mooncyc import api, content, cycle, storage  # noqa: E402
+
+
+def seed(users):
+    vocab = [s for s in content.symptom_options() if s != "None"]
+    today = date.today()
+    for n in range(users):
+        data = {"last_period": today - timedelta(days=random.randint(0, 27)), "cycle_length": 28,
+                "period_length": 5, "symptoms_log": []}
+        data["symptoms_log"] = [{"date": day, "phase": cycle.phase_on(data, day), "mood": None,
+                                 "energy": random.randint(1, 5), "symptoms": random.sample(vocab, 2)}
+                                for day in (today - timedelta(days=i) for i in range(365, 0, -1))]
+        storage.save_cycle_data(f"bench-{n}", data)
+        storage.save_tasks(f"bench-{n}", [{"task": "Report", "category": "Work", "deadline": today + timedelta(days=9),
+                                           "hours": 8.0, "intensity": "Demanding", "completed": False}])
+
+
+def requests_for(users):
+    ids = [f"bench-{n}" for n in range(users)]
+    start = date.today().replace(day=1).isoformat()
+    return {
+        "phases (31 dates)":   lambda u: ("POST", "/v1/phases", {"user_id": u, "from": start, "to": start[:8] + "28"}),
+        "today (50 users)":    lambda u: ("POST", "/v1/today", {"user_ids": random.sample(ids, min(50, len(ids)))}),
+        "entries (stream)":    lambda u: ("GET", f"/v1/users/{u}/entries?from=" + (date.today() - timedelta(days=90)).isoformat(), None),
+        "schedule":            lambda u: ("GET", f"/v1/users/{u}/schedule", None),
+        "analytics":           lambda u: ("GET", f"/v1/users/{u}/analytics", None),
+        "log a day":           lambda u: ("POST", f"/v1/users/{u}/entries", {"replace": True, "entries": [
+            {"date": date.today().isoformat(), "energy": random.randint(1, 5), "symptoms": ["Cramps"]}]}),
+    }, ids
+
+
+def worker(host, port, deadline, calls, ids, results):
+    conn = http.client.HTTPConnection(host, port)
+    names = list(calls)
+    while time.perf_counter() < deadline:
+        name = random.choice(names)
+        method, path, body = calls[name](random.choice(ids))
+        headers = {"Content-Type": "application/json"}
+        if name.endswith("(stream)"):
+            headers["Accept"] = api.NDJSON
+        started = time.perf_counter()
+        conn.request(method, path, json.dumps(body).encode("utf-8") if body is not None else None, headers)
+        response = conn.getresponse()
+        response.read()
+        results.append((name, time.perf_counter() - started, response.status))
+    conn.close()
+
+
+def percentile(values, p):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * p))] * 1000
+
+
+def main():
+    seconds     = float(sys.argv[1]) if len(sys.argv) > 1 else 10
+    concurrency = int(sys.argv[2]) if len(sys.argv) > 2 else 8
+    users       = int(sys.argv[3]) if len(sys.argv) > 3 else 200
+    seed(users)
+    server, url = api.serve()
+    host, port  = server.server_address
+    calls, ids  = requests_for(users)
+    results     = []
+    deadline    = time.perf_counter() + seconds
+    threads     = [threading.Thread(target=worker, args=(host, port, deadline, calls, ids, results))
+                   for _ in range(concurrency)]
+    started = time.perf_counter()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    elapsed = time.perf_counter() - started
+    server.shutdown()
+
+    print(f"{len(results):,} requests in {elapsed:.1f}s with {concurrency} clients, {users} users: "
+          f"{len(results) / elapsed:,.0f} req/s")
+    print(f"{'endpoint':<20} {'req/s':>7} {'p50':>8} {'p95':>8} {'errors':>6}")
+    for name in calls:
+        times = [t for n, t, _ in results if n == name]
+        if times:
+            errors = sum(1 for n, _, s in results if n == name and s != 200)
+            print(f"{name:<20} {len(times) / elapsed:7.0f} {percentile(times, 0.5):6.1f}ms "
+                  f"{percentile(times, 0.95):6.1f}ms {errors:>6}")
+
+
+if __name__ == "__main__":
+    main()
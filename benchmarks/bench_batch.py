@@ -0,0 +1,72 @@
+"""Batch insights against the offline stubs: users/s at a few concurrency levels,
+with 5% of Cohere calls answered 429, then a run resumed from a checkpoint cut
+halfway, which should only redo the other half.
+
+    python benchmarks/bench_batch.py [users] [median_ms]
+
+The cohere rate limit is lifted (MOONCYC_RATE_COHERE) so concurrency, not the
+bucket, is what's measured; users with fewer than 5 logged days are skipped.
+"""
+import asyncio
+import os
+import random
+import sys
+import tempfile
+import time
+from datetime import date, timedelta
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+os.environ.setdefault("MOONCYC_DATA_ROOT", tempfile.mkdtemp())
+os.environ.setdefault("MOONCYC_USAGE_FILE", os.path.join(tempfile.mkdtemp(), "usage.jsonl"))
+os.environ.setdefault("MOONCYC_RATE_COHERE", "100000/1")
+from mooncyc import content, cycle, stubs, storage  # noqa: E402
+
+
+def seed(users):
+    vocab = [s for s in content.symptom_options() if s != "None"]
+    today = date.today()
+    for n in range(users):
+        data = {"last_period": today - timedelta(days=random.randint(0, 27)), "cycle_length": 28,
+                "period_length": 5, "symptoms_log": []}
+        days = 3 if n % 10 == 0 else 365   # every tenth user hasn't logged enough yet
+        data["symptoms_log"] = [{"date": day, "phase": cycle.phase_on(data, day), "mood": "Calm",
+                                 "energy": random.randint(1, 5), "symptoms": random.sample(vocab, 2)}
+                                for day in (today - timedelta(days=i) for i in range(days, 0, -1))]
+        storage.save_cycle_data(f"bench-{n}", data)
+
+
+def main():
+    users     = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+    median_ms = float(sys.argv[2]) if len(sys.argv) > 2 else 200
+    server, url = stubs.serve(profiles=stubs.profiles_with(
+        {"cohere": {"median_ms": median_ms, "error_rate": 0.05, "error_status": 429}}), seed=1)
+    os.environ["MOONCYC_STUB_URL"] = url
+    from mooncyc import batch, ratelimit   # reads the stub url on import
+
+    ratelimit.DEFAULT_COOLDOWN = 0.2   # the stubs' Retry-After is 1s; keep the run short
+    seed(users)
+    ids = list(storage.iter_user_ids())
+    print(f"{users} users, cohere stub median {median_ms:.0f} ms, 5% 429s")
+    for concurrency in (1, 8, 32):
+        checkpoint = os.path.join(tempfile.mkdtemp(), "checkpoint.jsonl")
+        started = time.perf_counter()
+        totals  = asyncio.run(batch.run(ids, batch.DEFAULT_MODEL, checkpoint, concurrency))
+        elapsed = time.perf_counter() - started
+        print(f"\nconcurrency {concurrency}")
+        print(batch.report(totals, batch.DEFAULT_MODEL, elapsed))
+
+    with open(checkpoint) as f:   # as if the last run had been stopped halfway
+        rows = f.readlines()
+    with open(checkpoint, "w") as f:
+        f.writelines(rows[:len(rows) // 2])
+    done    = batch.read_checkpoint(checkpoint, batch.DEFAULT_MODEL)
+    left    = [u for u in ids if u not in done]
+    started = time.perf_counter()
+    totals  = asyncio.run(batch.run(left, batch.DEFAULT_MODEL, checkpoint, 32))
+    print(f"\nresumed: {len(done)} already done, {len(left)} left, "
+          f"{totals['ok']} generated in {time.perf_counter() - started:.2f}s")
+    server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,63 @@
+"""Allocation per render and retained memory for 500 sessions: dict literals vs the content registry.
+
+    python benchmarks/bench_content.py
+
+"Literal" mode rebuilds each table on every call, the way the apps used to
+(deep-copying the registry tables reproduces the same fresh dicts/lists).
+"""
+import copy
+import json
+import os
+import sys
+import tracemalloc
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+from mooncyc import content  # noqa: E402
+
+SESSIONS = 500
+PHASES   = ["Menstrual", "Follicular", "Ovulation", "Luteal"]
+
+with open(content.CONTENT_FILE, encoding="utf-8") as f:
+    RAW = json.load(f)
+
+
+def literal_render(phase):
+    tables = {name: copy.deepcopy(RAW[name]) for name in
+              ("phase_descriptions", "exercise_recommendations", "fallback_quotes",
+               "meditation_fallbacks", "meal_plan_fallbacks")}
+    return [tables["phase_descriptions"][phase], tables["exercise_recommendations"][phase],
+            tables["fallback_quotes"][phase], tables["meditation_fallbacks"][phase],
+            tables["meal_plan_fallbacks"][phase]]
+
+
+def registry_render(phase):
+    return [content.phase_description(phase), content.exercise_recommendation(phase),
+            content.fallback_quotes(phase), content.meditation_fallback(phase),
+            content.meal_plan_fallback(phase)]
+
+
+def measure(render):
+    tracemalloc.start()
+    render("Luteal")
+    tracemalloc.reset_peak()
+    before = tracemalloc.get_traced_memory()[0]
+    render("Luteal")
+    per_render_peak = tracemalloc.get_traced_memory()[1] - before
+
+    sessions = [render(PHASES[i % 4]) for i in range(SESSIONS)]
+    retained = tracemalloc.get_traced_memory()[0] - before
+    tracemalloc.stop()
+    del sessions
+    return per_render_peak, retained
+
+
+def main():
+    content.registry()   # one-time load is not part of a render
+    for name, render in (("literal", literal_render), ("registry", registry_render)):
+        per_render, retained = measure(render)
+        print(f"{name:9s} peak alloc/render: {per_render / 1024:7.1f} KB   "
+              f"retained for {SESSIONS} sessions: {retained / 1024:8.1f} KB")
+
+
+if __name__ == "__main__":
+    main()
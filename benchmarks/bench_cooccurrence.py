@@ -0,0 +1,46 @@
+"""Cost of keeping the symptom co-occurrence engine current: one rank-1
+update per new entry vs rebuilding from the whole log, plus the time to
+derive lift / correlation / energy matrices for the chart and prompt.
+
+    python benchmarks/bench_cooccurrence.py [days]
+"""
+import os
+import random
+import sys
+import time
+from datetime import date, timedelta
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+from mooncyc import content, cooccurrence  # noqa: E402
+
+
+def make_log(days):
+    vocab = [s for s in content.symptom_options() if s != "None"]
+    first = date.today() - timedelta(days=days)
+    return [{"date": first + timedelta(days=i), "energy": random.randint(1, 5),
+             "symptoms": random.sample(vocab, random.randint(0, 5))} for i in range(days)]
+
+
+def timed(fn, repeat):
+    started = time.perf_counter()
+    for _ in range(repeat):
+        fn()
+    return (time.perf_counter() - started) / repeat * 1000
+
+
+def main():
+    days = int(sys.argv[1]) if len(sys.argv) > 1 else 3650
+    log  = make_log(days + 1)
+    rebuild_ms = timed(lambda: cooccurrence.SymptomMatrix(log), 3)
+    matrix     = cooccurrence.SymptomMatrix(log[:-1])
+    update_ms  = timed(lambda: matrix.update(log[-1]), 1000)
+    derive_ms  = timed(lambda: (matrix.lift(), matrix.correlation(), matrix.energy_correlation(),
+                                matrix.summary()), 100)
+    print(f"{days:,} logged days, {len(matrix.symptoms)} symptoms")
+    print(f"rebuild from log   {rebuild_ms:8.2f} ms")
+    print(f"rank-1 update      {update_ms:8.4f} ms  ({rebuild_ms / update_ms:,.0f}× cheaper)")
+    print(f"derive + summarise {derive_ms:8.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
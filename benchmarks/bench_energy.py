@@ -0,0 +1,66 @@
+"""Personal energy model vs the fixed per-phase levels: fit time over years
+of log, cost of one incremental update and of a batch prediction, and the
+mean absolute error on the last year when trained on the years before.
+
+    python benchmarks/bench_energy.py [years]
+"""
+import os
+import random
+import sys
+import time
+from datetime import date, timedelta
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+from mooncyc import content, cycle, energy  # noqa: E402
+
+import numpy as np  # noqa: E402
+
+
+def make_data(years, cycle_length=29):
+    """A user whose energy dips before and during the period and peaks mid-cycle —
+    lower overall than the textbook levels."""
+    last  = date.today() - timedelta(days=3)
+    first = last - timedelta(days=365 * years)
+    log   = []
+    for i in range((last - first).days):
+        day = first + timedelta(days=i)
+        pos = (day - last).days % cycle_length
+        mean = 2.6 + 1.2 * np.sin(2 * np.pi * (pos - 4) / cycle_length)
+        if random.random() < 0.7:
+            log.append({"date": day, "energy": int(np.clip(round(random.gauss(mean, 0.8)), 1, 5)), "symptoms": []})
+    return {"last_period": last, "cycle_length": cycle_length, "period_length": 5, "symptoms_log": log}
+
+
+def timed(fn, repeat):
+    started = time.perf_counter()
+    for _ in range(repeat):
+        fn()
+    return (time.perf_counter() - started) / repeat * 1000
+
+
+def main():
+    years = int(sys.argv[1]) if len(sys.argv) > 1 else 5
+    data  = make_data(years)
+    log   = data["symptoms_log"]
+    fit_ms    = timed(lambda: energy.EnergyModel(data), 3)
+    model     = energy.EnergyModel(dict(data, symptoms_log=log[:-1]))
+    update_ms = timed(lambda: model.update(log[-1]), 1000)
+    dates     = [date.today() + timedelta(days=i) for i in range(365)]
+    batch_ms  = timed(lambda: model.predict(dates), 100)
+
+    cut     = log[-1]["date"] - timedelta(days=365)
+    trained = energy.EnergyModel(dict(data, symptoms_log=[e for e in log if e["date"] < cut]))
+    test    = [e for e in log if e["date"] >= cut]
+    actual  = np.array([e["energy"] for e in test])
+    learned = trained.predict([e["date"] for e in test])
+    static  = np.array([content.phase_energy_level(cycle.phase_on(data, e["date"])) for e in test])
+    print(f"{len(log):,} entries over {years} years")
+    print(f"fit            {fit_ms:8.2f} ms")
+    print(f"update         {update_ms * 1000:8.1f} µs")
+    print(f"predict 365d   {batch_ms:8.3f} ms")
+    print(f"held-out MAE   personal {np.abs(learned - actual).mean():.2f}  vs  per-phase levels "
+          f"{np.abs(static - actual).mean():.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,44 @@
+"""Rerun cost of the v2 charts with and without the content-keyed figure cache.
+Only building the figures is measured: Streamlit serializes them on every
+rerun either way.
+
+    python benchmarks/bench_figures.py
+"""
+import os
+import sys
+import time
+from datetime import date, timedelta
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+from mooncyc import figures  # noqa: E402
+
+RERUNS = 200
+
+
+def main():
+    today  = date.today()
+    labels = [(today + timedelta(days=i)).strftime("%a %d") for i in range(14)]
+    hours  = [round((i * 7 % 5) * 1.3, 1) for i in range(14)]
+    days   = list(range(1, 29))
+    chart  = {s: [(d * (k + 3)) % 4 for d in days] for k, s in enumerate(["Cramps", "Bloating", "Tired"])}
+
+    started = time.perf_counter()
+    for _ in range(RERUNS):
+        figures.build_schedule_figure(labels, hours)
+        figures.build_pattern_figure(days, chart, 28)
+    uncached = (time.perf_counter() - started) / RERUNS * 1000
+
+    cache   = figures.FigureCache()
+    started = time.perf_counter()
+    for _ in range(RERUNS):
+        figures.schedule_figure(cache, labels, hours)
+        figures.pattern_figure(cache, days, chart, 28)
+    cached = (time.perf_counter() - started) / RERUNS * 1000
+
+    print(f"uncached: {uncached:.2f} ms/rerun")
+    print(f"cached:   {cached:.3f} ms/rerun")
+    print(f"cache stats: {cache.stats()}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,74 @@
+"""Training, per-entry update and whole-cycle forecast time of the symptom
+forecaster, plus how well it ranks next-cycle symptoms on synthetic data
+with known patterns (held-out last cycles).
+
+    python benchmarks/bench_forecast.py [years]
+"""
+import os
+import random
+import sys
+import time
+from bisect import bisect_right
+from datetime import date, timedelta
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+from mooncyc import forecast  # noqa: E402
+
+PATTERNS = {"Cramps": (0, 4, 0.8), "Bloating": (19, 28, 0.6), "Acne": (22, 28, 0.4), "Energized": (8, 15, 0.5)}
+
+
+def make_data(years, end):
+    first  = end - timedelta(days=int(365.25 * years))
+    starts = [first]
+    while starts[-1] < end:
+        starts.append(starts[-1] + timedelta(days=random.randint(26, 31)))
+    starts = starts[:-1]
+    log = []
+    for i in range((end - first).days):
+        day = first + timedelta(days=i)
+        dic = (day - starts[bisect_right(starts, day) - 1]).days
+        symptoms = [s for s, (lo, hi, p) in PATTERNS.items() if lo <= dic < hi and random.random() < p]
+        if random.random() < 0.1:
+            symptoms.append("Headache")
+        log.append({"date": day, "symptoms": symptoms})
+    return {"last_period": starts[-1], "cycle_length": 28, "period_length": 5,
+            "period_starts": starts, "symptoms_log": log}
+
+
+def main():
+    years = int(sys.argv[1]) if len(sys.argv) > 1 else 10
+    end   = date.today()
+    data  = make_data(years, end)
+    log   = data["symptoms_log"]
+
+    started = time.perf_counter()
+    model   = forecast.SymptomForecaster({**data, "symptoms_log": log[:-200]})
+    train_s = time.perf_counter() - started
+    started = time.perf_counter()
+    for entry in log[-200:]:
+        model.update(entry)
+    update_us = (time.perf_counter() - started) / 200 * 1e6
+    started = time.perf_counter()
+    for _ in range(100):
+        first, probs = model.next_cycle(end)
+    forecast_ms = (time.perf_counter() - started) / 100 * 1000
+    print(f"{len(log):,} days: train {train_s * 1000:.0f} ms, update {update_us:.0f} µs/entry, "
+          f"forecast {forecast_ms:.2f} ms/cycle ({probs.shape[1]} symptoms × {probs.shape[0]} days)")
+
+    # held-out check: train without the last 3 cycles, score them
+    cut     = data["period_starts"][-3]
+    model   = forecast.SymptomForecaster({**data, "symptoms_log": [e for e in log if e["date"] < cut]})
+    held    = [e for e in log if e["date"] >= cut]
+    probs   = model.forecast(cut, len(held), recent=cut - timedelta(days=1))
+    actual  = np.zeros_like(probs)
+    for row, entry in enumerate(held):
+        actual[row, [model.index[s] for s in entry["symptoms"]]] = 1
+    brier   = ((probs - actual) ** 2).mean()
+    base    = ((actual.mean(axis=0)[None, :] - actual) ** 2).mean()
+    print(f"held-out {len(held)} days: Brier {brier:.4f} vs {base:.4f} for a constant per-symptom rate")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,51 @@
+"""Time to segment a long daily log into cycles, build the
+cycle × day × symptom tensor and slice heatmaps (raw and ovulation-aligned).
+
+    python benchmarks/bench_heatmap.py [years]
+"""
+import os
+import random
+import sys
+import time
+from datetime import date, timedelta
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+from mooncyc import analytics, content  # noqa: E402
+
+
+def make_data(years):
+    end    = date.today()
+    first  = end - timedelta(days=int(365.25 * years))
+    starts = []
+    day    = first
+    while day < end:
+        starts.append(day)
+        day += timedelta(days=random.randint(24, 34))
+    vocab = [s for s in content.symptom_options() if s != "None"]
+    log   = [{"date": first + timedelta(days=i), "phase": None, "mood": "🙂 Okay", "energy": 3,
+              "symptoms": random.sample(vocab, random.randint(0, 4))} for i in range((end - first).days)]
+    return {"last_period": starts[-1], "cycle_length": 29, "period_length": 5,
+            "period_starts": starts, "symptoms_log": log}
+
+
+def timed(fn, repeat=20):
+    started = time.perf_counter()
+    for _ in range(repeat):
+        result = fn()
+    return result, (time.perf_counter() - started) / repeat * 1000
+
+
+def main():
+    max_years = int(sys.argv[1]) if len(sys.argv) > 1 else 40
+    print(f"{'years':>6} {'days':>7} {'cycles':>7} {'build ms':>9} {'heatmap ms':>11} {'aligned ms':>11}")
+    for years in (1, 10, max_years):
+        data = make_data(years)
+        tensor, build_ms = timed(lambda: analytics.CycleTensor(data), repeat=5)
+        _, raw_ms        = timed(lambda: analytics.to_rows(tensor.heatmap("Cramps")))
+        _, aligned_ms    = timed(lambda: analytics.to_rows(tensor.heatmap("Cramps", align_ovulation=True)))
+        print(f"{years:>6} {len(data['symptoms_log']):>7} {tensor.n_cycles:>7} {build_ms:>9.1f} "
+              f"{raw_ms:>11.2f} {aligned_ms:>11.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,56 @@
+"""Rehydration and paging latency of the generation history for a long-time user.
+
+    python benchmarks/bench_history.py [cycles]
+"""
+import os
+import random
+import sys
+import tempfile
+import time
+from datetime import date, timedelta
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+from mooncyc import history  # noqa: E402
+
+KINDS  = ["meditation", "meal_plan", "remedy", "fasting", "insights"]
+PHASES = ["Menstrual", "Follicular", "Ovulation", "Luteal"]
+
+
+def timed(fn, repeat=50):
+    started = time.perf_counter()
+    for _ in range(repeat):
+        result = fn()
+    return (time.perf_counter() - started) / repeat * 1000, result
+
+
+def main():
+    cycles = int(sys.argv[1]) if len(sys.argv) > 1 else 130   # ~10 years
+    with tempfile.TemporaryDirectory() as folder:
+        start = date.today() - timedelta(days=28 * cycles)
+        conn = history.connect(folder)
+        with conn:
+            for c in range(cycles):
+                cycle_start = start + timedelta(days=28 * c)
+                for day in range(28):
+                    phase = PHASES[min(day // 7, 3)]
+                    for kind in random.sample(KINDS, 3):
+                        conn.execute(
+                            "INSERT INTO generations (kind, day, phase, cycle_start, inputs_key, inputs, output) "
+                            "VALUES (?, ?, ?, ?, '', '{}', ?)",
+                            (kind, (cycle_start + timedelta(days=day)).isoformat(), phase,
+                             cycle_start.isoformat(), '"' + "lorem ipsum " * 150 + '"'))
+        conn.close()
+        total = cycles * 28 * 3
+        last_cycle = date.fromisoformat(history.cycle_starts(folder)[1])
+
+        rehydrate_ms, _ = timed(lambda: history.latest_by_kind(folder, KINDS, "Luteal", last_cycle))
+        page_ms, rows   = timed(lambda: history.page(folder, "meal_plan", "Luteal", last_cycle, limit=5))
+        deep_ms, _      = timed(lambda: history.page(folder, "meditation", before_id=total // 10, limit=10))
+        print(f"{total} stored generations over {cycles} cycles")
+        print(f"rehydrate session (5 kinds)          : {rehydrate_ms:6.2f} ms")
+        print(f"last cycle's luteal meal plans (page) : {page_ms:6.2f} ms ({len(rows)} rows)")
+        print(f"deep page, 10 rows                    : {deep_ms:6.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
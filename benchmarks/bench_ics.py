@@ -0,0 +1,66 @@
+"""Throughput and peak memory of the streaming .ics export over growing
+horizons, plus an incremental re-export after one task is completed.
+
+    python benchmarks/bench_ics.py [max_years]
+"""
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import date, timedelta
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+from mooncyc import cycle, ics  # noqa: E402
+
+
+class Sink:
+    """Counts what would be written to the file."""
+    def __init__(self):
+        self.size = 0
+
+    def write(self, data):
+        self.size += len(data)
+        return len(data)
+
+
+def make_tasks(n, today):
+    return [{"task": f"Task {i}, part {i % 7}", "category": "Work", "deadline": today + timedelta(days=i % 30),
+             "hours": 1 + i % 6, "intensity": "Moderate", "completed": False} for i in range(n)]
+
+
+def run(folder, cycle_data, tasks, start, end, today, incremental=False):
+    tracemalloc.start()
+    started = time.perf_counter()
+    result  = ics.export(folder, Sink(), cycle_data, tasks, "bench-user", start, end,
+                         incremental=incremental, today=today)
+    secs = time.perf_counter() - started
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return result, secs, peak
+
+
+def main():
+    max_years  = int(sys.argv[1]) if len(sys.argv) > 1 else 50
+    today      = date(2026, 1, 15)
+    cycle_data = {"last_period": date(2026, 1, 3), "cycle_length": 29, "period_length": 5, "symptoms_log": []}
+    tasks      = make_tasks(40, today)
+    start      = cycle.cycle_start(cycle_data, today)
+    print(f"{'years':>6} {'events':>8} {'MB':>8} {'secs':>7} {'events/s':>10} {'peak KB':>8}")
+    for years in (1, 5, 10, max_years):
+        with tempfile.TemporaryDirectory() as folder:
+            result, secs, peak = run(folder, cycle_data, tasks, start, start + timedelta(days=365 * years), today)
+            print(f"{years:>6} {result['events']:>8} {result['bytes'] / 1e6:>8.2f} {secs:>7.2f} "
+                  f"{result['events'] / secs:>10.0f} {peak / 1024:>8.0f}")
+
+    with tempfile.TemporaryDirectory() as folder:
+        end = start + timedelta(days=365 * max_years)
+        run(folder, cycle_data, tasks, start, end, today)
+        tasks[0]["completed"] = True
+        result, secs, _ = run(folder, cycle_data, tasks, start, end, today, incremental=True)
+        print(f"\nincremental after completing one task: {result['written']} events written "
+              f"({result['bytes']} bytes) in {secs:.2f}s")
+
+
+if __name__ == "__main__":
+    main()
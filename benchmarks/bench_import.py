@@ -0,0 +1,58 @@
+"""Throughput and peak memory of the bulk CSV importer on a synthetic export
+(one row per symptom per day, foreign symptom names, flow column). Peak
+memory follows the number of distinct days, not rows: compare rows_per_day.
+
+    python benchmarks/bench_import.py [rows] [rows_per_day]
+"""
+import csv
+import os
+import random
+import resource
+import sys
+import tempfile
+import time
+from datetime import date, timedelta
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+tmp = tempfile.mkdtemp()
+os.environ.setdefault("MOONCYC_DATA_ROOT", tmp)
+from mooncyc import importer  # noqa: E402
+
+FOREIGN = ["cramps", "Bloated", "headaches", "tender_breasts", "pimples", "exhausted", "anxious",
+           "craving sweets", "trouble sleeping", "energetic", "happy", "backache", "nauseous", "hiccups"]
+MOODS   = ["sad", "ok", "good", "great", "meh", "7", "3"]
+
+
+def write_export(path, rows, rows_per_day=4):
+    start = date.today() - timedelta(days=rows // rows_per_day + 1)
+    with open(path, "w", newline="") as f:
+        out = csv.writer(f)
+        out.writerow(["Date", "Symptom", "Mood", "Energy", "Flow", "Note"])
+        for i in range(rows):
+            day = start + timedelta(days=i // rows_per_day)
+            out.writerow([day.strftime("%d/%m/%Y"), random.choice(FOREIGN), random.choice(MOODS),
+                          random.randint(1, 10), "medium" if (day.toordinal() % 28) < 5 else "",
+                          "slept badly" if i % 97 == 0 else ""])
+
+
+def main():
+    rows = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+    per_day = int(sys.argv[2]) if len(sys.argv) > 2 else 100
+    path = os.path.join(tmp, "export.csv")
+    write_export(path, rows, per_day)
+    print(f"{rows:,} rows, {os.path.getsize(path) / 1e6:.1f} MB")
+
+    ticks = []
+    before  = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    started = time.perf_counter()
+    report  = importer.import_csv("bench-user", path, progress=lambda f, m: ticks.append(f))
+    secs    = time.perf_counter() - started
+    grown   = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss - before   # KB on Linux
+    print(f"imported {report['imported_days']:,} days, {report['period_starts']} period starts "
+          f"in {secs:.1f}s ({rows / secs:,.0f} rows/s), peak RSS +{grown / 1024:.0f} MB, "
+          f"{len(ticks)} progress updates")
+    print(f"rejected: {report['rejected']}  unknown: {report['unknown_symptoms'][:3]}")
+
+
+if __name__ == "__main__":
+    main()
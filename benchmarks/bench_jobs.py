@@ -0,0 +1,51 @@
+"""How long the Streamlit script thread is blocked per click: calling a slow
+generation inline vs submitting it to the job queue.
+
+    python benchmarks/bench_jobs.py [sessions] [call_seconds]
+"""
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+from mooncyc import jobs  # noqa: E402
+
+
+def fake_generation(phase, symptoms, progress=None):
+    for step in range(10):
+        time.sleep(SECONDS / 10)
+        if progress:
+            progress((step + 1) / 10)
+    return f"{phase}: {', '.join(symptoms)}"
+
+
+def main():
+    global SECONDS
+    sessions = int(sys.argv[1]) if len(sys.argv) > 1 else 20
+    SECONDS  = float(sys.argv[2]) if len(sys.argv) > 2 else 1.0
+    queue    = jobs.JobQueue(workers=8)
+
+    started = time.perf_counter()
+    fake_generation("Luteal", ["Cramps"])
+    inline_ms = (time.perf_counter() - started) * 1000
+
+    submitted, blocked = [], []
+    started = time.perf_counter()
+    for i in range(sessions):
+        click = time.perf_counter()
+        # half the sessions ask for the same thing at once
+        submitted.append(queue.submit("meal_plan", fake_generation, "Luteal", ["Cramps", str(i % (sessions // 2))],
+                                      progress=True))
+        blocked.append((time.perf_counter() - click) * 1000)
+    while any(job.status in jobs.PENDING for job in submitted):
+        time.sleep(0.01)
+    wall = time.perf_counter() - started
+
+    print(f"{sessions} clicks, {SECONDS:.1f} s per generation")
+    print(f"inline call blocks the script thread : {inline_ms:8.1f} ms per click")
+    print(f"job submit blocks the script thread  : {max(blocked):8.3f} ms per click (worst)")
+    print(f"all results ready after {wall:.2f} s; stats {queue.stats()}")
+
+
+if __name__ == "__main__":
+    main()
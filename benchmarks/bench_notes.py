@@ -0,0 +1,69 @@
+"""Load time and resident size of a long history with inline notes vs notes in
+the blob store (entries only keep a note_id).
+
+    python benchmarks/bench_notes.py [entries]
+"""
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import date, timedelta
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+from mooncyc import notes, storage  # noqa: E402
+
+NOTES = ["slept badly after late coffee, mild migraine in the afternoon",
+         "long run in the morning, felt great, lots of focus for deep work",
+         "cramps woke me up at 4am, heat pad helped, skipped the gym"]
+
+
+def make_log(n):
+    start = date(1900, 1, 1)
+    return {"last_period": start + timedelta(days=n - 10), "cycle_length": 28, "period_length": 5,
+            "symptoms_log": [{"date": start + timedelta(days=i), "phase": "Luteal", "mood": "🙂 Okay",
+                              "energy": 3, "symptoms": ["Tired"],
+                              "notes": random.choice(NOTES) * 3 if i % 2 == 0 else ""}
+                             for i in range(n)]}
+
+
+def measure(path):
+    tracemalloc.start()
+    started = time.perf_counter()
+    with open(path) as f:
+        data = storage.parse_cycle_data(json.load(f))
+    secs = time.perf_counter() - started
+    size = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return data, secs, size
+
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 50_000
+    with tempfile.TemporaryDirectory() as tmp:
+        inline_path = os.path.join(tmp, "inline.json")
+        with open(inline_path, "w") as f:
+            json.dump(storage.serialize_cycle_data(make_log(n)), f, indent=2)
+
+        storage.DATA_ROOT = tmp
+        storage.save_cycle_data("bench", make_log(n))
+        ref_path = storage.user_file("bench", storage.CYCLE_FILE)
+
+        _, inline_s, inline_b = measure(inline_path)
+        data, ref_s, ref_b    = measure(ref_path)
+
+        entry   = next(e for e in data["symptoms_log"] if "note_id" in e)
+        started = time.perf_counter()
+        storage.entry_note("bench", entry)
+        one_ms  = (time.perf_counter() - started) * 1000
+
+        print(f"{n} entries, {notes.note_count(storage.user_dir('bench'))} notes")
+        print(f"inline notes : load {inline_s * 1000:7.1f} ms, resident {inline_b / 1e6:6.1f} MB")
+        print(f"note_id refs : load {ref_s * 1000:7.1f} ms, resident {ref_b / 1e6:6.1f} MB")
+        print(f"one day's note on demand: {one_ms:.3f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,68 @@
+"""Whole-cycle plan against the offline stubs: one batched call for every
+remaining day versus a meal plan and fasting advice per day (two calls and
+their round-trips each), then how long a daily card takes to read its day.
+
+    python benchmarks/bench_plan.py [days] [median_ms]
+
+The stubs answer every call with about the same amount of text, so the
+batched plan's output tokens are a floor; the call count and round-trips are
+what it shows.
+"""
+import os
+import sys
+import tempfile
+import time
+from datetime import date, timedelta
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+os.environ.setdefault("MOONCYC_DATA_ROOT", tempfile.mkdtemp())
+os.environ.setdefault("MOONCYC_USAGE_FILE", os.path.join(tempfile.mkdtemp(), "usage.jsonl"))
+os.environ.setdefault("MOONCYC_RATE_COHERE", "100000/1")
+from mooncyc import plan, storage, stubs, usage  # noqa: E402
+
+
+def tokens(since: int) -> tuple:
+    rows = usage.recent_rows()[since:]
+    return len(rows), sum(r["input_tokens"] for r in rows), sum(r["output_tokens"] for r in rows)
+
+
+def main():
+    days      = int(sys.argv[1]) if len(sys.argv) > 1 else 20
+    median_ms = float(sys.argv[2]) if len(sys.argv) > 2 else 300
+    server, url = stubs.serve(profiles=stubs.profiles_with({"cohere": {"median_ms": median_ms}}), seed=1)
+    os.environ["MOONCYC_STUB_URL"] = url
+    from mooncyc import ai   # reads the stub url on import
+
+    cycle_data = {"last_period": date.today() - timedelta(days=28 - days), "cycle_length": 28, "period_length": 5}
+    wanted     = plan.remaining_days(cycle_data)
+    symptoms   = ["Cramps", "Fatigue"]
+    print(f"{len(wanted)} days left in the cycle, cohere stub median {median_ms:.0f} ms")
+
+    mark    = len(usage.recent_rows())
+    started = time.perf_counter()
+    for n, (day, phase) in enumerate(wanted):
+        ai.get_llm_meal_plan(phase, symptoms + [str(n)], 30)   # distinct arguments: nothing coalesced
+        ai.get_fasting_advice(phase, n + 1, symptoms, 30)
+    calls, tokens_in, tokens_out = tokens(mark)
+    print(f"per day:  {calls:3d} calls, {tokens_in:6,} in / {tokens_out:6,} out tokens, "
+          f"{time.perf_counter() - started:6.2f}s")
+
+    mark    = len(usage.recent_rows())
+    started = time.perf_counter()
+    planned, error = ai.get_cycle_plan(wanted, symptoms, 30)
+    calls, tokens_in, tokens_out = tokens(mark)
+    print(f"batched:  {calls:3d} calls, {tokens_in:6,} in / {tokens_out:6,} out tokens, "
+          f"{time.perf_counter() - started:6.2f}s ({len(planned)} days planned{', ' + error if error else ''})")
+
+    folder = storage.user_dir("bench-plan")
+    plan.save(folder, wanted[0][0], planned, dict(wanted))
+    reads   = 1000
+    started = time.perf_counter()
+    for i in range(reads):
+        plan.for_day(folder, wanted[i % len(wanted)][0])
+    print(f"reading a planned day: {(time.perf_counter() - started) / reads * 1000:.2f} ms")
+    server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
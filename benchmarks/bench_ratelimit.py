@@ -0,0 +1,75 @@
+"""A burst of interactive clicks and background batch calls against a
+rate-limited fake provider: what gets through, who waits, and who falls back.
+
+    python benchmarks/bench_ratelimit.py [interactive] [background]
+"""
+import os
+import sys
+import threading
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+from mooncyc import ratelimit  # noqa: E402
+
+
+class FakeProvider:
+    """Answers 429 when more than `calls` requests land inside a `window`-second window."""
+
+    def __init__(self, calls, window):
+        self.calls, self.window, self.log, self.lock = calls, window, [], threading.Lock()
+
+    def chat(self, **_):
+        with self.lock:
+            now = time.monotonic()
+            self.log = [t for t in self.log if now - t < self.window]
+            if len(self.log) >= self.calls:
+                return type("Response", (), {"status_code": 429, "headers": {"retry-after": "1"}})()
+            self.log.append(now)
+        time.sleep(0.05)
+        return type("Response", (), {"status_code": 200, "headers": {}})()
+
+
+def run(n_interactive, n_background, limited):
+    provider = FakeProvider(calls=10, window=2.0)
+    call     = ratelimit.limited("bench", provider.chat) if limited else provider.chat
+    results  = {"ok": 0, "429": 0, "fallback": 0}
+    latency  = {ratelimit.INTERACTIVE: [], ratelimit.BACKGROUND: []}
+    lock     = threading.Lock()
+
+    def worker(level):
+        with ratelimit.priority(level):
+            started = time.monotonic()
+            try:
+                outcome = "ok" if call().status_code == 200 else "429"
+            except ratelimit.RateLimited:
+                outcome = "fallback"
+        with lock:
+            results[outcome] += 1
+            latency[level].append(time.monotonic() - started)
+
+    threads = [threading.Thread(target=worker, args=(ratelimit.BACKGROUND,)) for _ in range(n_background)]
+    threads += [threading.Thread(target=worker, args=(ratelimit.INTERACTIVE,)) for _ in range(n_interactive)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    avg = {level: sum(v) / len(v) if v else 0 for level, v in latency.items()}
+    return results, avg
+
+
+def main():
+    n_interactive = int(sys.argv[1]) if len(sys.argv) > 1 else 20
+    n_background  = int(sys.argv[2]) if len(sys.argv) > 2 else 20
+    os.environ["MOONCYC_RATE_BENCH"] = "10/2"
+    ratelimit.DEFAULT_DEADLINES.update({ratelimit.INTERACTIVE: 3.0, ratelimit.BACKGROUND: 30.0})
+
+    print(f"{n_interactive} interactive + {n_background} background calls, provider allows 10 per 2 s")
+    for limited in (False, True):
+        results, avg = run(n_interactive, n_background, limited)
+        print(f"{'token bucket' if limited else 'no limiter  '}: {results}  "
+              f"avg latency interactive {avg[ratelimit.INTERACTIVE]:.2f} s, background {avg[ratelimit.BACKGROUND]:.2f} s")
+    print(ratelimit.stats())
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,52 @@
+"""Lookup latency of the meditation library vs. the LLM round-trip it replaces.
+
+    python benchmarks/bench_retrieval.py [scripts]
+"""
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+from mooncyc import retrieval  # noqa: E402
+
+PHASES   = ["Menstrual", "Follicular", "Ovulation", "Luteal"]
+MOODS    = ["😭 Terrible", "😢 Low", "😔 Down", "😐 Neutral", "🙂 Okay", "😊 Good", "😄 Great", "🌟 Amazing"]
+SYMPTOMS = ["Cramps", "Bloating", "Headache", "Irritable", "Stressed", "Tired", "Low Energy", "Migraine",
+            "Fatigue", "Anxiety", "Acne", "Back pain", "Sweet cravings", "Insomnia", "Brain fog", "Calm"]
+
+
+def context():
+    return random.choice(PHASES), random.choice(MOODS), random.sample(SYMPTOMS, random.randint(0, 4))
+
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 20_000
+    with tempfile.TemporaryDirectory() as tmp:
+        library = retrieval.MeditationLibrary(os.path.join(tmp, "library.db"))
+        started = time.perf_counter()
+        for _ in range(n):
+            meditation_id = library.add(*context(), "Breathe in slowly... " * 200)
+            if random.random() < 0.3:
+                library.feedback(meditation_id, liked=random.random() < 0.8)
+        build_s = time.perf_counter() - started
+
+        library = retrieval.MeditationLibrary(library.path)   # cold process
+        started = time.perf_counter()
+        library.stats()
+        load_ms = (time.perf_counter() - started) * 1000
+
+        queries = [context() for _ in range(500)]
+        started = time.perf_counter()
+        hits = sum(library.best_match(*q) is not None for q in queries)
+        query_ms = (time.perf_counter() - started) * 1000 / len(queries)
+
+        print(f"{n} scripts ({library.stats()['liked']} liked), built in {build_s:.1f} s")
+        print(f"cold load of vectors: {load_ms:.0f} ms")
+        print(f"best_match: {query_ms:.2f} ms per lookup, {hits}/{len(queries)} served from the library")
+        print("a fresh generation is one co.chat round-trip (typically 5-15 s)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,65 @@
+"""Insights prompt cost against history length: the rollup window read by
+the prompt builder stays the same size, while walking the whole log (what
+the prompt used to do) grows with it. Also the save-time cost of keeping
+rollups current for one new entry vs recomputing every cycle.
+
+    python benchmarks/bench_rollups.py [years ...]
+"""
+import os
+import random
+import sys
+import tempfile
+import time
+from collections import Counter
+from datetime import date, timedelta
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+os.environ.setdefault("MOONCYC_DATA_ROOT", tempfile.mkdtemp())
+from mooncyc import content, cycle, rollups, storage  # noqa: E402
+
+
+def make_data(years):
+    data  = {"last_period": date.today() - timedelta(days=5), "cycle_length": 28, "period_length": 5}
+    vocab = [s for s in content.symptom_options() if s != "None"]
+    moods = content.mood_options()
+    first = date.today() - timedelta(days=365 * years)
+    data["symptoms_log"] = [{"date": day, "phase": cycle.phase_on(data, day), "energy": random.randint(1, 5),
+                             "mood": random.choice(moods), "symptoms": random.sample(vocab, random.randint(0, 4))}
+                            for day in (first + timedelta(days=i) for i in range(365 * years))]
+    return data
+
+
+def walk_everything(log):
+    """All-time per-phase counts, as the prompt was built before rollups."""
+    counts = {}
+    for entry in log:
+        counts.setdefault(entry.get("phase"), Counter()).update(entry.get("symptoms", []))
+    return counts
+
+
+def timed(fn, repeat):
+    started = time.perf_counter()
+    for _ in range(repeat):
+        fn()
+    return (time.perf_counter() - started) / repeat * 1000
+
+
+def main():
+    print(f"{'years':>5} {'full walk':>10} {'prompt':>9} {'chars':>6} {'append':>8} {'rebuild':>9}")
+    for years in [int(a) for a in sys.argv[1:]] or [1, 5, 20]:
+        user = f"bench-{years}"
+        data = make_data(years)
+        storage.save_cycle_data(user, data)
+        folder = storage.user_dir(user)
+        walk_ms   = timed(lambda: walk_everything(data["symptoms_log"]), 5)
+        prompt_ms = timed(lambda: rollups.summary(rollups.recent(folder)), 20)
+        chars     = len(rollups.summary(rollups.recent(folder)))
+        view      = storage.load_cycle_data(user)
+        view["symptoms_log"].append({"date": date.today(), "phase": "Follicular", "energy": 4, "symptoms": []})
+        append_ms  = timed(lambda: rollups.record(folder, view), 5)
+        rebuild_ms = timed(lambda: rollups.record(folder, data), 3)   # unfrozen dicts: every cycle is dirty
+        print(f"{years:>5} {walk_ms:8.2f}ms {prompt_ms:7.2f}ms {chars:>6} {append_ms:6.2f}ms {rebuild_ms:7.1f}ms")
+
+
+if __name__ == "__main__":
+    main()
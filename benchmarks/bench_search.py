@@ -0,0 +1,57 @@
+"""Query latency of the full-text index vs a linear scan over every note.
+
+    python benchmarks/bench_search.py [days]
+"""
+import os
+import random
+import sys
+import tempfile
+import time
+from datetime import date, timedelta
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+from mooncyc import search, storage  # noqa: E402
+
+RARE   = "coffee migraine heat pad salmon quinoa ginger tea journal".split()
+COMMON = [f"w{i}" for i in range(5000)]   # stands in for everyday vocabulary
+QUERIES = ["migraine", "salmon", "ginger", "journ", "w17 w42"]
+
+
+def words(k):
+    picked = random.choices(COMMON, k=k)
+    if random.random() < 0.05:
+        picked[random.randrange(k)] = random.choice(RARE)
+    return " ".join(picked)
+
+
+def main():
+    days = int(sys.argv[1]) if len(sys.argv) > 1 else 3650
+    with tempfile.TemporaryDirectory() as tmp:
+        storage.DATA_ROOT = tmp
+        start = date.today() - timedelta(days=days)
+        texts = [words(random.randint(6, 40)) for _ in range(days)]
+        storage.save_cycle_data("bench", {
+            "last_period": None, "cycle_length": 28, "period_length": 5,
+            "symptoms_log": [{"date": start + timedelta(days=i), "notes": t} for i, t in enumerate(texts)]})
+        folder = storage.user_dir("bench")
+        generations = [(kind, start + timedelta(days=i), None, words(150))
+                       for i in range(0, days, 3) for kind in ("meditation", "meal_plan")]
+        search.add_documents(folder, generations)
+        storage.search("bench", "warmup")   # indexes the notes once
+        corpus = texts + [g[3] for g in generations]
+
+        print(f"{days} days of notes + {len(generations)} saved generations")
+        for query in QUERIES:
+            started = time.perf_counter()
+            hits = storage.search("bench", query)
+            fts_ms = (time.perf_counter() - started) * 1000
+            terms = query.split()
+            started = time.perf_counter()
+            scanned = [t for t in corpus if all(term in t.split() for term in terms)]
+            scan_ms = (time.perf_counter() - started) * 1000
+            print(f"{query!r:20} index {fts_ms:6.2f} ms ({len(hits)} ranked)   "
+                  f"linear scan {scan_ms:6.2f} ms ({len(scanned)} unranked)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,57 @@
+"""Concurrency check for request coalescing, using a slow local stub instead of Cohere.
+
+    python benchmarks/bench_singleflight.py
+
+Fires CALLERS identical meal-plan requests at once (symptoms in different
+orders) and checks the stub ran exactly once and every caller got the plan.
+"""
+import os
+import sys
+import threading
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+from mooncyc import singleflight  # noqa: E402
+
+CALLERS   = 50
+STUB_SECS = 0.5
+
+stub_calls = 0
+stub_lock  = threading.Lock()
+
+
+@singleflight.coalesced("meal_plan")
+def slow_meal_plan(phase: str, symptoms: list, age: int) -> dict:
+    global stub_calls
+    with stub_lock:
+        stub_calls += 1
+    time.sleep(STUB_SECS)
+    return {"breakfast": f"🥣 oats for {phase}", "lunch": "", "dinner": "", "snacks": "", "why": ""}
+
+
+def main():
+    results = [None] * CALLERS
+    barrier = threading.Barrier(CALLERS)
+
+    def caller(i):
+        symptoms = ["Cramps", "Bloating"] if i % 2 else ["Bloating", "Cramps"]
+        barrier.wait()
+        results[i] = slow_meal_plan("Luteal", symptoms, 25)
+
+    threads = [threading.Thread(target=caller, args=(i,)) for i in range(CALLERS)]
+    started = time.perf_counter()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    elapsed = time.perf_counter() - started
+
+    assert stub_calls == 1, f"expected one upstream call, got {stub_calls}"
+    assert all(r and r["breakfast"] == "🥣 oats for Luteal" for r in results)
+    print(f"{CALLERS} concurrent callers -> {stub_calls} upstream call in {elapsed:.2f}s "
+          f"(uncoalesced: {CALLERS} calls)")
+    print(f"stats: {singleflight.stats()}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,66 @@
+"""Save/load throughput of cycle data: pretty-printed JSON vs the binary snapshot.
+
+    python benchmarks/bench_snapshot.py [entries]
+"""
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+from datetime import date, timedelta
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+from mooncyc import snapshot, storage  # noqa: E402
+
+SYMPTOMS = ["Cramps", "Bloating", "Headache", "Tired", "Sweet cravings", "Insomnia", "Calm", "Acne"]
+MOODS    = ["😔 Down", "😐 Neutral", "🙂 Okay", "😊 Good"]
+PHASES   = ["Menstrual", "Follicular", "Ovulation", "Luteal"]
+
+
+def make_log(n):
+    start = date(1900, 1, 1)
+    return {
+        "last_period": start + timedelta(days=n - 10), "cycle_length": 28, "period_length": 5,
+        "symptoms_log": [{"date": start + timedelta(days=i), "phase": PHASES[i % 4],
+                          "mood": random.choice(MOODS), "energy": random.randint(1, 5),
+                          "symptoms": random.sample(SYMPTOMS, random.randint(0, 3)),
+                          "notes": "slept badly after late coffee, mild migraine" if i % 5 == 0 else ""}
+                         for i in range(n)],
+    }
+
+
+def timed(fn):
+    started = time.perf_counter()
+    fn()
+    return time.perf_counter() - started
+
+
+def main():
+    n    = int(sys.argv[1]) if len(sys.argv) > 1 else 50_000
+    data = make_log(n)
+    with tempfile.TemporaryDirectory() as tmp:
+        json_path, snap_path = os.path.join(tmp, "c.json"), os.path.join(tmp, "c.mcyc")
+
+        def save_json():
+            with open(json_path, "w") as f:
+                json.dump(storage.serialize_cycle_data(data), f, indent=2)
+
+        def load_json():
+            with open(json_path) as f:
+                storage.parse_cycle_data(json.load(f))
+
+        rows = [
+            ("json   save", timed(save_json)),
+            ("binary save", timed(lambda: snapshot.write_snapshot(snap_path, data))),
+            ("json   load", timed(load_json)),
+            ("binary load", timed(lambda: snapshot.read_snapshot(snap_path))),
+        ]
+        print(f"{n} entries — json {os.path.getsize(json_path) / 1e6:.1f} MB, "
+              f"snapshot {os.path.getsize(snap_path) / 1e6:.1f} MB")
+        for name, secs in rows:
+            print(f"{name}: {secs * 1000:8.1f} ms  ({n / secs / 1000:7.0f}k rows/s)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,65 @@
+"""New-session startup time for a user with a 50k-entry symptom log.
+
+    python benchmarks/bench_storage_startup.py
+
+"before" re-reads and re-parses the JSON file for every new session (what
+the apps did); "after" goes through the shared mtime-validated cache and
+only builds a copy-on-write view.
+"""
+import os
+import random
+import sys
+import tempfile
+import time
+from datetime import date, timedelta
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+from mooncyc import storage  # noqa: E402
+
+ENTRIES  = 50_000
+SESSIONS = 20
+USER     = "bench-user"
+SYMPTOMS = ["Cramps", "Bloating", "Headache", "Tired", "Sweet cravings", "Insomnia", "Calm"]
+
+
+def make_log():
+    start = date(1900, 1, 1)
+    return {
+        "last_period": start + timedelta(days=ENTRIES - 10),
+        "cycle_length": 28, "period_length": 5,
+        "symptoms_log": [{"date": start + timedelta(days=i), "phase": "Luteal", "mood": "😐 Neutral",
+                          "energy": random.randint(1, 5), "symptoms": random.sample(SYMPTOMS, 2),
+                          "notes": "slept badly, coffee at 4pm" if i % 7 == 0 else ""}
+                         for i in range(ENTRIES)],
+    }
+
+
+def main():
+    with tempfile.TemporaryDirectory() as root:
+        storage.DATA_ROOT = root
+        storage.save_cycle_data(USER, make_log())
+        storage.invalidate()
+
+        started = time.perf_counter()
+        for _ in range(SESSIONS):
+            storage._read_cycle_data(USER)
+        before = (time.perf_counter() - started) / SESSIONS * 1000
+
+        started = time.perf_counter()
+        storage.load_cycle_data(USER)          # first session of the process fills the cache
+        cold = (time.perf_counter() - started) * 1000
+
+        started = time.perf_counter()
+        for _ in range(SESSIONS):
+            view = storage.load_cycle_data(USER)
+        after = (time.perf_counter() - started) / SESSIONS * 1000
+
+        assert len(view["symptoms_log"]) == ENTRIES
+        print(f"{ENTRIES} entries, {SESSIONS} new sessions")
+        print(f"before (re-read + re-parse):  {before:8.2f} ms/session")
+        print(f"after, first session (cold):  {cold:8.2f} ms")
+        print(f"after, later sessions (warm): {after:8.2f} ms/session")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,80 @@
+"""Repeatable latency baseline for every external call, against the offline
+stubs: p50/p95 per endpoint, and time-to-first-token for streamed chat.
+
+    python benchmarks/bench_stub_latency.py [requests_per_endpoint] [concurrency]
+
+Profiles are scaled down 10x so a run takes seconds; ratios stay comparable.
+Uses the fixed seed, so two runs of the same build see the same latencies.
+"""
+import json
+import os
+import sys
+import time
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+from mooncyc import stubs, structured  # noqa: E402
+
+SCALE = 0.1
+
+
+def request(url, payload=None, stream=False):
+    data = json.dumps(payload).encode("utf-8") if payload is not None else None
+    req  = urllib.request.Request(url, data=data, headers={"Content-Type": "application/json"})
+    started, first = time.perf_counter(), None
+    try:
+        with urllib.request.urlopen(req) as response:
+            while True:
+                chunk = response.read1(4096) if stream else response.read()
+                if first is None:
+                    first = time.perf_counter() - started
+                if not chunk or not stream:
+                    break
+        status = 200
+    except urllib.error.HTTPError as e:
+        status = e.code
+    return time.perf_counter() - started, first, status
+
+
+def percentile(values, p):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * p))] * 1000
+
+
+def main():
+    n           = int(sys.argv[1]) if len(sys.argv) > 1 else 40
+    concurrency = int(sys.argv[2]) if len(sys.argv) > 2 else 8
+    profiles = stubs.profiles_with({name: {"median_ms": p["median_ms"] * SCALE}
+                                    for name, p in stubs.DEFAULT_PROFILES.items()})
+    profiles["cohere"]["error_rate"] = 0.05
+    server, url = stubs.serve(profiles=profiles, seed=42)
+
+    messages = [{"role": "user", "content": "Write a meditation for the Luteal phase."}]
+    calls = {
+        "cohere chat":         (f"{url}/v2/chat", {"model": "stub", "messages": messages}, False),
+        "cohere chat (json)":  (f"{url}/v2/chat", {"model": "stub", "messages": messages,
+                                                   "response_format": structured.response_format(
+                                                       structured.MEAL_PLAN_FIELDS)}, False),
+        "cohere chat stream":  (f"{url}/v2/chat", {"model": "stub", "messages": messages, "stream": True}, True),
+        "anthropic stream":    (f"{url}/v1/messages", {"model": "stub", "max_tokens": 1000,
+                                                       "messages": messages, "stream": True}, True),
+        "elevenlabs tts":      (f"{url}/v1/text-to-speech/voice", {"text": "breathe " * 250}, True),
+        "zenquotes":           (f"{url}/api/random", None, False),
+    }
+    print(f"{n} requests per endpoint, {concurrency} concurrent, latencies scaled x{SCALE}")
+    with ThreadPoolExecutor(concurrency) as pool:
+        for name, (endpoint, payload, stream) in calls.items():
+            results = list(pool.map(lambda _: request(endpoint, payload, stream), range(n)))
+            ok      = [r for r in results if r[2] == 200]
+            errors  = len(results) - len(ok)
+            line    = (f"{name:20} p50 {percentile([r[0] for r in ok], 0.5):7.1f} ms  "
+                       f"p95 {percentile([r[0] for r in ok], 0.95):7.1f} ms")
+            if stream:
+                line += f"  first byte p50 {percentile([r[1] for r in ok], 0.5):6.1f} ms"
+            print(line + (f"  ({errors} injected errors)" if errors else ""))
+    server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1 @@
+"""Shared building blocks for the Mooncyc apps (storage, caching, AI plumbing)."""
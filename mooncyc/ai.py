@@ -0,0 +1,549 @@
+# ─────────────────────────────────────────────────
+# AI GENERATIONS
+# ─────────────────────────────────────────────────
+# Every Cohere / ElevenLabs / ZenQuotes call, outside Streamlit, so the v2
+# app, the HTTP API (mooncyc/api.py) and scripts share them: the daily
+# quote, meditations (with the retrieval library), text-to-speech, meal
+# plans, remedies, fasting advice, the symptom pattern analysis and the
+# whole-cycle plan.
+#
+# Generations are coalesced across callers (mooncyc/singleflight.py),
+# rate-limited per provider (mooncyc/ratelimit.py) and recorded in the usage
+# ledger (mooncyc/usage.py). Failures come back as text starting with one of
+# GENERATION_ERRORS instead of raising.
+
+import json
+import os
+import random
+
+import cohere
+import requests
+from dotenv import load_dotenv
+
+from mooncyc import content, ratelimit, retrieval, rollups, singleflight, storage, structured, usage
+
+
+# ─────────────────────────────────────────────────
+# LOAD API KEYS
+# Your .env file should contain:
+#   COHERE_API_KEY=your_key_here
+#   ELEVENLABS_API_KEY=your_key_here
+# ─────────────────────────────────────────────────
+load_dotenv()
+COHERE_API_KEY    = os.getenv("COHERE_API_KEY", "")
+ELEVENLABS_API_KEY = os.getenv("ELEVENLABS_API_KEY", "")
+
+# MOONCYC_STUB_URL points every external API at the offline stubs
+# (python -m mooncyc.stubs) — no keys or network needed.
+STUB_URL = os.getenv("MOONCYC_STUB_URL", "").rstrip("/")
+if STUB_URL:
+    COHERE_API_KEY     = COHERE_API_KEY or "stub"
+    ELEVENLABS_API_KEY = ELEVENLABS_API_KEY or "stub"
+ELEVENLABS_URL = STUB_URL or "https://api.elevenlabs.io"
+ZENQUOTES_URL  = STUB_URL or "https://zenquotes.io"
+
+co = cohere.ClientV2(COHERE_API_KEY, **({"base_url": STUB_URL} if STUB_URL else {})) if COHERE_API_KEY else None
+
+# Outbound calls share per-provider rate limits across sessions (see mooncyc/ratelimit.py)
+co_chat         = ratelimit.limited("cohere", co.chat) if co else None
+elevenlabs_post = ratelimit.limited("elevenlabs", requests.post)
+zenquotes_get   = ratelimit.limited("zenquotes", requests.get, deadline=0)   # never wait: we have fallbacks
+
+AI_BUSY = "Mooncyc AI is busy right now — lots of people are asking at once. Try again in a minute."
+GENERATION_ERRORS = ("Could not connect", "Could not parse", "Error:", "Add COHERE_API_KEY", "Mooncyc AI is busy")
+
+
+# ─────────────────────────────────────────────────
+# FEATURE 1: DAILY QUOTE (ZenQuotes API)
+# ─────────────────────────────────────────────────
+# ZenQuotes is free, no API key needed, and has 100s of quotes.
+# It returns a fresh random quote on every call.
+# We also keep a large per-phase fallback list (in the content
+# registry) so the button always produces a different quote even
+# if the API is down.
+
+def get_cycle_quote(phase: str, previous_content: str = "") -> dict:
+    try:
+        response = zenquotes_get(f"{ZENQUOTES_URL}/api/random", timeout=5)
+        if response.status_code == 200:
+            data = response.json()
+            # ZenQuotes returns a list with one item: [{"q": "quote", "a": "author"}]
+            if data and data[0].get("q") and data[0]["q"] != previous_content:
+                return {"content": data[0]["q"], "author": data[0]["a"]}
+    except (requests.exceptions.RequestException, ratelimit.RateLimited):
+        pass
+
+    # Fallback: pick randomly from the curated per-phase list,
+    # avoiding the previous quote so it always feels fresh
+    phase_quotes = content.fallback_quotes(phase)
+    options = [q for q in phase_quotes if q["content"] != previous_content]
+    return random.choice(options or phase_quotes)
+
+
+# ─────────────────────────────────────────────────
+# STRUCTURED ANSWERS (meal plan, fasting)
+# ─────────────────────────────────────────────────
+# Asks Cohere for schema-valid JSON. If some fields still come back empty
+# (or the model answered in labelled text), only those fields are
+# re-requested in one follow-up turn instead of regenerating everything.
+
+def get_structured_answer(feature: str, messages: list, fields) -> dict:
+    response = usage.tracked_call(
+        feature, co_chat,
+        model="command-r-plus-08-2024",
+        messages=messages,
+        response_format=structured.response_format(fields)
+    )
+    raw = response.message.content[0].text
+    result, missing = structured.parse_structured(raw, fields)
+    if not missing:
+        return result
+
+    wanted = tuple(f for f in fields if f[0] in missing)
+    repair = usage.tracked_call(
+        f"{feature}_repair", co_chat,
+        model="command-r-plus-08-2024",
+        messages=messages + [{"role": "assistant", "content": raw},
+                             {"role": "user", "content": structured.repair_message(missing, fields)}],
+        response_format=structured.response_format(wanted)
+    )
+    patch, _ = structured.parse_structured(repair.message.content[0].text, wanted)
+    result.update({k: v for k, v in patch.items() if v})
+    return result
+
+
+# ─────────────────────────────────────────────────
+# FEATURE 2: AI MEDITATION + ITERATIVE REFINEMENT
+# ─────────────────────────────────────────────────
+@singleflight.coalesced("meditation")
+def get_initial_meditation(phase: str, mood: str, symptoms: list, age: int) -> str:
+    if not co:
+        return "Add COHERE_API_KEY to your .env file to unlock AI meditations."
+
+    symptom_str = ", ".join(symptoms) if symptoms else "no specific symptoms"
+    age_context = f"The user is {age} years old." if age else ""
+
+    system_message = """You are a compassionate mindfulness guide who specializes in 
+    menstrual cycle wellness. You write personalized, gentle, and grounding meditation 
+    scripts. Your scripts are warm, poetic, and practical. Each step is a short paragraph."""
+
+    user_message = f"""Write a personalized meditation script for someone in their {phase} phase.
+{age_context}
+Current mood: {mood}
+Symptoms today: {symptom_str}
+
+The meditation should:
+- Start by acknowledging exactly how they feel right now
+- Use imagery that matches the energy of the {phase} phase
+- Be gentle and compassionate in tone
+- End with an empowering affirmation suited to this phase
+- Be 5-7 minutes long (mention the duration at the start)
+
+Write the full script, ready to be read or followed."""
+
+    try:
+        response = usage.tracked_call(
+            "meditation", co_chat,
+            model="command-r-plus-08-2024",
+            messages=[
+                {"role": "system", "content": system_message},
+                {"role": "user",   "content": user_message}
+            ]
+        )
+        return response.message.content[0].text
+    except ratelimit.RateLimited:
+        return AI_BUSY + "\n\nHere is a pre-written meditation for your phase:\n\n" + content.meditation_fallback(phase)["script"]
+    except Exception as e:
+        return f"Could not connect to Cohere: {str(e)}"
+
+
+def find_or_write_meditation(user_id: str, phase: str, mood: str, symptoms: list, age: int,
+                             reuse: bool = True) -> tuple:
+    """Reuses a script the user liked for this phase/mood/symptoms when one is close
+    enough, otherwise writes a new one. Returns (script, library id or None, reused)."""
+    library = retrieval.library(user_id)
+    if reuse and co:
+        match = library.best_match(phase, mood, symptoms)
+        if match:
+            usage.record("meditation", "", cache_hit=True)
+            return match[1], match[0], True
+    script = get_initial_meditation(phase, mood, symptoms, age)
+    if not co or script.startswith(GENERATION_ERRORS):
+        return script, None, False
+    return script, library.add(phase, mood, symptoms, script), False
+
+
+def meditation_conversation(phase: str, mood: str, symptoms: list, age: int, meditation: str) -> list:
+    """The chat history refine_meditation continues from."""
+    symptom_str = ", ".join(symptoms) if symptoms else "no specific symptoms"
+    return [
+        {"role": "system",    "content": "You are a compassionate mindfulness guide for menstrual cycle wellness."},
+        {"role": "user",      "content": f"Write a meditation for {phase} phase. Age: {age}. Mood: {mood}. Symptoms: {symptom_str}."},
+        {"role": "assistant", "content": meditation}
+    ]
+
+
+def refine_meditation(messages_history: list, user_feedback: str) -> tuple:
+    if not co:
+        return "Add COHERE_API_KEY to your .env file.", messages_history
+
+    updated_history = messages_history + [{
+        "role": "user",
+        "content": f"This meditation didn't quite work for me. Here is what I would like changed: {user_feedback}\n\nCan you rewrite the meditation taking this into account? Keep the same warm, guided format."
+    }]
+
+    try:
+        response = usage.tracked_call("meditation_refine", co_chat,
+                                      model="command-r-plus-08-2024", messages=updated_history)
+        new_meditation = response.message.content[0].text
+        updated_history.append({"role": "assistant", "content": new_meditation})
+        return new_meditation, updated_history
+    except ratelimit.RateLimited:
+        return AI_BUSY, messages_history
+    except Exception as e:
+        return f"Could not connect to Cohere: {str(e)}", messages_history
+
+
+# ─────────────────────────────────────────────────
+# ELEVENLABS TEXT-TO-SPEECH
+# ─────────────────────────────────────────────────
+# Converts the LLM meditation script to MP3 audio.
+
+def text_to_speech(text: str, progress=None) -> tuple:
+    """Returns (audio_bytes_or_None, error_message_or_None).
+    `progress(fraction, message)` is called as the audio streams in (job queue)."""
+    if not ELEVENLABS_API_KEY:
+        return None, "No ElevenLabs API key found. Add ELEVENLABS_API_KEY to your .env file."
+
+    VOICE_ID = "21m00Tcm4TlvDq8ikWAM"
+    url      = f"{ELEVENLABS_URL}/v1/text-to-speech/{VOICE_ID}"
+    headers  = {"xi-api-key": ELEVENLABS_API_KEY, "Content-Type": "application/json"}
+    payload  = {
+        "text": text[:2500],   # trim to stay inside free tier
+        "model_id": "eleven_turbo_v2",
+        "voice_settings": {"stability": 0.80, "similarity_boost": 0.75, "speed": 0.75}
+    }
+
+    try:
+        response = elevenlabs_post(url, json=payload, headers=headers, timeout=30, stream=progress is not None)
+        if response.status_code == 200:
+            if progress is None:
+                return response.content, None
+            # roughly 1.2 KB of MP3 per character at this speed when there's no Content-Length
+            expected = int(response.headers.get("Content-Length") or len(payload["text"]) * 1200)
+            audio    = bytearray()
+            for chunk in response.iter_content(chunk_size=16384):
+                audio += chunk
+                progress(min(0.95, len(audio) / expected), f"Receiving audio… {len(audio) // 1024} KB")
+            return bytes(audio), None
+        else:
+            # Show the actual ElevenLabs error so we can debug it
+            try:
+                body = response.json()
+                msg  = body.get("detail", {}).get("message", str(body))
+            except Exception:
+                msg = f"HTTP {response.status_code}"
+            return None, f"ElevenLabs error: {msg}"
+    except ratelimit.RateLimited:
+        return None, "Audio is busy right now — lots of people are listening at once. Try again in a minute."
+    except requests.exceptions.RequestException as e:
+        return None, f"Network error contacting ElevenLabs: {str(e)}"
+
+
+# ─────────────────────────────────────────────────
+# FEATURE 3: AI MEAL PLAN
+# ─────────────────────────────────────────────────
+@singleflight.coalesced("meal_plan")
+def get_llm_meal_plan(phase: str, symptoms: list, age: int) -> dict:
+    if not co:
+        return {"breakfast": "Add COHERE_API_KEY to .env to unlock AI meal plans",
+                "lunch": "", "dinner": "", "snacks": "", "why": ""}
+
+    symptom_str = ", ".join(symptoms) if symptoms else "no specific symptoms"
+    age_context = f"The user is {age} years old." if age else ""
+
+    system_message = """You are a nutritionist specializing in cycle-syncing nutrition. 
+    You create personalized, practical meal plans that support hormonal health at each 
+    phase of the menstrual cycle. Your suggestions are realistic, delicious, and evidence-based."""
+
+    user_message = f"""Create a one-day meal plan for someone in their {phase} phase.
+{age_context}
+Current symptoms: {symptom_str}
+
+{structured.format_instructions(structured.MEAL_PLAN_FIELDS)}"""
+
+    messages = [{"role": "system", "content": system_message},
+                {"role": "user",   "content": user_message}]
+    try:
+        result = get_structured_answer("meal_plan", messages, structured.MEAL_PLAN_FIELDS)
+        if not result["breakfast"]:
+            result["breakfast"] = "Could not parse — try regenerating"
+        return result
+    except ratelimit.RateLimited:
+        return {**content.meal_plan_fallback(phase), "why": AI_BUSY + " Here is a pre-written plan for your phase."}
+    except Exception as e:
+        return {"breakfast": f"Error: {str(e)}", "lunch": "", "dinner": "", "snacks": "", "why": ""}
+
+
+# ─────────────────────────────────────────────────
+# FEATURE 4: AI NATURAL REMEDIES
+# ─────────────────────────────────────────────────
+@singleflight.coalesced("remedies")
+def get_llm_remedies(symptoms: list, phase: str, age: int) -> str:
+    if not co:
+        return "Add COHERE_API_KEY to your .env file to unlock AI remedies."
+    if not symptoms:
+        return "No symptoms logged. Track how you are feeling above to get personalized remedies."
+
+    symptom_str = ", ".join(symptoms)
+    age_context = f"The user is {age} years old." if age else ""
+
+    system_message = """You are a holistic women's health coach with expertise in natural, 
+    evidence-based remedies for menstrual cycle symptoms. You give warm, practical advice 
+    grounded in science. Always remind users to consult a healthcare provider for severe symptoms."""
+
+    user_message = f"""The user is in their {phase} phase and is experiencing: {symptom_str}
+{age_context}
+
+For each symptom, provide a natural remedy:
+**[Symptom name]**
+Remedy: [what to do]
+How: [specific, actionable instructions]
+Why it works: [brief science-backed explanation, 1 sentence]
+
+After all symptoms, add one short closing note about how these remedies interact 
+with the {phase} phase specifically. Keep each remedy concise and practical."""
+
+    try:
+        response = usage.tracked_call(
+            "remedies", co_chat,
+            model="command-r-plus-08-2024",
+            messages=[{"role": "system", "content": system_message},
+                      {"role": "user",   "content": user_message}]
+        )
+        return response.message.content[0].text
+    except ratelimit.RateLimited:
+        return AI_BUSY
+    except Exception as e:
+        return f"Could not connect to Cohere: {str(e)}"
+
+
+# ─────────────────────────────────────────────────
+# FEATURE 5: INTERMITTENT FASTING ADVISOR
+# ─────────────────────────────────────────────────
+# LLM receives the cycle phase, cycle day number, age, and current symptoms — then decides:
+#   - Is today a good day to fast? (yes/no + reason)
+#   - If yes: what is the maximum safe fasting window?
+#   - If no: what should the user eat instead?
+
+@singleflight.coalesced("fasting")
+def get_fasting_advice(phase: str, day_in_cycle: int, symptoms: list, age: int, energy_text: str = "") -> str:
+    if not co:
+        return "Add COHERE_API_KEY to your .env file to unlock fasting advice."
+
+    symptom_str  = ", ".join(symptoms) if symptoms else "no specific symptoms"
+    age_context  = f"The user is {age} years old." if age else ""
+
+    system_message = """You are a women's health nutritionist with expertise in 
+    intermittent fasting and menstrual cycle nutrition. You give evidence-based, 
+    safety-conscious advice on whether fasting is appropriate at each cycle phase. 
+    You are direct and practical. You always prioritize the user's wellbeing and 
+    remind them to consult a doctor if they have any health conditions."""
+
+    user_message = f"""Should this person do intermittent fasting today?
+
+Cycle phase: {phase}
+Day in cycle: {day_in_cycle}
+Current symptoms: {symptom_str}
+{age_context}
+{energy_text}
+
+{structured.format_instructions(structured.FASTING_FIELDS)}"""
+
+    messages = [{"role": "system", "content": system_message},
+                {"role": "user",   "content": user_message}]
+    try:
+        return json.dumps(get_structured_answer("fasting", messages, structured.FASTING_FIELDS))
+    except ratelimit.RateLimited:
+        return AI_BUSY
+    except Exception as e:
+        return f"Could not connect to Cohere: {str(e)}"
+
+
+def parse_fasting_advice(raw: str) -> dict:
+    """Parses the structured LLM fasting response (JSON or labelled text) into a dict for display."""
+    result, _ = structured.parse_structured(raw, structured.FASTING_FIELDS)
+    if not result["recommendation"]:
+        result["recommendation"] = raw  # show raw text if parsing fails
+    return result
+
+
+# ─────────────────────────────────────────────────
+# FEATURE 6: SYMPTOM PATTERN ANALYZER
+# ─────────────────────────────────────────────────
+def build_symptom_analysis_prompt(window: list, logged_days: int, cycle_length: int, age: int,
+                                  forecast_text: str = "", patterns_text: str = "") -> str:
+    """`window` is the newest per-cycle rollups (mooncyc/rollups.py), so the prompt's
+    size doesn't grow with years of history."""
+    if not window:
+        return ""
+
+    age_context = f"The user is {age} years old." if age else ""
+    prompt = f"""You are a compassionate women's health coach analyzing a user's menstrual cycle data.
+{age_context}
+The user has a {cycle_length}-day cycle and has logged {logged_days} days of data.
+
+Symptom and mood pattern by cycle phase over their last {len(window)} cycles (recent cycles count more):
+{rollups.summary(window)}
+"""
+    if patterns_text:
+        prompt += f"""
+Symptoms that go together, and links with energy (computed over every logged day):
+{patterns_text}
+"""
+    if forecast_text:
+        prompt += f"""
+Forecast for the next cycle from a model trained on all of this data (peak chance of each symptom per phase):
+{forecast_text}
+"""
+    prompt += """
+Based on this data, provide:
+1. **Top 3 Pattern Observations** — be concrete, reference the actual data.
+2. **Personalized Recommendations for Next Cycle** — 3 specific suggestions, each mentioning which phase.
+3. **One Thing to Watch** — one symptom or trend to monitor next cycle, and why.
+
+Warm, supportive tone. Concise. Address the user as "you".
+"""
+    return prompt
+
+
+@singleflight.coalesced("insights")
+def get_symptom_insights(user_id: str, cycle_length: int, age: int, forecast_text: str = "",
+                         patterns_text: str = "") -> str:
+    if not co:
+        return "Add COHERE_API_KEY to your .env file to unlock AI cycle analysis."
+    folder      = storage.user_dir(user_id)
+    logged_days = rollups.logged_days(folder)
+    if logged_days < 5:
+        return "Log at least 5 days of symptoms to unlock your personalized cycle insights."
+
+    prompt = build_symptom_analysis_prompt(rollups.recent(folder), logged_days, cycle_length, age,
+                                           forecast_text, patterns_text)
+    try:
+        response = usage.tracked_call(
+            "insights", co_chat,
+            model="command-r-plus-08-2024",
+            messages=[{"role": "user", "content": prompt}]
+        )
+        return response.message.content[0].text
+    except ratelimit.RateLimited:
+        return AI_BUSY
+    except Exception as e:
+        return f"Could not connect to Cohere: {str(e)}"
+
+
+# ─────────────────────────────────────────────────
+# FEATURE 7: WHOLE-CYCLE PLAN
+# ─────────────────────────────────────────────────
+# One call writes the meal plan, fasting advice and meditation theme for
+# every remaining day of the cycle, grouped by phase (stored per day by
+# mooncyc/plan.py). Days that come back incomplete — or cut off by the
+# output limit — are asked for again in one follow-up; anything still
+# missing is left to the per-click generators.
+
+PLAN_MAX_TOKENS = 4000
+
+PLAN_SYSTEM = """You are a women's health coach and nutritionist specializing in cycle syncing.
+    You plan realistic, varied meals, safety-conscious intermittent fasting advice and short
+    meditation themes that follow the phases of the menstrual cycle. You are concise."""
+
+
+def _plan_messages(days: list, symptoms: list, age: int, energy_text: str) -> list:
+    symptom_str = ", ".join(symptoms) if symptoms else "no specific symptoms"
+    age_context = f"The user is {age} years old." if age else ""
+    spans = {}
+    for day, phase in days:
+        spans.setdefault(phase, []).append(day)
+    ranges = "\n".join(f"- {phase}: {d[0]:%a %b %d} to {d[-1]:%a %b %d} ({len(d)} days)" for phase, d in spans.items())
+    fields = "\n".join(f'  "{key}": {desc}' for key, _, desc in structured.PLAN_DAY_FIELDS)
+
+    user_message = f"""Plan every remaining day of this person's menstrual cycle.
+{age_context}
+Recent symptoms: {symptom_str}
+{energy_text}
+
+Days to plan, by phase:
+{ranges}
+
+Respond ONLY with a JSON object with one key per phase above. Under each phase give
+  "why": {structured.PLAN_PHASE_FIELDS[0][2]}
+  "reason": {structured.PLAN_PHASE_FIELDS[1][2]}
+and one object per day, keyed by its date (YYYY-MM-DD), with these keys:
+{fields}
+Vary the meals from day to day and keep every value short."""
+    return [{"role": "system", "content": PLAN_SYSTEM},
+            {"role": "user",   "content": user_message}]
+
+
+def _request_plan(feature: str, days: list, symptoms: list, age: int, energy_text: str) -> tuple:
+    response = usage.tracked_call(
+        feature, co_chat,
+        model="command-r-plus-08-2024",
+        messages=_plan_messages(days, symptoms, age, energy_text),
+        response_format=structured.plan_response_format(days),
+        max_tokens=PLAN_MAX_TOKENS
+    )
+    return structured.parse_plan(response.message.content[0].text, days)
+
+
+@singleflight.coalesced("cycle_plan")
+def get_cycle_plan(days: list, symptoms: list, age: int, energy_text: str = "") -> tuple:
+    """Returns ({date: plan fields}, error or None) for `days` [(date, phase)]."""
+    if not co:
+        return {}, "Add COHERE_API_KEY to your .env file to unlock the cycle plan."
+    if not days:
+        return {}, None
+    try:
+        plan, missing = _request_plan("cycle_plan", days, symptoms, age, energy_text)
+        if missing:
+            wanted = [(day, phase) for day, phase in days if day in set(missing)]
+            patch, _ = _request_plan("cycle_plan_repair", wanted, symptoms, age, energy_text)
+            plan.update(patch)
+        return plan, None
+    except ratelimit.RateLimited:
+        return {}, AI_BUSY
+    except Exception as e:
+        return {}, f"Could not connect to Cohere: {str(e)}"
+
+
+@singleflight.coalesced("plan_day")
+def regenerate_plan_day(day, phase: str, day_in_cycle: int, symptoms: list, age: int,
+                        energy_text: str = "") -> tuple:
+    """One day of the plan on its own (an override). Returns (plan fields or None, error or None)."""
+    if not co:
+        return None, "Add COHERE_API_KEY to your .env file to unlock the cycle plan."
+
+    symptom_str = ", ".join(symptoms) if symptoms else "no specific symptoms"
+    age_context = f"The user is {age} years old." if age else ""
+    fields      = structured.PLAN_DAY_FIELDS + structured.PLAN_PHASE_FIELDS
+    user_message = f"""Plan {day:%A, %B %d} for this person: meals, whether to fast, and a meditation theme.
+
+Cycle phase: {phase}
+Day in cycle: {day_in_cycle}
+Current symptoms: {symptom_str}
+{age_context}
+{energy_text}
+
+{structured.format_instructions(fields)}"""
+
+    messages = [{"role": "system", "content": PLAN_SYSTEM},
+                {"role": "user",   "content": user_message}]
+    try:
+        result = get_structured_answer("plan_day", messages, fields)
+        if structured.missing_fields(result, structured.PLAN_DAY_FIELDS):
+            return None, "Could not parse the plan for this day — try regenerating"
+        return result, None
+    except ratelimit.RateLimited:
+        return None, AI_BUSY
+    except Exception as e:
+        return None, f"Could not connect to Cohere: {str(e)}"
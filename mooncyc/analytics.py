@@ -0,0 +1,128 @@
+# ─────────────────────────────────────────────────
+# MULTI-CYCLE SYMPTOM ANALYTICS
+# ─────────────────────────────────────────────────
+# The symptom log cut into real cycles instead of folded onto one:
+#
+#   starts   recorded period starts (cycle_data["period_starts"], the CSV
+#            importer, every "Save My Info") plus last_period. Entries older
+#            than the first recorded start fall into cycles projected back
+#            from it by cycle_length.
+#   tensor   uint8 [cycle, day of cycle, symptom], 1 = reported that day
+#   logged   bool  [cycle, day of cycle], whether that day was logged at all
+#
+# so "Headache across all cycles" is one slice, tensor[:, :, k], and days
+# that weren't logged stay distinguishable from days without the symptom.
+#
+# Cycles of different lengths can be aligned on ovulation: the luteal phase
+# is about 14 days whatever the cycle length, so each cycle is stretched
+# piecewise — period start → ovulation and ovulation → next period — onto a
+# common length.
+
+from datetime import date
+
+import numpy as np
+
+from mooncyc import content
+
+MAX_CYCLE_DAYS = 60   # longer gaps (missing months) are cut here
+LUTEAL_DAYS    = 14
+
+
+def cycle_starts(cycle_data, first_logged: date = None) -> list:
+    """Sorted recorded period starts, extended backwards by cycle_length to cover `first_logged`."""
+    starts = set(cycle_data.get("period_starts") or ())
+    if cycle_data.get("last_period"):
+        starts.add(cycle_data["last_period"])
+    starts = sorted(starts)
+    if starts and first_logged is not None and first_logged < starts[0]:
+        length = cycle_data.get("cycle_length", 28)
+        back   = -(-(starts[0] - first_logged).days // length)   # cycles needed, rounded up
+        starts = [date.fromordinal(starts[0].toordinal() - i * length) for i in range(back, 0, -1)] + starts
+    return starts
+
+
+class CycleTensor:
+    def __init__(self, cycle_data):
+        log          = cycle_data.get("symptoms_log", [])
+        vocabulary   = [s for s in content.symptom_options() if s != "None"]
+        extra        = sorted({s for e in log for s in e.get("symptoms", ()) if s != "None"} - set(vocabulary))
+        self.symptoms = vocabulary + extra
+        index         = {s: i for i, s in enumerate(self.symptoms)}
+
+        first        = min((e["date"] for e in log), default=None)
+        self.starts  = cycle_starts(cycle_data, first)
+        starts       = np.array([d.toordinal() for d in self.starts], dtype=np.int64)
+        n_cycles     = len(starts)
+        # length of each cycle: up to the next start; the current one is open-ended
+        expected     = cycle_data.get("cycle_length", 28)
+        self.lengths = np.minimum(np.append(np.diff(starts), expected), MAX_CYCLE_DAYS) if n_cycles else \
+            np.zeros(0, dtype=np.int64)
+
+        self.tensor = np.zeros((n_cycles, MAX_CYCLE_DAYS, len(self.symptoms)), dtype=np.uint8)
+        self.logged = np.zeros((n_cycles, MAX_CYCLE_DAYS), dtype=bool)
+        self.outside = 0   # entries before the first cycle or past MAX_CYCLE_DAYS
+        if not n_cycles or not log:
+            return
+
+        ordinals = np.fromiter((e["date"].toordinal() for e in log), dtype=np.int64, count=len(log))
+        cycle    = np.searchsorted(starts, ordinals, side="right") - 1
+        day      = ordinals - starts[np.maximum(cycle, 0)]
+        valid    = (cycle >= 0) & (day < MAX_CYCLE_DAYS)
+        self.outside = int((~valid).sum())
+        self.logged[cycle[valid], day[valid]] = True
+        # the last cycle stays open until the next period is recorded
+        if valid.any():
+            self.lengths[-1] = max(self.lengths[-1], int(day[valid & (cycle == n_cycles - 1)].max(initial=-1)) + 1)
+
+        rows, codes = [], []
+        for i in np.flatnonzero(valid):
+            for s in log[i].get("symptoms", ()):
+                if s in index:
+                    rows.append(i)
+                    codes.append(index[s])
+        if rows:
+            rows = np.array(rows, dtype=np.int64)
+            self.tensor[cycle[rows], day[rows], np.array(codes)] = 1
+
+    @property
+    def n_cycles(self) -> int:
+        return len(self.starts)
+
+    def frequency(self) -> np.ndarray:
+        """[day of cycle, symptom]: share of logged days with the symptom."""
+        logged = self.logged.sum(axis=0)
+        return self.tensor.sum(axis=0) / np.maximum(logged, 1)[:, None]
+
+    def top_symptoms(self, n: int = 3) -> list:
+        totals = self.tensor.sum(axis=(0, 1), dtype=np.int64)
+        return [self.symptoms[i] for i in np.argsort(-totals, kind="stable")[:n] if totals[i] > 0]
+
+    def heatmap(self, symptom: str, align_ovulation: bool = False, length: int = None) -> np.ndarray:
+        """[cycle, day] for one symptom: 1 reported, 0 logged without it, NaN not logged.
+        With align_ovulation every cycle is resampled onto `length` days (default:
+        the median cycle length) with ovulation LUTEAL_DAYS before its end."""
+        k      = self.symptoms.index(symptom)
+        values = np.where(self.logged, self.tensor[:, :, k].astype(np.float32), np.nan)
+        if not align_ovulation:
+            width = int(self.lengths.max(initial=1))
+            days  = np.arange(width)
+            return np.where(days[None, :] < self.lengths[:, None], values[:, :width], np.nan)
+        return values[np.arange(self.n_cycles)[:, None], self.aligned_days(length)]
+
+    def aligned_days(self, length: int = None) -> np.ndarray:
+        """[cycle, target day] -> source day of that cycle, aligning ovulation."""
+        if not length:
+            length = int(np.median(self.lengths)) if self.n_cycles else 28
+        target    = np.arange(length, dtype=np.float64)
+        lengths   = self.lengths.astype(np.float64)[:, None]
+        ovulation = np.maximum(lengths - LUTEAL_DAYS, 1.0)
+        target_ov = max(length - LUTEAL_DAYS, 1)
+        before    = target[None, :] * ovulation / target_ov
+        after     = ovulation + (target[None, :] - target_ov) * (lengths - ovulation) / max(length - target_ov, 1)
+        source    = np.where(target[None, :] < target_ov, before, after)
+        return np.clip(np.floor(source).astype(np.int64), 0, lengths.astype(np.int64) - 1)
+
+
+def to_rows(matrix: np.ndarray) -> list:
+    """Nested lists with None for NaN (gaps in a Plotly heatmap)."""
+    return [[None if v != v else float(v) for v in row] for row in matrix.tolist()]
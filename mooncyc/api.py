@@ -0,0 +1,485 @@
+# ─────────────────────────────────────────────────
+# HTTP API
+# ─────────────────────────────────────────────────
+# The Mooncyc core without Streamlit, for the mobile client and other
+# services. JSON in, JSON out; dates are ISO strings.
+#
+#   GET  /v1/health
+#   POST /v1/phases                          phases of many dates, for a user or a cycle
+#   POST /v1/today                           phase, day and expected energy of many users
+#   PUT  /v1/users/<id>/cycle                last_period, cycle_length, period_length
+#   GET  /v1/users/<id>/entries?from=&to=    the symptom log
+#   POST /v1/users/<id>/entries              log many days at once (one save)
+#   POST /v1/users/<id>/tasks                add many tasks at once
+#   GET  /v1/users/<id>/schedule?days=14     the energy-weighted task schedule
+#   GET  /v1/users/<id>/analytics            symptom pairs, energy, next-cycle forecast
+#   POST /v1/users/<id>/generate/<kind>      quote, meditation, meal_plan, remedies,
+#                                            fasting or insights (mooncyc/ai.py)
+#
+# Batch endpoints stream one JSON object per line (chunked NDJSON) when the
+# client sends "Accept: application/x-ndjson", so a 20-year phase range or
+# a thousand users is never built up as one response. Every connection is
+# served on its own thread with HTTP/1.1 keep-alive. Writes to the same user
+# are serialised in this process; the user id in the URL is the only
+# credential, as in the app's ?user= link, so bind it to a private network.
+#
+#   python -m mooncyc.api --port 8000
+#
+# The AI endpoints import mooncyc/ai.py (and with it the Cohere client) on
+# first use; everything else runs without it. Generations are returned,
+# not saved to the user's history.
+
+import argparse
+import json
+import re
+import threading
+import time
+from datetime import date, timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+from mooncyc import analytics, cooccurrence, cycle, energy, forecast, importer, rollups, storage
+
+MAX_BODY    = 10 * 1024 * 1024
+MAX_BATCH   = 10_000            # dates, users, entries or tasks per request
+MAX_DAYS    = 366 * 20          # longest date range
+STREAM_ROWS = 256               # NDJSON lines per chunk
+NDJSON      = "application/x-ndjson"
+INTENSITIES = tuple(cycle.INTENSITY_WEIGHT)
+CATEGORIES  = ("Work", "Study", "Personal", "Exercise", "Creative")
+
+_USER_ROUTE = re.compile(r"^/v1/users/([^/]+)/(cycle|entries|tasks|schedule|analytics|generate/[a-z_]+)$")
+
+_user_locks = {}                # user_id -> lock held while read-modify-writing their data
+_locks_lock = threading.Lock()
+
+
+class ApiError(Exception):
+    def __init__(self, status: int, message: str):
+        super().__init__(message)
+        self.status = status
+
+
+def _user_lock(user_id: str) -> threading.Lock:
+    with _locks_lock:
+        return _user_locks.setdefault(user_id, threading.Lock())
+
+
+def _jsonable(value):
+    if isinstance(value, date):
+        return value.isoformat()
+    if hasattr(value, "item"):   # NumPy scalars
+        return value.item()
+    if isinstance(value, (set, tuple)):
+        return list(value)
+    raise TypeError(f"not JSON serialisable: {type(value).__name__}")
+
+
+def _dumps(payload) -> bytes:
+    return json.dumps(payload, default=_jsonable, ensure_ascii=False).encode("utf-8")
+
+
+# ─────────────────────────────────────────────────
+# VALIDATION
+# ─────────────────────────────────────────────────
+def _date(text, field: str = "date") -> date:
+    try:
+        return date.fromisoformat(str(text))
+    except ValueError:
+        raise ApiError(400, f"{field}: expected YYYY-MM-DD, got {text!r}")
+
+
+def _int(value, field: str, lo: int, hi: int) -> int:
+    try:
+        number = int(value)
+    except (TypeError, ValueError):
+        raise ApiError(400, f"{field}: expected an integer, got {value!r}")
+    if not lo <= number <= hi:
+        raise ApiError(400, f"{field}: must be between {lo} and {hi}")
+    return number
+
+
+def _batch(items, field: str) -> list:
+    if not isinstance(items, list):
+        raise ApiError(400, f"{field}: expected a list")
+    if len(items) > MAX_BATCH:
+        raise ApiError(413, f"{field}: at most {MAX_BATCH} per request")
+    return items
+
+
+def _user_id(user_id: str) -> str:
+    if not storage.valid_user_id(user_id):
+        raise ApiError(400, "invalid user id")
+    return user_id
+
+
+def _dates(body: dict, query: dict) -> list:
+    """"dates": [...], or "from" + "to" (inclusive) in the body or query string."""
+    if "dates" in body:
+        return [_date(d) for d in _batch(body["dates"], "dates")]
+    first, last = body.get("from") or query.get("from"), body.get("to") or query.get("to")
+    if not first or not last:
+        raise ApiError(400, 'send "dates" or "from" and "to"')
+    first, last = _date(first, "from"), _date(last, "to")
+    if not 0 <= (last - first).days < MAX_DAYS:
+        raise ApiError(400, f"from..to must be in order and at most {MAX_DAYS} days")
+    return [first + timedelta(days=i) for i in range((last - first).days + 1)]
+
+
+def _cycle_settings(raw: dict) -> dict:
+    if not isinstance(raw, dict) or not raw.get("last_period"):
+        raise ApiError(400, 'cycle: needs at least "last_period"')
+    return {"last_period": _date(raw["last_period"], "last_period"),
+            "cycle_length": _int(raw.get("cycle_length", 28), "cycle_length", 15, 60),
+            "period_length": _int(raw.get("period_length", 5), "period_length", 1, 15),
+            "symptoms_log": []}
+
+
+def _entry(raw, today: date) -> dict:
+    """A log entry from API input, with symptoms and moods mapped like the CSV importer."""
+    if not isinstance(raw, dict):
+        raise ApiError(400, "expected an object")
+    day = _date(raw.get("date"))
+    if day > today:
+        raise ApiError(400, "date is in the future")
+    names = raw.get("symptoms") or []
+    if not isinstance(names, list) or not all(isinstance(n, str) for n in names):
+        raise ApiError(400, "symptoms: expected a list of strings")
+    unknown  = {}
+    symptoms = importer.map_symptoms(",".join(names), unknown)
+    if unknown:
+        raise ApiError(400, f"unknown symptoms: {', '.join(sorted(unknown))}")
+    mood = importer.map_mood(str(raw.get("mood") or ""))
+    if raw.get("mood") and mood is None:
+        raise ApiError(400, f"unknown mood: {raw['mood']!r}")
+    level = raw.get("energy")
+    return {"date": day, "mood": mood, "energy": _int(level, "energy", 1, 5) if level is not None else None,
+            "symptoms": symptoms, "notes": str(raw.get("notes") or "")[:importer.MAX_NOTE]}
+
+
+def _task(raw, today: date) -> dict:
+    if not isinstance(raw, dict) or not str(raw.get("task") or "").strip():
+        raise ApiError(400, 'a task needs a "task" name')
+    intensity = raw.get("intensity", "Moderate")
+    if intensity not in INTENSITIES:
+        raise ApiError(400, f"intensity: one of {', '.join(INTENSITIES)}")
+    category = raw.get("category", "Personal")
+    if category not in CATEGORIES:
+        raise ApiError(400, f"category: one of {', '.join(CATEGORIES)}")
+    try:
+        hours = float(raw.get("hours", 1))
+    except (TypeError, ValueError):
+        raise ApiError(400, "hours: expected a number")
+    if not 0 < hours <= 20:
+        raise ApiError(400, "hours: must be more than 0 and at most 20")
+    return {"task": str(raw["task"]).strip(), "category": category,
+            "deadline": _date(raw.get("deadline", today.isoformat()), "deadline"),
+            "hours": hours, "intensity": intensity, "completed": False}
+
+
+# ─────────────────────────────────────────────────
+# ENDPOINTS
+# ─────────────────────────────────────────────────
+def _day_in_cycle(cycle_data, day: date):
+    if not cycle_data.get("last_period"):
+        return None
+    return (day - cycle_data["last_period"]).days % cycle_data["cycle_length"] + 1
+
+
+def phases(body: dict, query: dict):
+    """Yields {"date", "phase", "day"} for every requested date."""
+    if "cycle" in body:
+        cycle_data = _cycle_settings(body["cycle"])
+    else:
+        cycle_data = storage.load_cycle_data(_user_id(body.get("user_id") or query.get("user_id") or ""))
+    for day in _dates(body, query):
+        yield {"date": day, "phase": cycle.phase_on(cycle_data, day), "day": _day_in_cycle(cycle_data, day)}
+
+
+def today_for_users(body: dict, query: dict):
+    """Yields {"user_id", "phase", "day", "energy"} for every user in "user_ids"."""
+    day = _date(body["date"]) if body.get("date") else date.today()
+    for user_id in _batch(body.get("user_ids"), "user_ids"):
+        if not storage.valid_user_id(user_id):
+            yield {"user_id": user_id, "error": "invalid user id"}
+            continue
+        cycle_data = storage.load_cycle_data(user_id)
+        expected   = energy.model_for(user_id, cycle_data).predict([day])[0] if cycle_data.get("last_period") else None
+        yield {"user_id": user_id, "date": day, "phase": cycle.phase_on(cycle_data, day),
+               "day": _day_in_cycle(cycle_data, day), "energy": round(float(expected), 2) if expected is not None else None}
+
+
+def set_cycle(user_id: str, body: dict) -> dict:
+    """Replaces the cycle settings; last_period is recorded as a period start like in the app."""
+    settings = _cycle_settings(body)
+    with _user_lock(user_id):
+        data = storage.load_cycle_data(user_id)
+        data["cycle_length"], data["period_length"] = settings["cycle_length"], settings["period_length"]
+        cycle.record_period_start(data, settings["last_period"])
+        storage.save_cycle_data(user_id, data)
+    return {k: data[k] for k in ("last_period", "cycle_length", "period_length", "period_starts")}
+
+
+def list_entries(user_id: str, query: dict):
+    first = _date(query["from"], "from") if query.get("from") else date.min
+    last  = _date(query["to"], "to") if query.get("to") else date.max
+    notes = query.get("notes") == "1"
+    for entry in storage.load_cycle_data(user_id)["symptoms_log"]:
+        if first <= entry["date"] <= last:
+            row = {k: entry.get(k) for k in ("date", "phase", "mood", "energy", "symptoms")}
+            if notes:
+                row["notes"] = storage.entry_note(user_id, entry)
+            yield row
+
+
+def add_entries(user_id: str, body: dict) -> dict:
+    """Validates every entry, then saves the accepted ones in one write.
+    Days already logged are skipped unless "replace" is true."""
+    today, replace = date.today(), bool(body.get("replace"))
+    accepted, rejected = {}, []
+    for i, raw in enumerate(_batch(body.get("entries"), "entries")):
+        try:
+            entry = _entry(raw, today)
+        except (ApiError, TypeError, ValueError) as e:   # one bad entry shouldn't fail the batch
+            rejected.append({"index": i, "reason": str(e)})
+            continue
+        accepted[entry["date"]] = entry
+    with _user_lock(user_id):
+        data    = storage.load_cycle_data(user_id)
+        logged  = {e["date"] for e in data["symptoms_log"]}
+        skipped = {d for d in accepted if d in logged and not replace}
+        new     = [e for d, e in sorted(accepted.items()) if d not in skipped]
+        for entry in new:
+            entry["phase"] = cycle.phase_on(data, entry["date"])
+            if not entry["notes"]:
+                del entry["notes"]
+        if new:
+            replaced = {e["date"] for e in new}
+            data["symptoms_log"] = sorted([e for e in data["symptoms_log"] if e["date"] not in replaced] + new,
+                                          key=lambda e: e["date"])
+            storage.save_cycle_data(user_id, data)
+    return {"saved": len(new), "skipped": len(skipped), "rejected": rejected}
+
+
+def add_tasks(user_id: str, body: dict) -> dict:
+    today  = date.today()
+    tasks  = [_task(raw, today) for raw in _batch(body.get("tasks"), "tasks")]
+    with _user_lock(user_id):
+        saved = storage.load_tasks(user_id) + tasks
+        storage.save_tasks(user_id, saved)
+    return {"saved": len(tasks), "tasks": len(saved)}
+
+
+def schedule(user_id: str, query: dict) -> dict:
+    days     = _int(query.get("days", cycle.SPREAD_DAYS), "days", 1, cycle.SPREAD_DAYS)
+    today    = date.today()
+    expected = energy.model_for(user_id, storage.load_cycle_data(user_id)).by_day(today, cycle.SPREAD_DAYS)
+    load     = cycle.daily_load(storage.load_tasks(user_id), today, days, energy=expected)
+    return {"days": [{"date": day, "energy": round(expected[day], 2), "hours": round(sum(t["hours"] for t in blocks), 1),
+                      "tasks": blocks} for day, blocks in load.items()]}
+
+
+def user_analytics(user_id: str) -> dict:
+    cycle_data = storage.load_cycle_data(user_id)
+    if not cycle_data.get("last_period"):
+        raise ApiError(409, "set last_period first")
+    tensor     = analytics.CycleTensor(cycle_data)
+    matrix     = cooccurrence.matrix_for(user_id, cycle_data)
+    model      = forecast.model_for(user_id, cycle_data)
+    first, probabilities = model.next_cycle()
+    peaks      = probabilities.max(axis=0)
+    return {"logged_days": len(cycle_data["symptoms_log"]), "cycles": tensor.n_cycles,
+            "top_symptoms": tensor.top_symptoms(5),
+            "pairs": [{"symptoms": [a, b], "days": n, "lift": round(lift, 2)} for a, b, n, lift in matrix.top_pairs()],
+            "energy_links": [{"symptom": s, "r": round(r, 2)} for s, r in matrix.energy_links()],
+            "energy_by_day": [round(v, 2) for v in energy.model_for(user_id, cycle_data).levels().tolist()],
+            "next_cycle": {"start": first, "likely": [{"symptom": model.symptoms[i], "peak": round(float(peaks[i]), 2)}
+                                                      for i in peaks.argsort()[::-1][:5] if peaks[i] >= 0.05]}}
+
+
+GENERATIONS = ("quote", "meditation", "meal_plan", "remedies", "fasting", "insights")
+
+
+def generate(user_id: str, kind: str, body: dict) -> dict:
+    if kind not in GENERATIONS:
+        raise ApiError(404, f"unknown generation {kind!r}; one of {', '.join(GENERATIONS)}")
+    try:
+        from mooncyc import ai   # needs the Cohere client, so only loaded when asked for
+    except ImportError as e:
+        raise ApiError(503, f"AI generations are not available on this server ({e})")
+
+    cycle_data = storage.load_cycle_data(user_id)
+    if not cycle_data.get("last_period"):
+        raise ApiError(409, "set last_period first")
+    today    = date.today()
+    phase    = cycle.phase_on(cycle_data, today)
+    log      = cycle_data["symptoms_log"]
+    symptoms = body.get("symptoms", list(log[-1].get("symptoms", ())) if log else [])
+    age      = _int(body["age"], "age", 13, 60) if body.get("age") is not None else None
+    if kind == "quote":
+        return {"kind": kind, "phase": phase, "output": ai.get_cycle_quote(phase)}
+    if kind == "meditation":
+        script, library_id, reused = ai.find_or_write_meditation(user_id, phase, body.get("mood", "Neutral"),
+                                                                  symptoms, age)
+        return {"kind": kind, "phase": phase, "output": script, "library_id": library_id, "reused": reused}
+    if kind == "meal_plan":
+        return {"kind": kind, "phase": phase, "output": ai.get_llm_meal_plan(phase, symptoms, age)}
+    if kind == "remedies":
+        return {"kind": kind, "phase": phase, "output": ai.get_llm_remedies(symptoms, phase, age)}
+    if kind == "fasting":
+        advice = ai.get_fasting_advice(phase, _day_in_cycle(cycle_data, today), symptoms, age,
+                                       energy.model_for(user_id, cycle_data).summary(today))
+        return {"kind": kind, "phase": phase, "output": ai.parse_fasting_advice(advice)}
+    rollups.ensure(storage.user_dir(user_id), cycle_data)
+    model        = forecast.model_for(user_id, cycle_data)
+    first, probs = model.next_cycle(today)
+    output       = ai.get_symptom_insights(user_id, cycle_data["cycle_length"], age, forecast.summary(model, first, probs),
+                                     cooccurrence.matrix_for(user_id, cycle_data).summary())
+    return {"kind": kind, "phase": phase, "output": output}
+
+
+# ─────────────────────────────────────────────────
+# SERVER
+# ─────────────────────────────────────────────────
+class Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    server_version   = "Mooncyc/1"
+    disable_nagle_algorithm = True   # headers and body go out as separate writes on kept-alive connections
+
+    def log_message(self, *args):
+        pass
+
+    def _body(self) -> dict:
+        try:
+            length = int(self.headers.get("Content-Length") or 0)
+        except ValueError:
+            length = -1
+        if not 0 <= length <= MAX_BODY:
+            self.close_connection = True   # the body stays unread: don't parse it as the next request
+            if length < 0:
+                raise ApiError(400, "Content-Length must be a non-negative integer")
+            raise ApiError(413, f"body larger than {MAX_BODY} bytes")
+        try:
+            body = json.loads(self.rfile.read(length) or b"{}") if length else {}
+        except ValueError:
+            raise ApiError(400, "body is not valid JSON")
+        if not isinstance(body, dict):
+            raise ApiError(400, "body must be a JSON object")
+        return body
+
+    def _json(self, status: int, payload):
+        data = _dumps(payload)
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        if self.close_connection:
+            self.send_header("Connection", "close")
+        self.end_headers()
+        self.wfile.write(data)
+
+    def _rows(self, key: str, rows):
+        """A batch result: streamed NDJSON if the client asked for it, else {key: [...]}.
+        The first row is produced before any header is sent, so validation errors still get a 400."""
+        rows = iter(rows)
+        head = next(rows, None)
+        if NDJSON not in (self.headers.get("Accept") or ""):
+            self._json(200, {key: ([head] if head is not None else []) + list(rows)})
+            return
+        self.streaming = True
+        self.send_response(200)
+        self.send_header("Content-Type", NDJSON)
+        self.send_header("Transfer-Encoding", "chunked")
+        self.end_headers()
+        batch = [head] if head is not None else []
+        for row in rows:
+            batch.append(row)
+            if len(batch) >= STREAM_ROWS:
+                self._chunk(batch)
+                batch = []
+        if batch:
+            self._chunk(batch)
+        self.wfile.write(b"0\r\n\r\n")
+
+    def _chunk(self, rows: list):
+        data = b"".join(_dumps(row) + b"\n" for row in rows)
+        self.wfile.write(f"{len(data):x}\r\n".encode("ascii") + data + b"\r\n")
+
+    def _route(self, method: str):
+        url   = urlsplit(self.path)
+        query = {k: v[-1] for k, v in parse_qs(url.query).items()}
+        body  = self._body() if method in ("POST", "PUT") else {}
+        if url.path == "/v1/health":
+            return self._json(200, {"ok": True, "time": time.time()})
+        if (method, url.path) == ("POST", "/v1/phases"):
+            return self._rows("phases", phases(body, query))
+        if (method, url.path) == ("POST", "/v1/today"):
+            return self._rows("users", today_for_users(body, query))
+        match = _USER_ROUTE.match(url.path)
+        if not match:
+            raise ApiError(404, "not found")
+        user_id, action = _user_id(match.group(1)), match.group(2)
+        if (method, action) == ("PUT", "cycle"):
+            return self._json(200, set_cycle(user_id, body))
+        if (method, action) == ("GET", "entries"):
+            return self._rows("entries", list_entries(user_id, query))
+        if (method, action) == ("POST", "entries"):
+            return self._json(200, add_entries(user_id, body))
+        if (method, action) == ("POST", "tasks"):
+            return self._json(200, add_tasks(user_id, body))
+        if (method, action) == ("GET", "schedule"):
+            return self._json(200, schedule(user_id, query))
+        if (method, action) == ("GET", "analytics"):
+            return self._json(200, user_analytics(user_id))
+        if method == "POST" and action.startswith("generate/"):
+            return self._json(200, generate(user_id, action.split("/", 1)[1], body))
+        raise ApiError(405, f"{method} not allowed here")
+
+    def _handle(self, method: str):
+        self.streaming = False
+        try:
+            self._route(method)
+        except (ConnectionError, TimeoutError):
+            self.close_connection = True
+        except Exception as e:
+            if self.streaming:   # headers are out: all we can do is cut the stream short
+                self.close_connection = True
+            elif isinstance(e, ApiError):
+                self._json(e.status, {"error": str(e)})
+            else:                # a bug, not bad input: still answer, and drop the connection
+                self.close_connection = True
+                self._json(500, {"error": f"{type(e).__name__}: {e}"})
+
+    def do_GET(self):
+        self._handle("GET")
+
+    def do_POST(self):
+        self._handle("POST")
+
+    def do_PUT(self):
+        self._handle("PUT")
+
+
+def serve(host: str = "127.0.0.1", port: int = 0) -> tuple:
+    """Starts the API on a background thread. Returns (server, base_url)."""
+    server = ThreadingHTTPServer((host, port), Handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True, name="mooncyc-api").start()
+    return server, f"http://{host}:{server.server_address[1]}"
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Mooncyc HTTP API")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8000)
+    args = parser.parse_args(argv)
+    server = ThreadingHTTPServer((args.host, args.port), Handler)
+    server.daemon_threads = True
+    print(f"Mooncyc API on http://{args.host}:{server.server_address[1]} (data in {storage.DATA_ROOT})")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,270 @@
+# ─────────────────────────────────────────────────
+# BATCH INSIGHTS
+# ─────────────────────────────────────────────────
+# Regenerates the symptom pattern analysis for every user — after a change
+# to ai.build_symptom_analysis_prompt or a switch of model:
+#
+#   python -m mooncyc.batch --model command-r-plus-08-2024 --concurrency 8
+#
+# Two stages, so neither waits on the other:
+#
+#   prepare   a process pool loads each user's data, brings the rollups up
+#             to date and builds the prompt (forecast and co-occurrence
+#             summaries included), like the Analyze button does
+#   generate  an asyncio loop sends the prompts to Cohere with at most
+#             --concurrency calls in flight, each taking a BACKGROUND token
+#             from the shared cohere bucket (mooncyc/ratelimit.py); 429s
+#             pause the bucket, 429/5xx/network errors are retried
+#
+# Results are saved to each user's generation history (so the app shows
+# them on next load) and recorded in the usage ledger. Every finished user
+# is appended to a JSON-lines checkpoint; running again with the same
+# checkpoint and model skips users already done and retries the failures.
+# At the end it prints throughput, tokens and the estimated cost.
+
+import argparse
+import asyncio
+import json
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import date
+
+import cohere
+
+from mooncyc import ai, cooccurrence, cycle, forecast, history, ratelimit, rollups, search, storage, usage
+
+DEFAULT_MODEL = "command-r-plus-08-2024"
+CHECKPOINT    = "insights_batch.jsonl"
+MIN_LOGGED    = 5      # same threshold as the app
+MAX_ATTEMPTS  = 4
+RETRY_STATUS  = {429, 500, 502, 503, 504}
+FEATURE       = "insights_batch"
+
+# USD per million (input, output) tokens — for the report only
+PRICES = {
+    "command-r-plus-08-2024": (2.50, 10.00),
+    "command-a-03-2025":      (2.50, 10.00),
+    "command-r-08-2024":      (0.15, 0.60),
+    "command-r7b-12-2024":    (0.0375, 0.15),
+}
+
+
+# ─────────────────────────────────────────────────
+# PREPARE (worker processes)
+# ─────────────────────────────────────────────────
+def prepare(user_id: str) -> dict:
+    """Everything the generate stage needs for one user: the prompt, or why there is none."""
+    started    = time.process_time()
+    folder     = storage.user_dir(user_id)
+    cycle_data = storage.load_cycle_data(user_id)
+    job        = {"user_id": user_id, "prompt": None, "reason": None}
+    if not cycle_data.get("last_period"):
+        job["reason"] = "no last period"
+    else:
+        rollups.ensure(folder, cycle_data)
+        logged_days = rollups.logged_days(folder)
+        if logged_days < MIN_LOGGED:
+            job["reason"] = f"{logged_days} logged days"
+        else:
+            today        = date.today()
+            model        = forecast.model_for(user_id, cycle_data)
+            first, probs = model.next_cycle(today)
+            previous     = history.latest(folder, "insights")
+            age          = (previous or {}).get("inputs", {}).get("age")
+            cycle_length = cycle_data.get("cycle_length", 28)
+            job.update(
+                prompt=ai.build_symptom_analysis_prompt(
+                    rollups.recent(folder), logged_days, cycle_length, age,
+                    forecast.summary(model, first, probs),
+                    cooccurrence.matrix_for(user_id, cycle_data).summary()),
+                phase=cycle.phase_on(cycle_data, today),
+                cycle_start=cycle.cycle_start(cycle_data, today),
+                inputs={"cycle_length": cycle_length, "age": age, "logged_days": logged_days})
+            job["reason"] = None if job["prompt"] else "nothing rolled up"
+    job["cpu_ms"] = (time.process_time() - started) * 1000
+    return job
+
+
+# ─────────────────────────────────────────────────
+# CHECKPOINT
+# ─────────────────────────────────────────────────
+def read_checkpoint(path: str, model: str) -> set:
+    """Users already done (generated or skipped) with `model`."""
+    done = set()
+    if not os.path.exists(path):
+        return done
+    with open(path, "r") as f:
+        for line in f:
+            try:
+                row = json.loads(line)
+            except json.JSONDecodeError:
+                continue   # a line cut short by an interrupted run
+            if row.get("model") == model and row.get("status") in ("ok", "skipped"):
+                done.add(row["user_id"])
+    return done
+
+
+# ─────────────────────────────────────────────────
+# GENERATE (event loop)
+# ─────────────────────────────────────────────────
+def _status(error) -> int:
+    return getattr(error, "status_code", None) or getattr(getattr(error, "response", None), "status_code", None)
+
+
+def _retry_after(error, attempt: int) -> float:
+    headers = getattr(error, "headers", None) or {}
+    try:
+        return float(headers.get("retry-after"))
+    except (TypeError, ValueError):
+        return ratelimit.DEFAULT_COOLDOWN if _status(error) == 429 else 2.0 ** attempt
+
+
+async def generate(client, model: str, prompt: str) -> tuple:
+    """(text, input tokens, output tokens, latency ms) — retried on 429, 5xx and network errors."""
+    limiter = ratelimit.bucket("cohere")
+    for attempt in range(MAX_ATTEMPTS):
+        await asyncio.to_thread(limiter.acquire, ratelimit.BACKGROUND,
+                                ratelimit.DEFAULT_DEADLINES[ratelimit.BACKGROUND])
+        started = time.perf_counter()
+        try:
+            response = await client.chat(model=model, messages=[{"role": "user", "content": prompt}])
+        except Exception as e:
+            latency = (time.perf_counter() - started) * 1000
+            usage.record(FEATURE, model, latency_ms=latency, error=type(e).__name__)
+            status = _status(e)
+            if attempt == MAX_ATTEMPTS - 1 or (status is not None and status not in RETRY_STATUS):
+                raise
+            if status == 429:
+                limiter.penalize(_retry_after(e, attempt))
+            else:
+                await asyncio.sleep(_retry_after(e, attempt))
+            continue
+        latency = (time.perf_counter() - started) * 1000
+        input_tokens, output_tokens = map(int, usage.response_tokens(response))
+        usage.record(FEATURE, model, input_tokens, output_tokens, latency_ms=latency)
+        return response.message.content[0].text, input_tokens, output_tokens, latency
+
+
+def save(job: dict, text: str, model: str):
+    folder = storage.user_dir(job["user_id"])
+    gen_id = history.record(folder, "insights", text, date.today(), job["phase"], job["cycle_start"],
+                            dict(job["inputs"], model=model, batch=True))
+    search.add_document(folder, "insights", text, date.today(), gen_id)
+
+
+async def run(user_ids: list, model: str, checkpoint: str, concurrency: int = 8, workers: int = None,
+              dry_run: bool = False) -> dict:
+    """Prepares and generates for `user_ids`, appending one checkpoint row per user. Returns the totals."""
+    totals = {"users": len(user_ids), "ok": 0, "skipped": 0, "errors": 0, "input_tokens": 0,
+              "output_tokens": 0, "cpu_ms": 0.0, "llm_ms": 0.0}
+    if not user_ids:
+        return totals
+    loop   = asyncio.get_running_loop()
+    queue  = asyncio.Queue(maxsize=concurrency)   # prepared prompts waiting for a call slot
+    client = None if dry_run else cohere.AsyncClientV2(
+        ai.COHERE_API_KEY, **({"base_url": ai.STUB_URL} if ai.STUB_URL else {}))
+    out    = open(checkpoint, "a")
+
+    def finish(job: dict, status: str, **fields):
+        totals[{"error": "errors", "dry_run": "skipped"}.get(status, status)] += 1
+        totals["cpu_ms"] += job["cpu_ms"]
+        row = {"user_id": job["user_id"], "model": model, "status": status, **fields}
+        out.write(json.dumps(row, default=str) + "\n")
+        out.flush()
+
+    async def prepare_one(pool, user_id: str, slots):
+        try:
+            job = await loop.run_in_executor(pool, prepare, user_id)
+        except Exception as e:   # one unreadable dataset shouldn't stop the run
+            job = {"user_id": user_id, "prompt": None, "error": f"prepare: {type(e).__name__}: {e}", "cpu_ms": 0.0}
+        await queue.put(job)
+        slots.release()
+
+    async def produce(pool):
+        slots = asyncio.Semaphore(2 * (workers or os.cpu_count() or 1))   # prompts built ahead of the LLM
+        tasks = []
+        for user_id in user_ids:
+            await slots.acquire()
+            tasks.append(asyncio.create_task(prepare_one(pool, user_id, slots)))
+        await asyncio.gather(*tasks)
+        for _ in range(concurrency):
+            await queue.put(None)
+
+    async def consume():
+        while (job := await queue.get()) is not None:
+            if job.get("error"):
+                finish(job, "error", error=job["error"])
+                continue
+            if not job["prompt"]:
+                finish(job, "skipped", reason=job["reason"])
+                continue
+            if dry_run:
+                finish(job, "dry_run", prompt_chars=len(job["prompt"]))
+                continue
+            try:
+                text, input_tokens, output_tokens, latency = await generate(client, model, job["prompt"])
+                await asyncio.to_thread(save, job, text, model)
+            except Exception as e:
+                finish(job, "error", error=f"{type(e).__name__}: {e}"[:300])
+                continue
+            totals["input_tokens"]  += input_tokens
+            totals["output_tokens"] += output_tokens
+            totals["llm_ms"]        += latency
+            finish(job, "ok", input_tokens=input_tokens, output_tokens=output_tokens,
+                   latency_ms=round(latency, 1))
+
+    try:
+        # spawn, not fork: the event loop already runs threads
+        with ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn")) as pool:
+            await asyncio.gather(produce(pool), *(consume() for _ in range(concurrency)))
+    finally:
+        out.close()
+        usage.flush()
+    return totals
+
+
+def report(totals: dict, model: str, elapsed: float, resumed: int = 0) -> str:
+    price_in, price_out = PRICES.get(model, (None, None))
+    cost = (f"${(totals['input_tokens'] * price_in + totals['output_tokens'] * price_out) / 1e6:,.4f}"
+            if price_in is not None else f"unknown (no price for {model})")
+    done = totals["ok"] + totals["skipped"] + totals["errors"]
+    return "\n".join([
+        f"users      {totals['users']} to do ({resumed} already done): {totals['ok']} generated, "
+        f"{totals['skipped']} skipped, {totals['errors']} failed",
+        f"time       {elapsed:.1f}s — {done / elapsed if elapsed else 0:.1f} users/s, "
+        f"{totals['ok'] / elapsed if elapsed else 0:.2f} generations/s",
+        f"prepare    {totals['cpu_ms'] / max(done, 1):.1f} ms CPU per user",
+        f"llm        {totals['llm_ms'] / max(totals['ok'], 1):.0f} ms per call",
+        f"tokens     {totals['input_tokens']:,} in, {totals['output_tokens']:,} out",
+        f"cost       {cost} ({model})",
+    ])
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Regenerate the symptom pattern analysis for every user")
+    parser.add_argument("--model", default=DEFAULT_MODEL)
+    parser.add_argument("--concurrency", type=int, default=8, help="LLM calls in flight")
+    parser.add_argument("--workers", type=int, default=None, help="prepare processes (default: CPUs)")
+    parser.add_argument("--checkpoint", default=CHECKPOINT)
+    parser.add_argument("--restart", action="store_true", help="ignore the checkpoint and redo every user")
+    parser.add_argument("--limit", type=int, default=None, help="at most this many users")
+    parser.add_argument("--dry-run", action="store_true", help="build the prompts, don't call the LLM")
+    args = parser.parse_args()
+
+    if not ai.COHERE_API_KEY and not args.dry_run:
+        parser.error("COHERE_API_KEY (or MOONCYC_STUB_URL) is not set")
+    if args.restart and os.path.exists(args.checkpoint):
+        os.remove(args.checkpoint)
+    done     = read_checkpoint(args.checkpoint, args.model)
+    user_ids = [u for u in storage.iter_user_ids() if u not in done][:args.limit]
+
+    started = time.perf_counter()
+    totals  = asyncio.run(run(user_ids, args.model, args.checkpoint, args.concurrency, args.workers,
+                              args.dry_run))
+    print(report(totals, args.model, time.perf_counter() - started, len(done)))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,93 @@
+# ─────────────────────────────────────────────────
+# PHASE CONTENT REGISTRY
+# ─────────────────────────────────────────────────
+# Phase descriptions, exercise tips, fallback quotes and the pre-written
+# meditations / meal plans / remedy are the same for every user. They are
+# loaded once per process from content.json (or MOONCYC_CONTENT_FILE) and
+# handed out as frozen, shared views instead of rebuilding dict literals on
+# every call in every session.
+
+import json
+import os
+import threading
+from types import MappingProxyType
+
+CONTENT_FILE  = os.getenv("MOONCYC_CONTENT_FILE",
+                          os.path.join(os.path.dirname(__file__), "content.json"))
+DEFAULT_PHASE = "Follicular"
+
+_lock     = threading.Lock()
+_registry = None
+
+
+def freeze(value):
+    """Recursively turns dicts into read-only mappings and lists into tuples."""
+    if isinstance(value, dict):
+        return MappingProxyType({k: freeze(v) for k, v in value.items()})
+    if isinstance(value, list):
+        return tuple(freeze(v) for v in value)
+    return value
+
+
+def registry() -> MappingProxyType:
+    """The whole content registry, loaded on first use."""
+    global _registry
+    if _registry is None:
+        with _lock:
+            if _registry is None:
+                with open(CONTENT_FILE, "r", encoding="utf-8") as f:
+                    _registry = freeze(json.load(f))
+    return _registry
+
+
+def for_phase(table: str, phase: str):
+    """Looks `phase` up in a per-phase table, falling back to the Follicular entry."""
+    entries = registry()[table]
+    return entries.get(phase, entries[DEFAULT_PHASE])
+
+
+def phase_description(phase: str):
+    return for_phase("phase_descriptions", phase)
+
+
+def exercise_recommendation(phase: str):
+    return for_phase("exercise_recommendations", phase)
+
+
+def phase_energy_level(phase: str) -> int:
+    return registry()["phase_energy_levels"].get(phase, 3)
+
+
+def fallback_quotes(phase: str) -> tuple:
+    return for_phase("fallback_quotes", phase)
+
+
+def meditation_fallback(phase: str):
+    return for_phase("meditation_fallbacks", phase)
+
+
+def meal_plan_fallback(phase: str):
+    return for_phase("meal_plan_fallbacks", phase)
+
+
+def remedy_fallback():
+    return registry()["remedy_fallback"]
+
+
+def mood_options() -> tuple:
+    """The symptom form's mood scale, worst to best."""
+    return registry()["moods"]
+
+
+def symptom_options() -> tuple:
+    """The symptom form's vocabulary."""
+    return registry()["symptoms"]
+
+
+def symptom_aliases():
+    """Other trackers' symptom names (lower-case) -> our vocabulary."""
+    return registry()["symptom_aliases"]
+
+
+def mood_aliases():
+    return registry()["mood_aliases"]
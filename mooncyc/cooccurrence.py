@@ -0,0 +1,148 @@
+# ─────────────────────────────────────────────────
+# SYMPTOM CO-OCCURRENCE
+# ─────────────────────────────────────────────────
+# Which symptoms come together, and which go with low energy. Each log entry
+# is a 0/1 vector x over the symptom vocabulary (plus its energy e, if any),
+# and the engine keeps running sums updated with one rank-1 step per entry:
+#
+#   together  Σ x xᵀ     days each pair was reported together (diagonal: days per symptom)
+#   energy    Σ x·e, Σ e, Σ e² over entries that have an energy level
+#
+# From those, without another pass over the log:
+#
+#   lift         P(a and b) / (P(a) P(b)) — above 1 means "more often together than chance"
+#   correlation  phi coefficient between two symptoms
+#   energy       point-biserial correlation of each symptom with the energy level
+#
+# Like the forecaster, engines are cached per user and caught up with new entries.
+
+import threading
+from collections import OrderedDict
+
+import numpy as np
+
+from mooncyc import content
+
+MIN_PAIR_DAYS = 3     # a pair needs this many shared days before it's reported
+MIN_LIFT      = 1.5   # ...and to come together this much more often than chance
+CACHE_SIZE    = 256
+
+
+class SymptomMatrix:
+    def __init__(self, log=()):
+        self.symptoms  = [s for s in content.symptom_options() if s != "None"]
+        self.index     = {s: i for i, s in enumerate(self.symptoms)}
+        n              = len(self.symptoms)
+        self.together  = np.zeros((n, n), dtype=np.int64)
+        self.days      = 0
+        self.energy_n  = 0
+        self.energy_s  = 0.0
+        self.energy_ss = 0.0
+        self.with_n    = np.zeros(n, dtype=np.int64)   # entries with energy that report the symptom
+        self.with_s    = np.zeros(n)                   # Σ energy over those
+        self.n_entries = 0
+        self.last_date = None
+        for entry in log:
+            self.update(entry)
+
+    def update(self, entry):
+        """One rank-1 update: together += x xᵀ (only the reported rows/columns are touched)."""
+        self.n_entries += 1
+        self.last_date  = entry.get("date")
+        x = np.unique([self.index[s] for s in entry.get("symptoms", ()) if s in self.index]).astype(np.int64)
+        self.days += 1
+        self.together[np.ix_(x, x)] += 1
+        energy = entry.get("energy")
+        if energy:
+            self.energy_n  += 1
+            self.energy_s  += energy
+            self.energy_ss += energy * energy
+            self.with_n[x] += 1
+            self.with_s[x] += energy
+
+    @property
+    def counts(self) -> np.ndarray:
+        return np.diag(self.together)
+
+    def lift(self) -> np.ndarray:
+        c = self.counts.astype(np.float64)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            out = self.together * float(self.days) / np.outer(c, c)
+        return np.nan_to_num(out, nan=0.0, posinf=0.0)
+
+    def correlation(self) -> np.ndarray:
+        """Phi coefficient of every pair (0 where a symptom never or always appears)."""
+        n, c = float(self.days), self.counts.astype(np.float64)
+        spread = np.sqrt(c * (n - c))
+        with np.errstate(divide="ignore", invalid="ignore"):
+            out = (n * self.together - np.outer(c, c)) / np.outer(spread, spread)
+        return np.nan_to_num(out, nan=0.0, posinf=0.0, neginf=0.0)
+
+    def energy_correlation(self) -> np.ndarray:
+        """Point-biserial correlation of each symptom with the day's energy (1-5)."""
+        n = float(self.energy_n)
+        if n < 2:
+            return np.zeros(len(self.symptoms))
+        mean = self.energy_s / n
+        sd   = np.sqrt(max(self.energy_ss / n - mean * mean, 0.0))
+        p    = self.with_n / n
+        with np.errstate(divide="ignore", invalid="ignore"):
+            mean_with = self.with_s / self.with_n
+            out = (mean_with - mean) / sd * np.sqrt(p / (1 - p))
+        return np.nan_to_num(out, nan=0.0, posinf=0.0, neginf=0.0)
+
+    def reported(self) -> list:
+        """Indices of symptoms reported at least once, most frequent first."""
+        c = self.counts
+        return [int(i) for i in np.argsort(-c, kind="stable") if c[i] > 0]
+
+    def top_pairs(self, n: int = 5, min_days: int = MIN_PAIR_DAYS, min_lift: float = MIN_LIFT) -> list:
+        """[(a, b, shared days, lift)] with the highest lift, ignoring rare pairs."""
+        lift   = self.lift()
+        a, b   = np.triu_indices(len(self.symptoms), k=1)
+        shared = self.together[a, b]
+        keep   = (shared >= min_days) & (lift[a, b] >= min_lift)
+        a, b   = a[keep], b[keep]
+        order  = np.argsort(-lift[a, b], kind="stable")[:n]
+        return [(self.symptoms[a[i]], self.symptoms[b[i]], int(self.together[a[i], b[i]]),
+                 float(lift[a[i], b[i]])) for i in order]
+
+    def energy_links(self, n: int = 3, min_days: int = MIN_PAIR_DAYS) -> list:
+        """[(symptom, correlation)] most strongly tied to energy, either way."""
+        r     = self.energy_correlation()
+        valid = np.flatnonzero(self.with_n >= min_days)
+        order = valid[np.argsort(-np.abs(r[valid]), kind="stable")][:n]
+        return [(self.symptoms[i], float(r[i])) for i in order if abs(r[i]) >= 0.1]
+
+    def summary(self) -> str:
+        """Compact text for LLM prompts."""
+        lines = [f"- {a} + {b}: together on {days} days, {lift:.1f}× more often than chance"
+                 for a, b, days, lift in self.top_pairs()]
+        lines += [f"- {s} goes with {'lower' if r < 0 else 'higher'} energy (r = {r:+.2f})"
+                  for s, r in self.energy_links()]
+        return "\n".join(lines)
+
+
+# ─────────────────────────────────────────────────
+# PER-USER ENGINES
+# ─────────────────────────────────────────────────
+_matrices = OrderedDict()   # user_id -> SymptomMatrix
+_lock     = threading.Lock()
+
+
+def matrix_for(user_id: str, cycle_data) -> SymptomMatrix:
+    """The user's engine, caught up with entries appended since it was last used
+    (rebuilt when the log was rewritten rather than appended to)."""
+    log = cycle_data.get("symptoms_log", [])
+    with _lock:
+        matrix = _matrices.pop(user_id, None)
+        if (matrix is None or len(log) < matrix.n_entries
+                or (matrix.n_entries and log[matrix.n_entries - 1].get("date") != matrix.last_date)):
+            matrix = SymptomMatrix(log)
+        else:
+            for entry in log[matrix.n_entries:]:
+                matrix.update(entry)
+        _matrices[user_id] = matrix
+        while len(_matrices) > CACHE_SIZE:
+            _matrices.popitem(last=False)
+        return matrix
@@ -0,0 +1,119 @@
+# ─────────────────────────────────────────────────
+# CYCLE LOGIC
+# ─────────────────────────────────────────────────
+# Phase and schedule rules shared by the app, the calendar export and the
+# analytics modules. Cycles repeat every cycle_length days from last_period
+# (also backwards, for dates before it).
+#
+#   day 0 .. period_length-1   Menstrual
+#   ..  13                     Follicular
+#   14, 15                     Ovulation
+#   16 .. cycle_length-1       Luteal
+
+from datetime import date, timedelta
+
+PHASES = ("Menstrual", "Follicular", "Ovulation", "Luteal")
+
+
+def phase_for_day(day_in_cycle: int, period_length: int) -> str:
+    """Phase of a 0-based day in the cycle."""
+    if day_in_cycle < period_length: return "Menstrual"
+    elif day_in_cycle < 14:          return "Follicular"
+    elif day_in_cycle < 16:          return "Ovulation"
+    else:                            return "Luteal"
+
+
+def phase_on(cycle_data, target_date=None):
+    if not cycle_data["last_period"]:
+        return None
+    if target_date is None:
+        target_date = date.today()
+    days_since = (target_date - cycle_data["last_period"]).days
+    return phase_for_day(days_since % cycle_data["cycle_length"], cycle_data["period_length"])
+
+
+def cycle_start(cycle_data, target_date=None):
+    """First day of the cycle `target_date` falls in (None without a last period)."""
+    if not cycle_data["last_period"]:
+        return None
+    days_since = ((target_date or date.today()) - cycle_data["last_period"]).days
+    return cycle_data["last_period"] + timedelta(days=days_since - days_since % cycle_data["cycle_length"])
+
+
+def record_period_start(cycle_data, start: date):
+    """Sets last_period to `start` and adds it to period_starts. A start less than half a
+    cycle from the previous last_period corrects that date instead of adding a cycle."""
+    starts   = set(cycle_data.get("period_starts") or ())
+    previous = cycle_data.get("last_period")
+    if previous and abs((start - previous).days) < cycle_data.get("cycle_length", 28) // 2:
+        starts.discard(previous)
+    starts.add(start)
+    cycle_data["period_starts"] = sorted(starts)
+    cycle_data["last_period"]   = start
+
+
+def phase_bounds(cycle_length: int, period_length: int) -> list:
+    """[(phase, first day, day after last)] within one cycle, same rules as phase_for_day."""
+    edges = [("Menstrual", 0, period_length), ("Follicular", period_length, 14),
+             ("Ovulation", 14, 16), ("Luteal", 16, cycle_length)]
+    bounds = []
+    for phase, lo, hi in edges:
+        lo, hi = max(lo, bounds[-1][2] if bounds else 0), min(hi, cycle_length)
+        if lo < hi:
+            bounds.append((phase, lo, hi))
+    return bounds
+
+
+def iter_phase_spans(cycle_data, start: date, end: date):
+    """Yields (phase, first day, day after last, cycle start) for every phase
+    overlapping [start, end), cycle by cycle — nothing is materialised."""
+    if not cycle_data["last_period"]:
+        return
+    cycle_length = cycle_data["cycle_length"]
+    bounds       = phase_bounds(cycle_length, cycle_data["period_length"])
+    first        = cycle_start(cycle_data, start)
+    while first < end:
+        for phase, lo, hi in bounds:
+            span_start, span_end = first + timedelta(days=lo), first + timedelta(days=hi)
+            if span_end > start and span_start < end:
+                yield phase, span_start, span_end, first
+        first += timedelta(days=cycle_length)
+
+
+# ─────────────────────────────────────────────────
+# TASK SCHEDULE
+# ─────────────────────────────────────────────────
+SPREAD_DAYS = 14   # a task's hours are spread over at most this many days
+
+# how strongly a task leans towards high-energy days: hours on a day are
+# proportional to expected energy ** weight (0 = spread evenly)
+INTENSITY_WEIGHT = {"Light": 0.0, "Moderate": 1.0, "Demanding": 2.0}
+
+
+def iter_task_blocks(tasks, today: date, energy: dict = None):
+    """Yields (day, task, hours) for every active task: hours spread from today
+    until the deadline (at most SPREAD_DAYS days); overdue tasks land on today.
+    With `energy` ({day: expected energy}, mooncyc/energy.py) moderate and
+    demanding tasks get more hours on high-energy days; otherwise evenly."""
+    for task in tasks:
+        if task.get("completed"):
+            continue
+        days_until = (task["deadline"] - today).days
+        if days_until <= 0:
+            yield today, task, task["hours"]
+            continue
+        days   = [today + timedelta(days=i) for i in range(min(days_until, SPREAD_DAYS))]
+        weight = INTENSITY_WEIGHT.get(task.get("intensity"), 1.0) if energy else 0.0
+        shares = [energy.get(day, 3.0) ** weight for day in days] if weight else [1.0] * len(days)
+        total  = sum(shares)
+        for day, share in zip(days, shares):
+            yield day, task, round(task["hours"] * share / total, 1)
+
+
+def daily_load(tasks, today: date, days: int = SPREAD_DAYS, energy: dict = None) -> dict:
+    """{day: [{"task", "hours"}]} for the next `days` days."""
+    load = {today + timedelta(days=i): [] for i in range(days)}
+    for day, task, hours in iter_task_blocks(tasks, today, energy):
+        if day in load:
+            load[day].append({"task": task["task"], "hours": hours})
+    return load
@@ -0,0 +1,141 @@
+# ─────────────────────────────────────────────────
+# PERSONAL ENERGY MODEL
+# ─────────────────────────────────────────────────
+# Expected energy (1-5) by day of cycle, learned from the energy level of
+# every symptom log entry instead of the fixed per-phase levels in
+# content.json:
+#
+#   prior    the phase level from content.json, moved by how much this user's
+#            logged energy sits above or below those levels overall
+#            (shrunk by SHIFT_PRIOR days, so a few entries barely move it)
+#   day      logged energy on that day of cycle, smoothed over neighbouring
+#            days — circularly, day 1 borders the last day — and shrunk
+#            towards the prior (PRIOR_DAYS pseudo-entries)
+#
+# Day of cycle comes from the recorded period starts (mooncyc/analytics.py);
+# days past cycle_length in a long cycle count as its last day. A new entry
+# is an O(1) update, and predict() maps any list of dates in one pass. The
+# 2-week schedule, the energy bar and the fasting advisor read it. Models
+# are kept per user in memory and caught up with new entries on use.
+
+import threading
+from collections import OrderedDict
+from datetime import date, timedelta
+
+import numpy as np
+
+from mooncyc import analytics, content, cycle, forecast
+
+PRIOR_DAYS  = 4.0    # pseudo-entries pulling a day towards the prior
+SHIFT_PRIOR = 10.0   # pseudo-entries pulling the personal shift towards 0
+KERNEL      = np.exp(-0.5 * (np.arange(-3, 4) / 1.5) ** 2)   # ±3 days
+NEUTRAL     = 3.0    # without a last period there is no day of cycle
+MODEL_CACHE = 256
+
+
+class EnergyModel:
+    def __init__(self, cycle_data):
+        self.fingerprint  = forecast.fingerprint(cycle_data)
+        self.cycle_length = cycle_data.get("cycle_length", 28)
+        log               = cycle_data.get("symptoms_log", [])
+        starts            = analytics.cycle_starts(cycle_data, min((e["date"] for e in log), default=None))
+        self.starts       = np.array([d.toordinal() for d in starts], dtype=np.int64)
+        bounds            = cycle.phase_bounds(self.cycle_length, cycle_data.get("period_length", 5))
+        self.phase_level  = np.array([content.phase_energy_level(phase) for phase, lo, hi in bounds
+                                      for _ in range(lo, hi)], dtype=np.float64)
+
+        self.sums      = np.zeros(self.cycle_length)
+        self.counts    = np.zeros(self.cycle_length)
+        self.prior_sum = 0.0   # Σ phase level over the days with an energy level
+        self.n_entries = 0
+        self.last_date = None
+        self._levels   = None   # levels() until the next update
+        for entry in log:
+            self.update(entry)
+
+    def offsets(self, dates) -> np.ndarray:
+        """0-based day of cycle of each date (-1 without any period start)."""
+        ordinals = np.fromiter((d.toordinal() for d in dates), dtype=np.int64)
+        if not len(self.starts):
+            return np.full(len(ordinals), -1, dtype=np.int64)
+        latest = np.searchsorted(self.starts, ordinals, side="right") - 1
+        offset = ordinals - self.starts[np.maximum(latest, 0)]
+        # before the first start or after the latest one: assume regular cycles
+        regular = (latest < 0) | (latest == len(self.starts) - 1)
+        offset[regular] %= self.cycle_length
+        return np.minimum(offset, self.cycle_length - 1)
+
+    def update(self, entry):
+        """Adds one log entry."""
+        self.n_entries += 1
+        self.last_date  = entry["date"]
+        if not entry.get("energy"):
+            return
+        offset = int(self.offsets([entry["date"]])[0])
+        if offset < 0:
+            return
+        self._levels         = None
+        self.sums[offset]   += entry["energy"]
+        self.counts[offset] += 1
+        self.prior_sum      += self.phase_level[offset]
+
+    @property
+    def logged_days(self) -> int:
+        return int(self.counts.sum())
+
+    def levels(self) -> np.ndarray:
+        """Expected energy for each day of cycle."""
+        if self._levels is not None:
+            return self._levels
+        shift = (self.sums.sum() - self.prior_sum) / (self.counts.sum() + SHIFT_PRIOR)
+        prior = np.clip(self.phase_level + shift, 1.0, 5.0)
+        pad   = len(KERNEL) // 2
+        sums  = sum(w * np.roll(self.sums, pad - i) for i, w in enumerate(KERNEL))
+        seen  = sum(w * np.roll(self.counts, pad - i) for i, w in enumerate(KERNEL))
+        self._levels = (sums + PRIOR_DAYS * prior) / (seen + PRIOR_DAYS)
+        return self._levels
+
+    def predict(self, dates) -> np.ndarray:
+        """Expected energy on each of `dates`."""
+        offsets = self.offsets(dates)
+        return np.where(offsets >= 0, self.levels()[offsets], NEUTRAL)
+
+    def by_day(self, first: date, days: int) -> dict:
+        """{day: expected energy} for `days` days from `first`."""
+        dates = [first + timedelta(days=i) for i in range(days)]
+        return dict(zip(dates, self.predict(dates).tolist()))
+
+    def summary(self, today: date = None, days: int = 7) -> str:
+        """Compact text for LLM prompts: today against the usual, and the days ahead."""
+        today  = today or date.today()
+        ahead  = self.by_day(today, days)
+        usual  = float(self.levels().mean())
+        source = f"from {self.logged_days} logged days" if self.logged_days else "typical levels, nothing logged yet"
+        week   = ", ".join(f"{d:%a} {v:.1f}" for d, v in ahead.items())
+        return (f"Expected energy today: {ahead[today]:.1f}/5 (usual {usual:.1f}/5, {source})\n"
+                f"Next {days} days: {week}")
+
+
+# ─────────────────────────────────────────────────
+# PER-USER MODELS
+# ─────────────────────────────────────────────────
+_models = OrderedDict()   # user_id -> EnergyModel
+_lock   = threading.Lock()
+
+
+def model_for(user_id: str, cycle_data) -> EnergyModel:
+    """The user's model, caught up with entries appended since it was last used.
+    Refit from scratch when the cycle settings changed or the log was rewritten."""
+    log = cycle_data.get("symptoms_log", [])
+    with _lock:
+        model = _models.pop(user_id, None)
+        if (model is None or model.fingerprint != forecast.fingerprint(cycle_data) or len(log) < model.n_entries
+                or (model.n_entries and log[model.n_entries - 1]["date"] != model.last_date)):
+            model = EnergyModel(cycle_data)
+        else:
+            for entry in log[model.n_entries:]:
+                model.update(entry)
+        _models[user_id] = model
+        while len(_models) > MODEL_CACHE:
+            _models.popitem(last=False)
+        return model
@@ -0,0 +1,142 @@
+# ─────────────────────────────────────────────────
+# CACHED PLOTLY FIGURES
+# ─────────────────────────────────────────────────
+# The 2-week schedule bar chart and the symptom-pattern line chart used to be
+# rebuilt on every Streamlit rerun, even when only the quote changed.
+# `FigureCache` keys each figure by the content of its inputs and hands back the
+# already-built figure when nothing changed. One cache lives in each session's
+# st.session_state, so its size is bounded per session. The multi-cycle
+# heatmap and the symptom matrix go through the same cache.
+
+import hashlib
+import json
+import time
+from collections import OrderedDict
+
+import plotly.graph_objects as go
+
+FIGURE_CACHE_SIZE = 8
+
+PAPER_BG  = "#F3E4F5"
+PLOT_BG   = "#e8d0ec"
+FONT      = "#2d1f33"
+ACCENT    = "#6b5b7a"
+LINE_COLORS = ["#d8bfd8", "#b39eb5", "#c8b8c8"]
+
+
+def content_key(kind: str, *inputs) -> str:
+    """Stable hash of a figure's inputs (dates and other objects are stringified)."""
+    payload = json.dumps([kind, inputs], sort_keys=True, default=str)
+    return hashlib.sha1(payload.encode("utf-8")).hexdigest()
+
+
+class FigureCache:
+    """Small LRU of built figures, counting hits and the build time they skipped."""
+
+    def __init__(self, max_size: int = FIGURE_CACHE_SIZE):
+        self.max_size = max_size
+        self.entries  = OrderedDict()   # key -> (figure, build_ms)
+        self.hits     = 0
+        self.misses   = 0
+        self.saved_ms = 0.0
+
+    def get_or_build(self, key: str, build):
+        if key in self.entries:
+            self.entries.move_to_end(key)
+            fig, build_ms = self.entries[key]
+            self.hits     += 1
+            self.saved_ms += build_ms
+            return fig
+
+        started  = time.perf_counter()
+        fig      = build()
+        build_ms = (time.perf_counter() - started) * 1000
+
+        self.misses += 1
+        self.entries[key] = (fig, build_ms)
+        if len(self.entries) > self.max_size:
+            self.entries.popitem(last=False)
+        return fig
+
+    def stats(self) -> dict:
+        return {"hits": self.hits, "misses": self.misses, "saved_ms": round(self.saved_ms, 1)}
+
+
+# ─────────────────────────────────────────────────
+# FIGURE BUILDERS
+# ─────────────────────────────────────────────────
+def build_schedule_figure(day_labels: list, total_hours: list) -> go.Figure:
+    fig = go.Figure()
+    fig.add_trace(go.Bar(x=day_labels, y=total_hours,
+        marker_color="#d8bfd8",
+        text=[f"{h:.1f}h" if h > 0 else "" for h in total_hours],
+        textposition="outside"))
+    fig.add_hline(y=6, line_dash="dash", line_color=ACCENT,
+                  annotation_text="6h healthy limit", annotation_position="right")
+    fig.update_layout(paper_bgcolor=PAPER_BG, plot_bgcolor=PLOT_BG,
+        font=dict(color=FONT),
+        yaxis=dict(title="Hours", range=[0, max(max(total_hours, default=0) + 2, 8)]),
+        xaxis=dict(title=""), height=400, margin=dict(t=30, b=40))
+    return fig
+
+
+def build_pattern_figure(cycle_days: list, chart_data: dict, cycle_length: int) -> go.Figure:
+    fig = go.Figure()
+    for idx, (symptom, counts) in enumerate(chart_data.items()):
+        fig.add_trace(go.Scatter(x=cycle_days, y=counts,
+            mode='lines+markers', name=symptom,
+            line=dict(color=LINE_COLORS[idx % len(LINE_COLORS)], width=3), marker=dict(size=6)))
+    fig.update_layout(paper_bgcolor=PAPER_BG, plot_bgcolor=PLOT_BG,
+        font=dict(color=FONT),
+        xaxis=dict(title="Day of Cycle", range=[1, cycle_length]),
+        yaxis=dict(title="Times Reported"),
+        legend=dict(bgcolor=PLOT_BG, bordercolor="#b39eb5", borderwidth=1),
+        height=400, margin=dict(t=30, b=40))
+    return fig
+
+
+def build_heatmap_figure(values: list, cycle_labels: list, symptom: str, aligned: bool) -> go.Figure:
+    days = list(range(1, len(values[0]) + 1)) if values else []
+    fig = go.Figure(go.Heatmap(z=values, x=days, y=cycle_labels, zmin=0, zmax=1, showscale=False,
+        colorscale=[[0, PLOT_BG], [1, ACCENT]], hoverongaps=False,
+        hovertemplate="Cycle of %{y}<br>Day %{x}: %{z:.0f}<extra></extra>"))
+    fig.update_layout(paper_bgcolor=PAPER_BG, plot_bgcolor=PAPER_BG,
+        font=dict(color=FONT),
+        xaxis=dict(title="Day of cycle (ovulation aligned)" if aligned else "Day of cycle"),
+        yaxis=dict(title="", autorange="reversed", type="category"),
+        title=dict(text=symptom, x=0.01),
+        height=max(300, min(900, 14 * len(cycle_labels) + 120)), margin=dict(t=40, b=40))
+    return fig
+
+
+def build_matrix_figure(values: list, labels: list, metric: str) -> go.Figure:
+    centred = metric == "Correlation"
+    fig = go.Figure(go.Heatmap(z=values, x=labels, y=labels,
+        zmid=0 if centred else None, zmin=-1 if centred else 0, zmax=1 if centred else None,
+        colorscale=[[0, "#8fb3a8"], [0.5, PLOT_BG], [1, ACCENT]] if centred else [[0, PLOT_BG], [1, ACCENT]],
+        hovertemplate="%{y} + %{x}<br>" + metric + ": %{z:.2f}<extra></extra>"))
+    fig.update_layout(paper_bgcolor=PAPER_BG, plot_bgcolor=PAPER_BG,
+        font=dict(color=FONT),
+        xaxis=dict(tickangle=-45), yaxis=dict(autorange="reversed"),
+        height=max(350, 28 * len(labels) + 150), margin=dict(t=30, b=40))
+    return fig
+
+
+def schedule_figure(cache: FigureCache, day_labels: list, total_hours: list) -> go.Figure:
+    key = content_key("schedule", day_labels, total_hours)
+    return cache.get_or_build(key, lambda: build_schedule_figure(day_labels, total_hours))
+
+
+def pattern_figure(cache: FigureCache, cycle_days: list, chart_data: dict, cycle_length: int) -> go.Figure:
+    key = content_key("pattern", cycle_days, list(chart_data.items()), cycle_length)
+    return cache.get_or_build(key, lambda: build_pattern_figure(cycle_days, chart_data, cycle_length))
+
+
+def heatmap_figure(cache: FigureCache, values: list, cycle_labels: list, symptom: str, aligned: bool) -> go.Figure:
+    key = content_key("heatmap", values, cycle_labels, symptom, aligned)
+    return cache.get_or_build(key, lambda: build_heatmap_figure(values, cycle_labels, symptom, aligned))
+
+
+def matrix_figure(cache: FigureCache, values: list, labels: list, metric: str) -> go.Figure:
+    key = content_key("matrix", values, labels, metric)
+    return cache.get_or_build(key, lambda: build_matrix_figure(values, labels, metric))
@@ -0,0 +1,188 @@
+# ─────────────────────────────────────────────────
+# SYMPTOM FORECASTER
+# ─────────────────────────────────────────────────
+# "What am I likely to feel on day 22?" — a local, per-user estimate of
+# P(symptom | day of cycle, phase, yesterday), from smoothed counts:
+#
+#   overall   rate of each symptom over all logged days
+#   phase     phase rate, shrunk towards the overall rate (PHASE_PRIOR days)
+#   day       day-of-cycle rate over a ±2 day window, shrunk towards the
+#             phase rate (DAY_PRIOR days)
+#   yesterday symptoms tend to persist: if a symptom was reported the day
+#             before, the day rate is moved by its persistence log-odds ratio,
+#             fading with the distance from the last logged day
+#
+# Day of cycle comes from the recorded period starts (mooncyc/analytics.py).
+# All counts are NumPy arrays; a new log entry is one O(symptoms) update, and
+# forecasting a whole cycle for every symptom is a handful of array ops.
+# Models are kept per user in memory and caught up with new entries on use.
+
+import threading
+from bisect import bisect_right
+from collections import OrderedDict
+from datetime import date, timedelta
+
+import numpy as np
+
+from mooncyc import analytics, content, cycle
+
+MAX_DAY      = analytics.MAX_CYCLE_DAYS
+PHASE_PRIOR  = 10.0   # pseudo-days pulling a phase rate towards the overall rate
+DAY_PRIOR    = 6.0    # pseudo-days pulling a day rate towards its phase rate
+WINDOW       = np.array([1.0, 2.0, 3.0, 2.0, 1.0])   # day-of-cycle smoothing
+PERSIST_FADE = 0.5    # the yesterday effect halves with every further day
+MODEL_CACHE  = 256
+
+
+def _logit(p):
+    p = np.clip(p, 1e-4, 1 - 1e-4)
+    return np.log(p / (1 - p))
+
+
+class SymptomForecaster:
+    def __init__(self, cycle_data):
+        self.symptoms    = [s for s in content.symptom_options() if s != "None"]
+        self.index       = {s: i for i, s in enumerate(self.symptoms)}
+        self.fingerprint = fingerprint(cycle_data)
+        log              = cycle_data.get("symptoms_log", [])
+        self.starts      = analytics.cycle_starts(cycle_data, min((e["date"] for e in log), default=None))
+        self.bounds      = cycle.phase_bounds(cycle_data.get("cycle_length", 28), cycle_data.get("period_length", 5))
+        self.cycle_length = cycle_data.get("cycle_length", 28)
+
+        n = len(self.symptoms)
+        self.day_hits     = np.zeros((MAX_DAY, n))
+        self.day_seen     = np.zeros(MAX_DAY)
+        self.persist_hits = np.zeros(n)   # reported yesterday and today
+        self.persist_seen = np.zeros(n)   # reported yesterday, today logged
+        self.by_date      = {}            # date -> symptom indices reported (for the yesterday link)
+        self.n_entries    = 0
+        self.last_date    = None
+        for entry in log:
+            self.update(entry)
+
+    # ── training ──────────────────────────────────────────────
+    def day_of_cycle(self, day: date):
+        i = bisect_right(self.starts, day) - 1
+        if i < 0:
+            return None
+        offset = (day - self.starts[i]).days
+        if i == len(self.starts) - 1 and offset >= self.cycle_length:
+            offset %= self.cycle_length   # no newer start recorded yet: assume regular cycles
+        return offset if offset < MAX_DAY else None
+
+    def update(self, entry):
+        """Adds one log entry to the counts."""
+        self.n_entries += 1
+        self.last_date  = entry["date"]
+        offset = self.day_of_cycle(entry["date"])
+        if offset is None:
+            return
+        today = np.array([self.index[s] for s in entry.get("symptoms", ()) if s in self.index], dtype=np.int64)
+        self.day_seen[offset] += 1
+        np.add.at(self.day_hits[offset], today, 1)
+        self.by_date[entry["date"]] = today
+        # persistence, both ways round so out-of-order logging still counts
+        for before, after in ((self.by_date.get(entry["date"] - timedelta(days=1)), today),
+                              (today, self.by_date.get(entry["date"] + timedelta(days=1)))):
+            if before is None or after is None:
+                continue
+            self.persist_seen[before] += 1
+            self.persist_hits[np.intersect1d(before, after)] += 1
+
+    # ── probabilities ─────────────────────────────────────────
+    def phase_of_day(self) -> np.ndarray:
+        """Phase index (into self.bounds) of each day of cycle."""
+        edges = np.array([lo for _, lo, _ in self.bounds])
+        return np.searchsorted(edges, np.arange(MAX_DAY), side="right") - 1
+
+    def day_probabilities(self) -> np.ndarray:
+        """[day of cycle, symptom] smoothed P(symptom)."""
+        overall = (self.day_hits.sum(axis=0) + 0.5) / (self.day_seen.sum() + 1.0)
+        phases  = self.phase_of_day()
+        phase_p = np.empty((len(self.bounds), len(self.symptoms)))
+        for k in range(len(self.bounds)):
+            rows       = phases == k
+            phase_p[k] = (self.day_hits[rows].sum(axis=0) + PHASE_PRIOR * overall) / \
+                         (self.day_seen[rows].sum() + PHASE_PRIOR)
+        pad   = len(WINDOW) // 2
+        hits  = np.pad(self.day_hits, ((pad, pad), (0, 0)))
+        seen  = np.pad(self.day_seen, (pad, pad))
+        hits  = sum(w * hits[i:i + MAX_DAY] for i, w in enumerate(WINDOW))
+        seen  = sum(w * seen[i:i + MAX_DAY] for i, w in enumerate(WINDOW))
+        return (hits + DAY_PRIOR * phase_p[phases]) / (seen[:, None] + DAY_PRIOR)
+
+    def persistence(self) -> np.ndarray:
+        """Log-odds shift for a symptom reported the day before."""
+        overall = (self.day_hits.sum(axis=0) + 0.5) / (self.day_seen.sum() + 1.0)
+        carried = (self.persist_hits + 2.0 * overall) / (self.persist_seen + 2.0)
+        return _logit(carried) - _logit(overall)
+
+    def forecast(self, first: date, days: int, recent: date = None) -> np.ndarray:
+        """[day, symptom] probabilities for `days` days from `first`. `recent` is the last
+        logged day whose symptoms carry over (defaults to the latest entry)."""
+        dates   = [first + timedelta(days=i) for i in range(days)]
+        offsets = np.array([self.day_of_cycle(d) or 0 for d in dates])
+        logits  = _logit(self.day_probabilities()[offsets])
+        recent  = recent or self.last_date
+        carried = self.by_date.get(recent)
+        if carried is not None and len(carried):
+            distance = np.array([(d - recent).days for d in dates], dtype=np.float64)
+            fade     = np.where(distance >= 1, PERSIST_FADE ** (distance - 1), 0.0)
+            logits[:, carried] += fade[:, None] * self.persistence()[carried][None, :]
+        return 1 / (1 + np.exp(-logits))
+
+    def next_cycle(self, today: date = None) -> tuple:
+        """(first day, [day, symptom] probabilities) for the next expected cycle."""
+        today = today or date.today()
+        first = self.starts[-1] if self.starts else today
+        while first <= today:
+            first += timedelta(days=self.cycle_length)
+        return first, self.forecast(first, self.cycle_length)
+
+
+def fingerprint(cycle_data) -> tuple:
+    """What the day-of-cycle mapping depends on; a change means retraining."""
+    return (cycle_data.get("last_period"), tuple(cycle_data.get("period_starts") or ()),
+            cycle_data.get("cycle_length"), cycle_data.get("period_length"))
+
+
+# ─────────────────────────────────────────────────
+# PER-USER MODELS
+# ─────────────────────────────────────────────────
+_models = OrderedDict()   # user_id -> SymptomForecaster
+_lock   = threading.Lock()
+
+
+def model_for(user_id: str, cycle_data) -> SymptomForecaster:
+    """The user's model, caught up with entries appended since it was last used.
+    Retrained from scratch when the cycle settings changed or the log was rewritten."""
+    log = cycle_data.get("symptoms_log", [])
+    with _lock:
+        model = _models.pop(user_id, None)
+        if (model is None or model.fingerprint != fingerprint(cycle_data) or len(log) < model.n_entries
+                or (model.n_entries and log[model.n_entries - 1]["date"] != model.last_date)):
+            model = SymptomForecaster(cycle_data)
+        else:
+            for entry in log[model.n_entries:]:
+                model.update(entry)
+        _models[user_id] = model
+        while len(_models) > MODEL_CACHE:
+            _models.popitem(last=False)
+        return model
+
+
+def summary(model: SymptomForecaster, first: date, probabilities: np.ndarray, top: int = 3,
+            threshold: float = 0.3) -> str:
+    """Compact per-phase text of the likeliest symptoms, for LLM prompts."""
+    lines, phases = [], model.phase_of_day()[:len(probabilities)]
+    for k, (phase, lo, hi) in enumerate(model.bounds):
+        rows = probabilities[phases == k]
+        if not len(rows):
+            continue
+        peak  = rows.max(axis=0)
+        best  = [i for i in np.argsort(-peak)[:top] if peak[i] >= threshold]
+        where = [f"{model.symptoms[i]} {peak[i]:.0%} (peaks day {lo + int(rows[:, i].argmax()) + 1})" for i in best]
+        start = first + timedelta(days=lo)
+        lines.append(f"- {phase} (days {lo + 1}-{min(hi, len(probabilities))}, from {start:%b %d}): "
+                     f"{', '.join(where) if where else 'nothing above ' + format(threshold, '.0%')}")
+    return "\n".join(lines)
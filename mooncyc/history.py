@@ -0,0 +1,109 @@
+# ─────────────────────────────────────────────────
+# GENERATION HISTORY
+# ─────────────────────────────────────────────────
+# Every successful AI generation (meditation, meal plan, remedies, fasting
+# advice, insights) is written to the user's database (see mooncyc/userdb.py)
+# with the day, phase, cycle it belongs to and the inputs it was made from.
+# The dashboard rehydrates from it on session start instead of regenerating,
+# and the history view pages through it ("last cycle's luteal meal plan").
+#
+#   generations(id, kind, day, phase, cycle_start, inputs_key, inputs, output)
+#
+# Outputs are stored as JSON so dicts (meal plans, fasting advice) come back
+# as dicts. Pages are keyset-paginated on id, newest first.
+
+import json
+from contextlib import closing
+
+from mooncyc import userdb
+from mooncyc.singleflight import canonical_key
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS generations (
+    id          INTEGER PRIMARY KEY,
+    kind        TEXT NOT NULL,
+    day         TEXT NOT NULL,
+    phase       TEXT,
+    cycle_start TEXT,
+    inputs_key  TEXT,
+    inputs      TEXT,
+    output      TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS generations_kind_cycle ON generations (kind, cycle_start, phase, id);
+CREATE INDEX IF NOT EXISTS generations_kind_id    ON generations (kind, id);
+CREATE INDEX IF NOT EXISTS generations_inputs     ON generations (inputs_key, id);"""
+
+_COLUMNS = "id, kind, day, phase, cycle_start, inputs, output"
+
+
+def connect(folder: str):
+    return userdb.connect(folder, _SCHEMA)
+
+
+def _row(row) -> dict:
+    id_, kind, day, phase, cycle_start, inputs, output = row
+    return {"id": id_, "kind": kind, "day": day, "phase": phase, "cycle_start": cycle_start,
+            "inputs": json.loads(inputs) if inputs else {}, "output": json.loads(output)}
+
+
+def _iso(d):
+    return d.isoformat() if d else None
+
+
+def record(folder: str, kind: str, output, day, phase: str = None, cycle_start=None, inputs: dict = None) -> int:
+    """Stores one generation and returns its id."""
+    inputs = inputs or {}
+    with closing(connect(folder)) as conn, conn:
+        cur = conn.execute(
+            "INSERT INTO generations (kind, day, phase, cycle_start, inputs_key, inputs, output) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?)",
+            (kind, _iso(day), phase, _iso(cycle_start), canonical_key(kind, inputs, ("symptoms",)),
+             json.dumps(inputs, default=str), json.dumps(output, default=str)))
+        return cur.lastrowid
+
+
+def page(folder: str, kind: str = None, phase: str = None, cycle_start=None,
+         before_id: int = None, limit: int = 10) -> list:
+    """Newest first. Pass the last row's id as `before_id` to get the next page."""
+    if not userdb.exists(folder):
+        return []
+    where, params = [], []
+    for column, value in (("kind", kind), ("phase", phase), ("cycle_start", _iso(cycle_start))):
+        if value is not None:
+            where.append(f"{column} = ?")
+            params.append(value)
+    if before_id is not None:
+        where.append("id < ?")
+        params.append(before_id)
+    sql = f"SELECT {_COLUMNS} FROM generations"
+    if where:
+        sql += " WHERE " + " AND ".join(where)
+    sql += " ORDER BY id DESC LIMIT ?"
+    params.append(limit)
+    with closing(connect(folder)) as conn:
+        return [_row(r) for r in conn.execute(sql, params)]
+
+
+def latest(folder: str, kind: str, phase: str = None, cycle_start=None):
+    rows = page(folder, kind, phase, cycle_start, limit=1)
+    return rows[0] if rows else None
+
+
+def latest_by_kind(folder: str, kinds, phase: str = None, cycle_start=None) -> dict:
+    """{kind: newest row} for every kind that has one — what a new session rehydrates from."""
+    found = {}
+    for kind in kinds:
+        row = latest(folder, kind, phase, cycle_start)
+        if row:
+            found[kind] = row
+    return found
+
+
+def cycle_starts(folder: str, limit: int = 24) -> list:
+    """Cycles that have generations, newest first (ISO dates)."""
+    if not userdb.exists(folder):
+        return []
+    with closing(connect(folder)) as conn:
+        return [r[0] for r in conn.execute(
+            "SELECT DISTINCT cycle_start FROM generations WHERE cycle_start IS NOT NULL "
+            "ORDER BY cycle_start DESC LIMIT ?", (limit,))]
@@ -0,0 +1,217 @@
+# ─────────────────────────────────────────────────
+# ICALENDAR EXPORT
+# ─────────────────────────────────────────────────
+# Phases and the task schedule as an .ics file for Google Calendar, Apple
+# Calendar, Outlook...:
+#
+#   - one all-day event per phase span (mooncyc/cycle.py rules), projected
+#     over any horizon from the last period
+#   - one timed block per task and day from the 2-week schedule, stacked from
+#     9:00 in floating (local) time
+#
+# The file is produced line by line from generators, so a 20-year export
+# needs no more memory than a 2-week one.
+#
+# UIDs are stable (phase start date / task + day), so re-importing updates
+# events instead of duplicating them. Each export records uid → content hash
+# in the user's mooncyc.db; an incremental export then contains only new or
+# changed events (with a bumped SEQUENCE), plus STATUS:CANCELLED for events
+# in the range that no longer exist (a completed task, a changed cycle length).
+
+import hashlib
+from contextlib import closing
+from datetime import date, datetime, time, timedelta, timezone
+
+from mooncyc import content, cycle, userdb
+
+PRODID    = "-//Mooncyc//Cycle calendar//EN"
+DAY_START = time(9, 0)   # task blocks on a day start here, one after another
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS calendar_events (
+    uid      TEXT PRIMARY KEY,
+    hash     TEXT NOT NULL,
+    day      TEXT NOT NULL,
+    sequence INTEGER NOT NULL
+);"""
+
+
+def _escape(text: str) -> str:
+    return (str(text).replace("\\", "\\\\").replace(";", "\\;").replace(",", "\\,")
+            .replace("\r\n", "\\n").replace("\n", "\\n"))
+
+
+def fold(line: str) -> str:
+    """RFC 5545 line: at most 75 octets per physical line, CRLF-terminated,
+    continuation lines start with a space. Never splits a UTF-8 sequence."""
+    encoded = line.encode("utf-8")
+    if len(encoded) <= 75:
+        return line + "\r\n"
+    parts, start, limit = [], 0, 75
+    while start < len(encoded):
+        end = min(start + limit, len(encoded))
+        while end < len(encoded) and (encoded[end] & 0xC0) == 0x80:
+            end -= 1   # don't cut inside a multi-byte character
+        parts.append(encoded[start:end].decode("utf-8"))
+        start, limit = end, 74   # the leading space counts
+    return "\r\n ".join(parts) + "\r\n"
+
+
+def _ical_date(day: date) -> str:
+    return day.strftime("%Y%m%d")
+
+
+def _ical_datetime(moment: datetime) -> str:
+    return moment.strftime("%Y%m%dT%H%M%S")
+
+
+def _owner(user_id: str) -> str:
+    # user ids are bookmarkable secrets, so UIDs only carry a digest
+    return hashlib.sha1(user_id.encode("utf-8")).hexdigest()[:12]
+
+
+def task_key(task) -> str:
+    return hashlib.sha1(f"{task['task']}\0{task['deadline']}".encode("utf-8")).hexdigest()[:12]
+
+
+# ─────────────────────────────────────────────────
+# EVENTS
+# ─────────────────────────────────────────────────
+def iter_phase_events(cycle_data, owner: str, start: date, end: date):
+    """Yields (uid, day, properties) for every phase span overlapping [start, end)."""
+    for phase, span_start, span_end, first in cycle.iter_phase_spans(cycle_data, start, end):
+        info = content.phase_description(phase)
+        day  = (span_start - first).days + 1
+        yield (f"phase-{_ical_date(span_start)}-{owner}@mooncyc", span_start, [
+            ("DTSTART;VALUE=DATE", _ical_date(span_start)),
+            ("DTEND;VALUE=DATE", _ical_date(span_end)),
+            ("SUMMARY", _escape(f"{info['emoji']} {phase} phase")),
+            ("DESCRIPTION", _escape(f"Cycle day {day}–{day + (span_end - span_start).days - 1}. "
+                                    f"{info['summary']}. {info['tip']}")),
+            ("CATEGORIES", "Mooncyc,Cycle"),
+            ("TRANSP", "TRANSPARENT"),
+        ])
+
+
+def iter_task_events(tasks, owner: str, today: date, energy: dict = None):
+    """Yields (uid, day, properties) for every per-day task block of the schedule."""
+    booked = {}   # day -> end of the last block placed on it
+    for day, task, hours in cycle.iter_task_blocks(tasks, today, energy):
+        block_start = booked.get(day) or datetime.combine(day, DAY_START)
+        block_end   = block_start + timedelta(hours=hours)
+        booked[day] = block_end
+        yield (f"task-{task_key(task)}-{_ical_date(day)}-{owner}@mooncyc", day, [
+            ("DTSTART", _ical_datetime(block_start)),
+            ("DTEND", _ical_datetime(block_end)),
+            ("SUMMARY", _escape(f"⚔️ {task['task']} ({hours}h)")),
+            ("DESCRIPTION", _escape(f"{task.get('category', 'Task')} · {task.get('intensity', '')} · "
+                                    f"due {task['deadline'].isoformat()}")),
+            ("CATEGORIES", "Mooncyc,Tasks"),
+        ])
+
+
+def iter_events(cycle_data, tasks, user_id: str, start: date, end: date, today: date = None,
+                energy: dict = None):
+    owner = _owner(user_id)
+    yield from iter_phase_events(cycle_data, owner, start, end)
+    yield from ((uid, day, props) for uid, day, props in iter_task_events(tasks, owner, today or date.today(), energy)
+                if start <= day < end)
+
+
+def content_hash(properties) -> str:
+    return hashlib.sha1("\n".join(f"{k}:{v}" for k, v in properties).encode("utf-8")).hexdigest()
+
+
+# ─────────────────────────────────────────────────
+# STREAMING
+# ─────────────────────────────────────────────────
+def iter_ics(events, previous: dict = None, seen: dict = None, changed_only: bool = False,
+             cancel_in: tuple = None, stamp: datetime = None):
+    """Yields the calendar as folded text lines.
+
+    previous      uid -> (hash, day, sequence) from the last export; changed events
+                  get the next SEQUENCE so calendar apps accept the update
+    seen          filled with uid -> (hash, day, sequence) of everything emitted or kept
+    changed_only  skip events whose content didn't change (incremental export)
+    cancel_in     (start, end): events of `previous` dated in this range that are
+                  gone now are emitted as STATUS:CANCELLED
+    """
+    stamp    = _ical_datetime(stamp or datetime.now(timezone.utc)) + "Z"
+    previous = previous or {}
+    seen     = {} if seen is None else seen
+    yield fold("BEGIN:VCALENDAR")
+    yield fold("VERSION:2.0")
+    yield fold(f"PRODID:{PRODID}")
+    yield fold("CALSCALE:GREGORIAN")
+    yield fold("X-WR-CALNAME:Mooncyc")
+    for uid, day, properties in events:
+        digest = content_hash(properties)
+        before = previous.get(uid)
+        if before is not None and before[0] == digest:
+            seen[uid] = before
+            if changed_only:
+                continue
+        else:
+            seen[uid] = (digest, day.isoformat(), before[2] + 1 if before is not None else 0)
+        yield fold("BEGIN:VEVENT")
+        yield fold(f"UID:{uid}")
+        yield fold(f"DTSTAMP:{stamp}")
+        yield fold(f"SEQUENCE:{seen[uid][2]}")
+        for name, value in properties:
+            yield fold(f"{name}:{value}")
+        yield fold("END:VEVENT")
+    if cancel_in is not None:
+        lo, hi = (d.isoformat() for d in cancel_in)
+        for uid, (digest, day, sequence) in previous.items():
+            if uid in seen or not digest or not lo <= day < hi:
+                continue   # still there, already cancelled, or out of range
+            seen[uid] = ("", day, sequence + 1)
+            yield fold("BEGIN:VEVENT")
+            yield fold(f"UID:{uid}")
+            yield fold(f"DTSTAMP:{stamp}")
+            yield fold(f"SEQUENCE:{sequence + 1}")
+            yield fold(f"DTSTART;VALUE=DATE:{_ical_date(date.fromisoformat(day))}")
+            yield fold("STATUS:CANCELLED")
+            yield fold("END:VEVENT")
+    yield fold("END:VCALENDAR")
+
+
+# ─────────────────────────────────────────────────
+# MANIFEST (what the last export contained)
+# ─────────────────────────────────────────────────
+def load_manifest(folder: str, start: date = None, end: date = None) -> dict:
+    """uid -> (hash, day, sequence); a cancelled event has an empty hash."""
+    if not userdb.exists(folder):
+        return {}
+    query, args = "SELECT uid, hash, day, sequence FROM calendar_events", ()
+    if start is not None and end is not None:
+        query, args = query + " WHERE day >= ? AND day < ?", (start.isoformat(), end.isoformat())
+    with closing(userdb.connect(folder, _SCHEMA)) as conn:
+        return {uid: (digest, day, sequence) for uid, digest, day, sequence in conn.execute(query, args)}
+
+
+def save_manifest(folder: str, seen: dict):
+    with closing(userdb.connect(folder, _SCHEMA)) as conn, conn:
+        conn.executemany("INSERT OR REPLACE INTO calendar_events (uid, hash, day, sequence) VALUES (?, ?, ?, ?)",
+                         ((uid, digest, day, sequence) for uid, (digest, day, sequence) in seen.items()))
+
+
+def export(folder: str, out, cycle_data, tasks, user_id: str, start: date, end: date,
+           incremental: bool = False, today: date = None, energy: dict = None) -> dict:
+    """Streams the calendar for [start, end) into the binary file `out` and
+    records what was exported. Returns {"events", "changed", "written", "bytes"}.
+    Past task blocks are never cancelled, only ones from today on. `energy`
+    places task hours as on the 2-week schedule (cycle.iter_task_blocks)."""
+    today    = today or date.today()
+    # the first phase span may start before `start`
+    previous = load_manifest(folder, cycle.cycle_start(cycle_data, start) or start, end)
+    seen     = {}
+    lines    = iter_ics(iter_events(cycle_data, tasks, user_id, start, end, today, energy), previous, seen,
+                        changed_only=incremental, cancel_in=(max(start, today), end))
+    size = 0
+    for line in lines:
+        size += out.write(line.encode("utf-8"))
+    changed = {uid: entry for uid, entry in seen.items() if previous.get(uid) != entry}
+    save_manifest(folder, changed)
+    return {"events": sum(1 for digest, _, _ in seen.values() if digest), "changed": len(changed),
+            "written": len(changed) if incremental else len(seen), "bytes": size}
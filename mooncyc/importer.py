@@ -0,0 +1,332 @@
+# ─────────────────────────────────────────────────
+# BULK CSV IMPORT
+# ─────────────────────────────────────────────────
+# Brings years of history from other trackers (Clue, Flo, spreadsheets...)
+# into the symptom log in one go:
+#
+#   report = importer.import_csv(user_id, "clue_export.csv", progress=job.report)
+#
+# The CSV is read in chunks of CHUNK_ROWS rows. Columns are recognised by
+# name (date, symptoms, mood, energy, notes, period/flow). The date format
+# is picked once per file from the first chunk; a file whose dates read
+# differently as day/month and month/day is refused rather than guessed. Foreign symptom
+# and mood names are mapped onto the symptom form's vocabulary
+# (content.json), unknown ones are counted in the report. Rows for the same
+# day are merged, so memory grows with the number of distinct days, not rows.
+#
+# Days already in the log keep their entry. Phases of imported days are
+# computed in one vectorised pass from the recorded period starts (flow
+# days), falling back to the cycle settings. Everything is written with a
+# single save_cycle_data() — one file replace, one batch of notes, one
+# search-index transaction.
+
+import csv
+import io
+import os
+import re
+from datetime import date, datetime
+from functools import lru_cache
+
+import numpy as np
+
+from mooncyc import content, cycle, notes, search, storage
+
+CHUNK_ROWS   = 10_000
+MAX_EXAMPLES = 20     # rejected rows quoted in the report
+MAX_NOTE     = 4000   # characters kept per imported day
+
+DATE_COLUMNS    = ("date", "day", "logged_on", "timestamp", "start_date")
+SYMPTOM_COLUMNS = ("symptoms", "symptom", "tags", "value", "feelings")
+MOOD_COLUMNS    = ("mood", "emotion")
+ENERGY_COLUMNS  = ("energy", "energy_level")
+NOTE_COLUMNS    = ("notes", "note", "comment", "comments")
+FLOW_COLUMNS    = ("period", "flow", "menstruation", "bleeding")
+
+DATE_FORMATS = ("%Y-%m-%d", "%Y/%m/%d", "%d/%m/%Y", "%m/%d/%Y", "%d.%m.%Y", "%d-%m-%Y")
+NO_FLOW      = {"", "0", "no", "false", "none", "n", "spotting"}
+
+SAMPLE_DATES = 2000   # distinct date cells looked at to pick the format
+
+_SPLIT = re.compile(r"[;,|]")
+_SPACE = re.compile(r"[\s_\-]+")
+_TIME  = re.compile(r"[\sT]")   # where a timestamp's time part starts
+
+
+class CsvImportError(ValueError):
+    """The file can't be imported at all (no header, no date column...)."""
+
+
+def _norm(name: str) -> str:
+    return _SPACE.sub(" ", name.strip().lower())
+
+
+@lru_cache(maxsize=1)
+def _symptom_lookup() -> dict:
+    lookup = {_norm(s): s for s in content.symptom_options()}
+    lookup.update({_norm(k): v for k, v in content.symptom_aliases().items()})
+    return lookup
+
+
+@lru_cache(maxsize=1)
+def _mood_lookup() -> dict:
+    lookup = {_norm(m.split(" ", 1)[-1]): m for m in content.mood_options()}
+    lookup.update({_norm(k): v for k, v in content.mood_aliases().items()})
+    return lookup
+
+
+def date_part(text: str) -> str:
+    """The date of a date or timestamp cell ("3/5/2024 10:00" -> "3/5/2024")."""
+    return _TIME.split(text.strip(), 1)[0]
+
+
+def parse_date(text: str, fmt: str):
+    """`text` as a date in `fmt` (a trailing time is ignored), or None."""
+    try:
+        return datetime.strptime(date_part(text), fmt).date()
+    except ValueError:
+        return None
+
+
+def detect_date_format(cells) -> str:
+    """The DATE_FORMATS entry that reads the most of `cells`. CsvImportError when none reads
+    any, or when two read them as different dates (03/04 as March 4 or April 3)."""
+    sample = sorted({date_part(c) for c in cells if c.strip()})[:SAMPLE_DATES]
+    parsed = {fmt: [parse_date(c, fmt) for c in sample] for fmt in DATE_FORMATS}
+    read   = {fmt: sum(d is not None for d in days) for fmt, days in parsed.items()}
+    best   = max(read.values(), default=0)
+    if not best:
+        raise CsvImportError(f"No readable dates; expected one of {', '.join(DATE_FORMATS)}")
+    candidates = [fmt for fmt in DATE_FORMATS if read[fmt] == best]
+    if len({tuple(parsed[fmt]) for fmt in candidates}) > 1:
+        raise CsvImportError(f"Dates could be {' or '.join(candidates)} — no day after the 12th tells "
+                             "day and month apart. Export with ISO dates (YYYY-MM-DD) instead.")
+    return candidates[0]
+
+
+def map_symptoms(raw: str, unknown: dict) -> list:
+    found = []
+    for part in _SPLIT.split(raw or ""):
+        name = _norm(part)
+        if not name:
+            continue
+        symptom = _symptom_lookup().get(name)
+        if symptom is None:
+            if len(unknown) < 1000 or name in unknown:
+                unknown[name] = unknown.get(name, 0) + 1
+        elif symptom not in found:
+            found.append(symptom)
+    return found
+
+
+def map_mood(raw: str):
+    raw = (raw or "").strip()
+    if not raw:
+        return None
+    if raw in content.mood_options():
+        return raw
+    if raw.isdigit():   # 1..8 scale, worst to best
+        moods = content.mood_options()
+        return moods[min(max(int(raw), 1), len(moods)) - 1]
+    return _mood_lookup().get(_norm(raw))
+
+
+def parse_energy(raw: str):
+    """1-5; a 1-10 scale is halved. None when missing or not a number."""
+    try:
+        value = float(raw)
+    except (TypeError, ValueError):
+        return None
+    if value > 5:
+        value = value / 2
+    return int(min(max(round(value), 1), 5))
+
+
+def _find(header: list, candidates: tuple):
+    normalised = [_norm(h) for h in header]
+    for name in candidates:
+        if name in normalised:
+            return normalised.index(name)
+    return None
+
+
+# ─────────────────────────────────────────────────
+# PARSING
+# ─────────────────────────────────────────────────
+class DayMerger:
+    """Merges validated rows into one pending entry per day."""
+
+    def __init__(self, date_format: str):
+        self.date_format = date_format
+        self.dates       = {}   # date cell -> date (exports repeat each day many times)
+        self.days     = {}      # date -> entry being built
+        self.flow     = set()   # dates with period flow
+        self.rows     = 0
+        self.accepted = 0
+        self.rejected = {}      # reason -> count
+        self.examples = []
+        self.unknown  = {}      # foreign symptom name -> count
+
+    def reject(self, line: int, reason: str, row: list):
+        self.rejected[reason] = self.rejected.get(reason, 0) + 1
+        if len(self.examples) < MAX_EXAMPLES:
+            self.examples.append({"line": line, "reason": reason, "row": row[:6]})
+
+    def add_chunk(self, rows, columns: dict, first_line: int):
+        today = date.today()
+        col_date, col_sym, col_mood = columns["date"], columns["symptoms"], columns["mood"]
+        col_energy, col_note, col_flow = columns["energy"], columns["notes"], columns["flow"]
+        for offset, row in enumerate(rows):
+            line = first_line + offset
+            if not row:
+                continue
+            self.rows += 1
+            if col_date >= len(row):
+                self.reject(line, "missing date", row)
+                continue
+            cell_date = date_part(row[col_date])
+            if cell_date not in self.dates:
+                self.dates[cell_date] = parse_date(cell_date, self.date_format)
+            day = self.dates[cell_date]
+            if day is None:
+                self.reject(line, "unreadable date", row)
+                continue
+            if day > today:
+                self.reject(line, "date in the future", row)
+                continue
+            cell  = lambda i: row[i] if i is not None and i < len(row) else ""
+            entry = self.days.get(day)
+            if entry is None:
+                entry = self.days[day] = {"date": day, "mood": None, "energy": None, "symptoms": [], "notes": ""}
+            for symptom in map_symptoms(cell(col_sym), self.unknown):
+                if symptom not in entry["symptoms"]:
+                    entry["symptoms"].append(symptom)
+            entry["mood"]   = map_mood(cell(col_mood)) or entry["mood"]
+            entry["energy"] = parse_energy(cell(col_energy)) or entry["energy"]
+            note = cell(col_note).strip()
+            if note and len(entry["notes"]) < MAX_NOTE:
+                entry["notes"] = (entry["notes"] + "\n" + note if entry["notes"] else note)[:MAX_NOTE]
+            if col_flow is not None and _norm(cell(col_flow)) not in NO_FLOW:
+                self.flow.add(day)
+            self.accepted += 1
+
+
+def _columns(header: list) -> dict:
+    columns = {"date": _find(header, DATE_COLUMNS), "symptoms": _find(header, SYMPTOM_COLUMNS),
+               "mood": _find(header, MOOD_COLUMNS), "energy": _find(header, ENERGY_COLUMNS),
+               "notes": _find(header, NOTE_COLUMNS), "flow": _find(header, FLOW_COLUMNS)}
+    if columns["date"] is None:
+        raise CsvImportError(f"No date column found (looked for {', '.join(DATE_COLUMNS)}); header was {header}")
+    return columns
+
+
+def parse_csv(source, progress=None) -> DayMerger:
+    """Streams a CSV (path or binary file) into a DayMerger, CHUNK_ROWS rows at a time."""
+    raw = open(source, "rb") if isinstance(source, (str, os.PathLike)) else source
+    try:
+        total = raw.seek(0, os.SEEK_END) or 1
+        raw.seek(0)
+        text   = io.TextIOWrapper(raw, encoding="utf-8-sig", errors="replace", newline="")
+        reader = csv.reader(text)
+        header = next(reader, None)
+        if not header:
+            raise CsvImportError("The file is empty")
+        columns = _columns(header)
+        merger  = None
+        line    = 2
+        while True:
+            chunk = [row for _, row in zip(range(CHUNK_ROWS), reader)]
+            if not chunk:
+                break
+            if merger is None:
+                merger = DayMerger(detect_date_format(row[columns["date"]] for row in chunk
+                                                      if columns["date"] < len(row)))
+            merger.add_chunk(chunk, columns, line)
+            line += len(chunk)
+            if progress:
+                progress(0.9 * min(raw.tell() / total, 1.0), f"Read {merger.rows:,} rows")
+        text.detach()
+        return merger or DayMerger(DATE_FORMATS[0])   # a header and no rows
+    finally:
+        if raw is not source:
+            raw.close()
+
+
+# ─────────────────────────────────────────────────
+# PHASES + PERIOD STARTS
+# ─────────────────────────────────────────────────
+def period_starts_from_flow(flow_days) -> list:
+    """First day of every run of flow days (a gap of 2+ days starts a new period)."""
+    starts, previous = [], None
+    for day in sorted(flow_days):
+        if previous is None or (day - previous).days > 2:
+            starts.append(day)
+        previous = day
+    return starts
+
+
+def batch_phases(days: list, cycle_data, period_starts: list) -> list:
+    """Phases for many days at once: the day's position after the latest period
+    start before it (cycle.phase_bounds rules), or after last_period when no
+    start is recorded before that day."""
+    if not days:
+        return []
+    ordinals = np.fromiter((d.toordinal() for d in days), dtype=np.int64, count=len(days))
+    length   = cycle_data.get("cycle_length", 28)
+    position = np.full(len(days), -1, dtype=np.int64)
+    if period_starts:
+        starts = np.array(sorted(d.toordinal() for d in period_starts), dtype=np.int64)
+        latest = np.searchsorted(starts, ordinals, side="right") - 1
+        known  = latest >= 0
+        position[known] = ordinals[known] - starts[latest[known]]
+        # a start followed by a long gap (missing months): fall back to the modulo rule
+        position[position >= 2 * length] = -1
+    if cycle_data.get("last_period"):
+        missing = position < 0
+        position[missing] = (ordinals[missing] - cycle_data["last_period"].toordinal()) % length
+    bounds = cycle.phase_bounds(length, cycle_data.get("period_length", 5))
+    edges  = np.array([lo for _, lo, _ in bounds])
+    names  = np.array([phase for phase, _, _ in bounds] + [None], dtype=object)
+    index  = np.where(position >= 0, np.searchsorted(edges, position, side="right") - 1, len(bounds))
+    return names[index].tolist()
+
+
+# ─────────────────────────────────────────────────
+# IMPORT
+# ─────────────────────────────────────────────────
+def import_csv(user_id: str, source, progress=None) -> dict:
+    """Imports a CSV export into the user's log. Returns a report dict."""
+    merger = parse_csv(source, progress)
+    data   = storage.load_cycle_data(user_id)
+    log    = data["symptoms_log"]
+    logged = {e["date"] for e in log}
+    new    = [merger.days[d] for d in sorted(merger.days) if d not in logged]
+    if progress:
+        progress(0.92, f"Merging {len(new):,} new days")
+
+    starts = sorted(set(data.get("period_starts") or []) | set(period_starts_from_flow(merger.flow)))
+    if starts:
+        data["period_starts"] = starts
+        if not data.get("last_period") or starts[-1] > data["last_period"]:
+            data["last_period"] = starts[-1]
+    for entry, phase in zip(new, batch_phases([e["date"] for e in new], data, starts)):
+        entry["phase"] = phase
+
+    folder    = storage.user_dir(user_id)
+    with_note = [e for e in new if e["notes"]]
+    note_ids  = notes.append_notes(folder, [e["notes"] for e in with_note])
+    for entry, note_id in zip(with_note, note_ids):
+        entry["note_id"] = note_id
+    if with_note and search.notes_indexed(folder):
+        search.add_documents(folder, [("note", e["date"], str(e["note_id"]), e["notes"]) for e in with_note])
+    for entry in new:
+        del entry["notes"]
+
+    if progress:
+        progress(0.96, "Saving")
+    data["symptoms_log"] = sorted(log + new, key=lambda e: e["date"])
+    storage.save_cycle_data(user_id, data)
+    unknown = sorted(merger.unknown.items(), key=lambda kv: -kv[1])[:15]
+    return {"rows": merger.rows, "accepted": merger.accepted, "days": len(merger.days),
+            "imported_days": len(new), "skipped_days": len(merger.days) - len(new),
+            "period_starts": len(starts), "rejected": merger.rejected, "examples": merger.examples,
+            "unknown_symptoms": unknown}
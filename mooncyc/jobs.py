@@ -0,0 +1,180 @@
+# ─────────────────────────────────────────────────
+# BACKGROUND JOB QUEUE
+# ─────────────────────────────────────────────────
+# Slow calls (LLM generations, ElevenLabs audio) run as jobs on a worker pool
+# shared by every session, so the Streamlit script thread never blocks on
+# them. A session keeps only job ids; the UI polls the job and picks up the
+# result when it's done.
+#
+#   job = jobs.queue().submit("meditation", get_initial_meditation, phase, mood, symptoms, age)
+#   jobs.queue().get(job.id).status   # queued → running → done / failed / cancelled
+#
+# Identical jobs (same kind and arguments) that are still queued or running
+# are deduplicated: the second submit gets the first job back. The job keeps
+# the set of callers waiting on it (submit(..., caller=<id>), e.g. session +
+# card), so resubmitting from the same caller doesn't count twice.
+# cancel(job_id, caller) only detaches that caller; the job is stopped when
+# the last one leaves. cancel() without a caller stops it for everyone.
+#
+# Jobs submitted with progress=True receive a `progress(fraction, message)`
+# callback. Calling it after that cancel raises JobCancelled, so long jobs
+# stop at their next progress point; queued jobs are cancelled before they
+# start.
+#
+# MOONCYC_JOB_PROCESSES > 0 adds a process pool for CPU-bound jobs
+# (backend="process"); those need picklable, module-level functions and don't
+# report progress.
+
+import os
+import threading
+import time
+import uuid
+from concurrent.futures import CancelledError, ProcessPoolExecutor, ThreadPoolExecutor
+
+from mooncyc.singleflight import canonical_key
+
+JOB_WORKERS   = int(os.getenv("MOONCYC_JOB_WORKERS", "8"))
+JOB_PROCESSES = int(os.getenv("MOONCYC_JOB_PROCESSES", "0"))
+JOB_TTL       = 15 * 60   # seconds a finished job is kept for its session to collect
+
+PENDING = ("queued", "running")
+
+
+class JobCancelled(Exception):
+    pass
+
+
+class Job:
+    def __init__(self, kind: str, key: str):
+        self.id        = uuid.uuid4().hex
+        self.kind      = kind
+        self.key       = key
+        self.status    = "queued"
+        self.progress  = 0.0
+        self.message   = ""
+        self.result    = None
+        self.error     = None
+        self.created   = time.time()
+        self.started   = None
+        self.finished  = None
+        self.future    = None
+        self.callers   = set()   # ids of the callers still waiting on this job
+        self._cancel   = threading.Event()
+
+    def report(self, fraction: float, message: str = ""):
+        """Progress callback handed to the job function."""
+        if self._cancel.is_set():
+            raise JobCancelled(self.id)
+        self.progress = max(0.0, min(1.0, fraction))
+        self.message  = message
+
+    @property
+    def elapsed(self) -> float:
+        return (self.finished or time.time()) - (self.started or self.created)
+
+    def as_dict(self) -> dict:
+        return {"id": self.id, "kind": self.kind, "status": self.status, "progress": self.progress,
+                "message": self.message, "error": self.error, "elapsed": round(self.elapsed, 1)}
+
+
+class JobQueue:
+    def __init__(self, workers: int = JOB_WORKERS, processes: int = JOB_PROCESSES):
+        self._threads   = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="mooncyc-job")
+        self._processes = ProcessPoolExecutor(max_workers=processes) if processes > 0 else None
+        self._lock      = threading.Lock()
+        self._jobs      = {}   # id -> Job
+        self._pending   = {}   # dedup key -> id of the queued/running job
+        self.deduplicated = 0
+
+    def submit(self, kind: str, fn, *args, key: str = None, progress: bool = False,
+               backend: str = "thread", caller: str = None, **kwargs) -> Job:
+        key    = key or canonical_key(kind, {"args": args, "kwargs": kwargs})
+        caller = caller or uuid.uuid4().hex   # anonymous callers each count once
+        with self._lock:
+            self._evict()
+            existing = self._jobs.get(self._pending.get(key))
+            if existing is not None and existing.status in PENDING:
+                self.deduplicated += 1
+                existing.callers.add(caller)
+                return existing
+            job = Job(kind, key)
+            job.callers.add(caller)
+            self._jobs[job.id] = job
+            self._pending[key] = job.id
+
+        if backend == "process" and self._processes is not None:
+            job.future = self._processes.submit(fn, *args, **kwargs)
+            job.status, job.started = "running", time.time()   # no start signal from the child
+        else:
+            if progress:
+                kwargs["progress"] = job.report
+            job.future = self._threads.submit(self._run, job, fn, args, kwargs)
+        job.future.add_done_callback(lambda future: self._finish(job, future))
+        return job
+
+    def _run(self, job: Job, fn, args, kwargs):
+        if job._cancel.is_set():
+            raise JobCancelled(job.id)
+        job.status, job.started = "running", time.time()
+        return fn(*args, **kwargs)
+
+    def _finish(self, job: Job, future):
+        job.finished = time.time()
+        try:
+            job.result = future.result()
+            job.status, job.progress = ("cancelled" if job._cancel.is_set() else "done"), 1.0
+        except (CancelledError, JobCancelled):
+            job.status = "cancelled"
+        except Exception as e:
+            job.status, job.error = "failed", f"{type(e).__name__}: {e}"
+        with self._lock:
+            if self._pending.get(job.key) == job.id:
+                del self._pending[job.key]
+
+    def get(self, job_id: str):
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def cancel(self, job_id: str, caller: str = None) -> bool:
+        """Detaches `caller` (every caller if None). The last one out stops a queued
+        job, or asks a running one to stop at its next progress point."""
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is None or job.status not in PENDING or (caller is not None and caller not in job.callers):
+                return False
+            if caller is None:
+                job.callers.clear()
+            else:
+                job.callers.discard(caller)
+            if job.callers:
+                return True   # other callers still want the result
+            if self._pending.get(job.key) == job.id:
+                del self._pending[job.key]   # a new identical submit starts fresh
+        job._cancel.set()
+        if job.future is not None and job.future.cancel():
+            job.status = "cancelled"
+        return True
+
+    def _evict(self):
+        cutoff = time.time() - JOB_TTL
+        for job_id in [i for i, j in self._jobs.items() if j.finished and j.finished < cutoff]:
+            del self._jobs[job_id]
+
+    def stats(self) -> dict:
+        with self._lock:
+            statuses = [j.status for j in self._jobs.values()]
+        return {"queued": statuses.count("queued"), "running": statuses.count("running"),
+                "done": statuses.count("done"), "failed": statuses.count("failed"),
+                "cancelled": statuses.count("cancelled"), "deduplicated": self.deduplicated}
+
+
+_queue      = None
+_queue_lock = threading.Lock()
+
+
+def queue() -> JobQueue:
+    global _queue
+    with _queue_lock:
+        if _queue is None:
+            _queue = JobQueue()
+        return _queue
@@ -0,0 +1,88 @@
+# ─────────────────────────────────────────────────
+# NOTES BLOB STORE
+# ─────────────────────────────────────────────────
+# Free-text notes are rarely read, so they don't live inside the symptom log.
+# Each user has an append-only blob of note text plus a fixed-width offset
+# index; a log entry only keeps its "note_id" (the record number):
+#
+#   notes.blob   utf-8 note text, back to back
+#   notes.idx    one (offset uint64, length uint32) record per note
+#
+# Text is decoded on demand through mmap when someone opens a day's details.
+# Notes are never rewritten in place — editing a note appends a new record.
+
+import mmap
+import os
+import struct
+import threading
+
+BLOB_FILE  = "notes.blob"
+INDEX_FILE = "notes.idx"
+RECORD     = struct.Struct("<QI")
+
+_lock = threading.Lock()
+
+
+def append_note(folder: str, text: str) -> int:
+    """Appends one note and returns its note_id."""
+    data = text.encode("utf-8")
+    os.makedirs(folder, exist_ok=True)
+    with _lock:
+        with open(os.path.join(folder, BLOB_FILE), "ab") as blob:
+            offset = blob.seek(0, os.SEEK_END)
+            blob.write(data)
+        with open(os.path.join(folder, INDEX_FILE), "ab") as index:
+            note_id = index.seek(0, os.SEEK_END) // RECORD.size
+            index.write(RECORD.pack(offset, len(data)))
+    return note_id
+
+
+def append_notes(folder: str, texts) -> list:
+    """Appends many notes with one open of each file (bulk imports); returns their note_ids."""
+    os.makedirs(folder, exist_ok=True)
+    with _lock:
+        with open(os.path.join(folder, BLOB_FILE), "ab") as blob, \
+             open(os.path.join(folder, INDEX_FILE), "ab") as index:
+            offset  = blob.seek(0, os.SEEK_END)
+            first   = index.seek(0, os.SEEK_END) // RECORD.size
+            records = bytearray()
+            for text in texts:
+                data = text.encode("utf-8")
+                blob.write(data)
+                records += RECORD.pack(offset, len(data))
+                offset  += len(data)
+            index.write(records)
+    return list(range(first, first + len(records) // RECORD.size))
+
+
+def _mapped(path: str):
+    f = open(path, "rb")
+    try:
+        return f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    except ValueError:   # empty file
+        f.close()
+        raise KeyError(path)
+
+
+def read_note(folder: str, note_id: int) -> str:
+    index_file, index = _mapped(os.path.join(folder, INDEX_FILE))
+    try:
+        if not 0 <= note_id < len(index) // RECORD.size:
+            raise KeyError(note_id)
+        offset, length = RECORD.unpack_from(index, note_id * RECORD.size)
+    finally:
+        index.close()
+        index_file.close()
+    if length == 0:
+        return ""
+    blob_file, blob = _mapped(os.path.join(folder, BLOB_FILE))
+    try:
+        return blob[offset:offset + length].decode("utf-8")
+    finally:
+        blob.close()
+        blob_file.close()
+
+
+def note_count(folder: str) -> int:
+    path = os.path.join(folder, INDEX_FILE)
+    return os.path.getsize(path) // RECORD.size if os.path.exists(path) else 0
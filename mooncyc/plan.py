@@ -0,0 +1,140 @@
+# ─────────────────────────────────────────────────
+# CYCLE PLAN
+# ─────────────────────────────────────────────────
+# The meal plan, fasting advice and meditation theme for every remaining
+# day of the current cycle, written by one LLM call (ai.get_cycle_plan)
+# instead of several per day, and kept per day in the user's database:
+#
+#   plan_days(day, cycle_start, phase, meal, fasting, meditation, source, updated)
+#
+# meal, fasting and meditation are JSON in the same shape as the one-off
+# generations (breakfast…why, recommendation…tip, theme/affirmation), so
+# the daily cards read them directly. A day regenerated on its own, or
+# replaced by a one-off generation, is marked source = 'override' and a
+# later whole-cycle plan leaves it alone — unless new cycle settings moved
+# it into another phase.
+
+import json
+from contextlib import closing
+from datetime import date, datetime, timedelta
+
+from mooncyc import cycle, userdb
+
+PARTS = {
+    "meal":       ("breakfast", "lunch", "dinner", "snacks", "why"),
+    "fasting":    ("recommendation", "max_hours", "reason", "tip"),
+    "meditation": ("theme", "affirmation"),
+}
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS plan_days (
+    day         TEXT PRIMARY KEY,
+    cycle_start TEXT,
+    phase       TEXT NOT NULL,
+    meal        TEXT,
+    fasting     TEXT,
+    meditation  TEXT,
+    source      TEXT NOT NULL,
+    updated     TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS plan_days_cycle ON plan_days (cycle_start);"""
+
+
+def connect(folder: str):
+    return userdb.connect(folder, _SCHEMA)
+
+
+def remaining_days(cycle_data, today: date = None) -> list:
+    """[(date, phase)] from today to the last expected day of the current cycle."""
+    today = today or date.today()
+    start = cycle.cycle_start(cycle_data, today)
+    if start is None:
+        return []
+    last = max(start + timedelta(days=cycle_data.get("cycle_length", 28) - 1), today)
+    return [(day, cycle.phase_on(cycle_data, day))
+            for day in (today + timedelta(days=i) for i in range((last - today).days + 1))]
+
+
+def split(fields: dict) -> dict:
+    """One day's flat plan fields -> {"meal": {...}, "fasting": {...}, "meditation": {...}}."""
+    return {part: {key: fields.get(key, "") for key in keys} for part, keys in PARTS.items()}
+
+
+# ─────────────────────────────────────────────────
+# WRITING
+# ─────────────────────────────────────────────────
+def save(folder: str, cycle_start, days: dict, phases: dict) -> int:
+    """Stores a whole-cycle plan ({date: flat fields}, phases {date: phase}). Overridden days are
+    kept unless their phase moved (new cycle settings). Returns the days written."""
+    now  = datetime.now().isoformat(timespec="seconds")
+    rows = [(day.isoformat(), cycle_start.isoformat() if cycle_start else None, phases[day],
+             *(json.dumps(part) for part in split(fields).values()), now)
+            for day, fields in days.items()]
+    with closing(connect(folder)) as conn, conn:
+        before = conn.total_changes
+        conn.executemany(
+            "INSERT INTO plan_days (day, cycle_start, phase, meal, fasting, meditation, source, updated) "
+            "VALUES (?, ?, ?, ?, ?, ?, 'plan', ?) "
+            "ON CONFLICT(day) DO UPDATE SET cycle_start = excluded.cycle_start, phase = excluded.phase, "
+            "meal = excluded.meal, fasting = excluded.fasting, meditation = excluded.meditation, "
+            "source = 'plan', updated = excluded.updated "
+            "WHERE plan_days.source != 'override' OR plan_days.phase != excluded.phase", rows)
+        return conn.total_changes - before
+
+
+def override(folder: str, day: date, phase: str, cycle_start=None, **parts):
+    """Replaces some parts of one day (meal=..., fasting=..., meditation=...) and pins it."""
+    unknown = set(parts) - set(PARTS)
+    if unknown:
+        raise ValueError(f"unknown plan parts: {', '.join(sorted(unknown))}")
+    values = {part: json.dumps(parts[part]) if part in parts else None for part in PARTS}
+    with closing(connect(folder)) as conn, conn:
+        conn.execute(
+            "INSERT INTO plan_days (day, cycle_start, phase, meal, fasting, meditation, source, updated) "
+            "VALUES (?, ?, ?, ?, ?, ?, 'override', ?) "
+            "ON CONFLICT(day) DO UPDATE SET phase = excluded.phase, "
+            "meal = COALESCE(excluded.meal, meal), fasting = COALESCE(excluded.fasting, fasting), "
+            "meditation = COALESCE(excluded.meditation, meditation), "
+            "source = 'override', updated = excluded.updated",
+            (day.isoformat(), cycle_start.isoformat() if cycle_start else None, phase,
+             values["meal"], values["fasting"], values["meditation"], datetime.now().isoformat(timespec="seconds")))
+
+
+# ─────────────────────────────────────────────────
+# READING
+# ─────────────────────────────────────────────────
+_COLUMNS = "day, cycle_start, phase, meal, fasting, meditation, source"
+
+
+def _row(row) -> dict:
+    day, cycle_start, phase, meal, fasting, meditation, source = row
+    return {"day": date.fromisoformat(day), "cycle_start": cycle_start, "phase": phase, "source": source,
+            "meal": json.loads(meal) if meal else None, "fasting": json.loads(fasting) if fasting else None,
+            "meditation": json.loads(meditation) if meditation else None}
+
+
+def for_day(folder: str, day: date):
+    """The stored plan for `day`, or None."""
+    if not userdb.exists(folder):
+        return None
+    with closing(connect(folder)) as conn:
+        row = conn.execute(f"SELECT {_COLUMNS} FROM plan_days WHERE day = ?", (day.isoformat(),)).fetchone()
+    return _row(row) if row else None
+
+
+def days(folder: str, first: date, last: date) -> list:
+    """Stored plan days from `first` to `last`, in date order."""
+    if not userdb.exists(folder):
+        return []
+    with closing(connect(folder)) as conn:
+        return [_row(r) for r in conn.execute(f"SELECT {_COLUMNS} FROM plan_days WHERE day BETWEEN ? AND ? "
+                                              "ORDER BY day", (first.isoformat(), last.isoformat()))]
+
+
+def missing_days(folder: str, wanted: list) -> list:
+    """The [(date, phase)] of `wanted` without a complete plan for that phase yet."""
+    if not wanted:
+        return []
+    stored = {(r["day"], r["phase"]) for r in days(folder, wanted[0][0], wanted[-1][0])
+              if r["meal"] and r["fasting"] and r["meditation"]}
+    return [(day, phase) for day, phase in wanted if (day, phase) not in stored]
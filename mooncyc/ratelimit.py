@@ -0,0 +1,197 @@
+# ─────────────────────────────────────────────────
+# OUTBOUND RATE LIMITING
+# ─────────────────────────────────────────────────
+# Free-tier Cohere, ElevenLabs and ZenQuotes keys allow only a handful of
+# calls per minute. Every outbound call waits for a token from its provider's
+# bucket, shared by all sessions in the process:
+#
+#   chat = ratelimit.limited("cohere", co.chat)
+#   usage.tracked_call("meditation", chat, model=..., messages=...)
+#
+# Waiters are served by priority class (INTERACTIVE clicks before BACKGROUND
+# batch work), then first come first served. A waiter that can't get a token
+# before its deadline gets RateLimited, so the caller can fall back to
+# pre-written content instead of piling up requests that would get a 429.
+# If a provider still answers 429, its bucket is drained and paused for the
+# Retry-After time, and the call is retried once if the deadline allows.
+#
+# Budgets come from MOONCYC_RATE_<PROVIDER>="calls/seconds" (e.g. "20/60").
+# A quarter of the budget is available as burst, the rest refills evenly, so
+# no window of that length sees more than the budget. Limits are per process.
+
+import heapq
+import itertools
+import os
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+
+INTERACTIVE = 0
+BACKGROUND  = 1
+
+DEFAULT_LIMITS    = {"cohere": "20/60", "elevenlabs": "5/60", "zenquotes": "5/30", "anthropic": "50/60"}
+DEFAULT_DEADLINES = {INTERACTIVE: 15.0, BACKGROUND: 300.0}   # seconds a call may wait for a token
+DEFAULT_COOLDOWN  = 10.0                                     # after a 429 without Retry-After
+
+_local = threading.local()
+
+
+class RateLimited(Exception):
+    def __init__(self, provider: str, waited: float):
+        super().__init__(f"{provider} is busy right now (waited {waited:.0f}s for a free slot)")
+        self.provider = provider
+        self.waited   = waited
+
+
+def current_priority() -> int:
+    return getattr(_local, "priority", INTERACTIVE)
+
+
+@contextmanager
+def priority(level: int):
+    """Runs the block's outbound calls at `level` (e.g. BACKGROUND for batch precomputation)."""
+    previous = current_priority()
+    _local.priority = level
+    try:
+        yield
+    finally:
+        _local.priority = previous
+
+
+class TokenBucket:
+    def __init__(self, provider: str, calls: int, per_seconds: float):
+        self.provider     = provider
+        # burst + refill over any window of `per_seconds` never exceeds `calls`
+        self.capacity     = max(1.0, calls / 4)
+        self.rate         = max(calls - self.capacity, 1.0) / per_seconds
+        self.tokens       = self.capacity
+        self.updated      = time.monotonic()
+        self.paused_until = 0.0
+        self._cond        = threading.Condition()
+        self._waiters     = []   # heap of (priority, ticket)
+        self._tickets     = itertools.count()
+        self._waits       = deque(maxlen=1000)
+        self.granted      = 0
+        self.rejected     = 0
+        self.throttled    = 0
+
+    def _refill(self, now: float):
+        if now < self.paused_until:
+            self.updated = now
+            return
+        self.tokens  = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def acquire(self, level: int = INTERACTIVE, deadline: float = None) -> float:
+        """Blocks until a token is free and returns the seconds waited; RateLimited after `deadline` seconds."""
+        waiter = (level, next(self._tickets))
+        with self._cond:
+            started = time.monotonic()
+            heapq.heappush(self._waiters, waiter)
+            try:
+                while True:
+                    now = time.monotonic()
+                    self._refill(now)
+                    if self._waiters[0] == waiter and self.tokens >= 1:
+                        self.tokens -= 1
+                        self.granted += 1
+                        self._waits.append(now - started)
+                        return now - started
+                    next_token = max(self.paused_until - now, (1 - self.tokens) / self.rate, 0.005)
+                    if deadline is not None:
+                        remaining = started + deadline - now
+                        if remaining <= 0 or (self._waiters[0] == waiter and next_token > remaining):
+                            self.rejected += 1
+                            raise RateLimited(self.provider, now - started)
+                        next_token = min(next_token, remaining)
+                    self._cond.wait(next_token)
+            finally:
+                if waiter in self._waiters:
+                    self._waiters.remove(waiter)
+                    heapq.heapify(self._waiters)
+                self._cond.notify_all()
+
+    def penalize(self, seconds: float):
+        """The provider said 429: stop handing out tokens for `seconds`."""
+        with self._cond:
+            self.tokens       = 0.0
+            self.paused_until = max(self.paused_until, time.monotonic() + seconds)
+            self.throttled   += 1
+
+    def stats(self) -> dict:
+        with self._cond:
+            self._refill(time.monotonic())
+            waits = sorted(self._waits)
+            depth = [level for level, _ in self._waiters]
+            return {
+                "provider": self.provider,
+                "queued_interactive": depth.count(INTERACTIVE),
+                "queued_background": depth.count(BACKGROUND),
+                "tokens": round(self.tokens, 2),
+                "granted": self.granted,
+                "rejected": self.rejected,
+                "throttled_429": self.throttled,
+                "wait_avg_ms": round(sum(waits) / len(waits) * 1000, 1) if waits else 0.0,
+                "wait_p95_ms": round(waits[int(len(waits) * 0.95)] * 1000, 1) if waits else 0.0,
+            }
+
+
+_buckets      = {}
+_buckets_lock = threading.Lock()
+
+
+def _budget(provider: str) -> tuple:
+    spec = os.getenv(f"MOONCYC_RATE_{provider.upper()}", DEFAULT_LIMITS.get(provider, "60/60"))
+    calls, seconds = spec.split("/")
+    return int(calls), float(seconds)
+
+
+def bucket(provider: str) -> TokenBucket:
+    with _buckets_lock:
+        if provider not in _buckets:
+            _buckets[provider] = TokenBucket(provider, *_budget(provider))
+        return _buckets[provider]
+
+
+def _retry_after(obj) -> float:
+    headers = getattr(obj, "headers", None) or getattr(getattr(obj, "response", None), "headers", None) or {}
+    try:
+        return float(headers.get("retry-after") or headers.get("Retry-After"))
+    except (TypeError, ValueError):
+        return DEFAULT_COOLDOWN
+
+
+def _is_429(obj) -> bool:
+    return getattr(obj, "status_code", None) == 429
+
+
+def limited(provider: str, fn, deadline: float = None):
+    """Wraps `fn` so each call first takes a token from the provider's bucket.
+    A 429 (raised, or returned as a response) pauses the bucket and is retried once."""
+    def wrapper(*args, **kwargs):
+        level   = current_priority()
+        budget  = DEFAULT_DEADLINES[level] if deadline is None else deadline
+        limiter = bucket(provider)
+        started = time.monotonic()
+        for attempt in range(2):
+            limiter.acquire(level, max(0.0, budget - (time.monotonic() - started)))
+            try:
+                result = fn(*args, **kwargs)
+            except Exception as e:
+                if not _is_429(e) or attempt:
+                    raise
+                limiter.penalize(_retry_after(e))
+                continue
+            if _is_429(result) and not attempt:
+                limiter.penalize(_retry_after(result))
+                continue
+            return result
+    wrapper.__name__ = getattr(fn, "__name__", "call")
+    return wrapper
+
+
+def stats() -> list:
+    with _buckets_lock:
+        buckets = list(_buckets.values())
+    return [b.stats() for b in buckets]
@@ -0,0 +1,173 @@
+# ─────────────────────────────────────────────────
+# FEEDBACK-WEIGHTED MEDITATION LIBRARY
+# ─────────────────────────────────────────────────
+# Every generated meditation is kept with the context it was written for
+# (phase, mood, symptoms) and the feedback it got: 👍 counts as a like, asking
+# for a rewrite counts as a dislike. Before generating a new script we look
+# for a liked one written for the same phase and a similar mood/symptom set,
+# and reuse it when it is close enough.
+#
+# Contexts are embedded as hashed word + character 3-gram vectors (NumPy,
+# L2-normalised), so matching is one matrix-vector product over the phase's
+# rows. Scores are cosine similarity × a smoothed like rate.
+#
+# Scripts are written from personal context (age, mood, symptoms, and for
+# rewrites the user's own feedback), so each user has their own library in
+# the meditations table of their mooncyc.db (see mooncyc/userdb.py). Each
+# process keeps the vectors of recently used libraries in memory (LIBRARY_CACHE
+# users); its own writes go to both.
+
+import os
+import re
+import sqlite3
+import threading
+import zlib
+from collections import OrderedDict
+from contextlib import closing
+
+import numpy as np
+
+from mooncyc import storage, userdb
+
+DIM            = 1 << 12
+MIN_SIMILARITY = 0.75   # cosine similarity of contexts needed for reuse
+MIN_LIKE_RATE  = 0.6    # smoothed (likes + 1) / (likes + dislikes + 2)
+LIBRARY_CACHE  = 64
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS meditations (
+    id       INTEGER PRIMARY KEY,
+    phase    TEXT NOT NULL,
+    context  TEXT NOT NULL,
+    script   TEXT NOT NULL,
+    likes    INTEGER NOT NULL DEFAULT 0,
+    dislikes INTEGER NOT NULL DEFAULT 0
+);"""
+_WORD = re.compile(r"[a-z]+")
+
+
+def context_text(mood: str, symptoms) -> str:
+    """What a meditation is matched on (the phase is an exact filter, not part of the text)."""
+    return " ".join([mood or "", *sorted(s for s in symptoms or () if s != "None")]).lower()
+
+
+def embed(text: str) -> np.ndarray:
+    """Hashed word and character-trigram features, L2-normalised."""
+    features = []
+    for word in _WORD.findall(text.lower()):
+        features.append("w:" + word)
+        padded = f" {word} "
+        features.extend("c:" + padded[i:i + 3] for i in range(len(padded) - 2))
+    vector = np.zeros(DIM, dtype=np.float32)
+    if not features:
+        return vector
+    hashes = np.array([zlib.crc32(f.encode("utf-8")) for f in features], dtype=np.uint32)
+    signs  = np.where(hashes & 0x80000000, -1.0, 1.0).astype(np.float32)
+    np.add.at(vector, hashes % DIM, signs)
+    norm = np.linalg.norm(vector)
+    return vector / norm if norm else vector
+
+
+class MeditationLibrary:
+    def __init__(self, path: str):
+        self.path    = path
+        self._lock   = threading.Lock()
+        self._loaded = False
+
+    def _connect(self):
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        conn = sqlite3.connect(self.path, timeout=10)
+        conn.executescript(_SCHEMA)
+        return conn
+
+    def _load(self):
+        with closing(self._connect()) as conn:
+            rows = conn.execute("SELECT id, phase, context, likes, dislikes FROM meditations ORDER BY id").fetchall()
+        self._size     = len(rows)
+        capacity       = max(64, self._size * 2)
+        self._ids      = np.zeros(capacity, dtype=np.int64)
+        self._phases   = np.empty(capacity, dtype=object)
+        self._likes    = np.zeros(capacity, dtype=np.float32)
+        self._dislikes = np.zeros(capacity, dtype=np.float32)
+        self._vectors  = np.zeros((capacity, DIM), dtype=np.float32)
+        for i, (id_, phase, context, likes, dislikes) in enumerate(rows):
+            self._ids[i], self._phases[i], self._likes[i], self._dislikes[i] = id_, phase, likes, dislikes
+            self._vectors[i] = embed(context)
+        self._loaded = True
+
+    def _grow(self):
+        """Doubles the preallocated arrays so adds stay amortised O(1)."""
+        capacity = len(self._ids) * 2
+        for name in ("_ids", "_phases", "_likes", "_dislikes", "_vectors"):
+            old = getattr(self, name)
+            new = np.zeros((capacity,) + old.shape[1:], dtype=old.dtype)
+            new[:self._size] = old[:self._size]
+            setattr(self, name, new)
+
+    def _ensure_loaded(self):
+        if not self._loaded:
+            self._load()
+
+    def add(self, phase: str, mood: str, symptoms, script: str) -> int:
+        context = context_text(mood, symptoms)
+        with self._lock:
+            self._ensure_loaded()
+            with closing(self._connect()) as conn, conn:
+                new_id = conn.execute("INSERT INTO meditations (phase, context, script) VALUES (?, ?, ?)",
+                                      (phase, context, script)).lastrowid
+            if self._size == len(self._ids):
+                self._grow()
+            i = self._size
+            self._ids[i], self._phases[i], self._vectors[i] = new_id, phase, embed(context)
+            self._likes[i] = self._dislikes[i] = 0
+            self._size += 1
+        return new_id
+
+    def feedback(self, meditation_id: int, liked: bool):
+        column = "likes" if liked else "dislikes"
+        with self._lock:
+            self._ensure_loaded()
+            with closing(self._connect()) as conn, conn:
+                conn.execute(f"UPDATE meditations SET {column} = {column} + 1 WHERE id = ?", (meditation_id,))
+            row = np.flatnonzero(self._ids[:self._size] == meditation_id)
+            if row.size:
+                (self._likes if liked else self._dislikes)[row[0]] += 1
+
+    def best_match(self, phase: str, mood: str, symptoms, min_similarity: float = MIN_SIMILARITY):
+        """(id, script, similarity) of the best liked script for this context, or None."""
+        query = embed(context_text(mood, symptoms))
+        with self._lock:
+            self._ensure_loaded()
+            n    = self._size
+            rows = np.flatnonzero((self._phases[:n] == phase) & (self._likes[:n] > 0))
+            if not rows.size:
+                return None
+            similarity = self._vectors[rows] @ query
+            like_rate  = (self._likes[rows] + 1) / (self._likes[rows] + self._dislikes[rows] + 2)
+            eligible   = (similarity >= min_similarity) & (like_rate >= MIN_LIKE_RATE)
+            if not eligible.any():
+                return None
+            best = int(np.argmax(np.where(eligible, similarity * like_rate, -1.0)))
+            meditation_id, best_similarity = int(self._ids[rows[best]]), float(similarity[best])
+        with closing(self._connect()) as conn:
+            script = conn.execute("SELECT script FROM meditations WHERE id = ?", (meditation_id,)).fetchone()[0]
+        return meditation_id, script, best_similarity
+
+    def stats(self) -> dict:
+        with self._lock:
+            self._ensure_loaded()
+            return {"scripts": self._size, "liked": int((self._likes[:self._size] > 0).sum())}
+
+
+_libraries    = OrderedDict()   # user_id -> MeditationLibrary
+_library_lock = threading.Lock()
+
+
+def library(user_id: str) -> MeditationLibrary:
+    """The user's own library."""
+    with _library_lock:
+        lib = _libraries.pop(user_id, None) or MeditationLibrary(userdb.path(storage.user_dir(user_id)))
+        _libraries[user_id] = lib
+        while len(_libraries) > LIBRARY_CACHE:
+            _libraries.popitem(last=False)
+        return lib
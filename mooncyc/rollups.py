@@ -0,0 +1,213 @@
+# ─────────────────────────────────────────────────
+# PER-CYCLE ROLLUPS
+# ─────────────────────────────────────────────────
+# What the insights prompt needs, kept per cycle and phase in the user's
+# database (see mooncyc/userdb.py) so it never walks the whole log:
+#
+#   cycle_rollups(cycle_start, phase, length, days, energy_sum, energy_days, symptoms, moods)
+#
+# symptoms and moods are JSON {name: days}. Cycles are cut at the recorded
+# period starts (mooncyc/analytics.py); the phase is the one stored on each
+# entry when it was logged.
+#
+# storage.save_cycle_data() calls record() on every save. Only cycles that
+# changed are recomputed: those holding an entry that isn't a frozen entry
+# from the shared cache (new or edited in this session, see
+# storage.freeze_entry), and those whose day count no longer matches (an
+# entry was removed). New period starts or cycle settings recompute all.
+#
+# The prompt reads the WINDOW_CYCLES newest cycles, weighting each one
+# DECAY times the one after it, so its size and build time stay the same
+# after one cycle or twenty years.
+
+import json
+from collections import Counter
+from contextlib import closing
+from datetime import date
+from types import MappingProxyType
+
+import numpy as np
+
+from mooncyc import analytics, cycle, userdb
+
+WINDOW_CYCLES = 6
+DECAY         = 0.7   # weight of a cycle relative to the one after it
+TOP_SYMPTOMS  = 5
+TOP_MOODS     = 3
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS cycle_rollups (
+    cycle_start TEXT NOT NULL,
+    phase       TEXT NOT NULL,
+    length      INTEGER,
+    days        INTEGER NOT NULL,
+    energy_sum  REAL NOT NULL,
+    energy_days INTEGER NOT NULL,
+    symptoms    TEXT NOT NULL,
+    moods       TEXT NOT NULL,
+    PRIMARY KEY (cycle_start, phase)
+);
+CREATE TABLE IF NOT EXISTS rollup_state (
+    key   TEXT PRIMARY KEY,
+    value TEXT NOT NULL
+);"""
+
+
+def connect(folder: str):
+    return userdb.connect(folder, _SCHEMA)
+
+
+def _fingerprint(cycle_data) -> str:
+    """What the cycle boundaries depend on; a change means recomputing every cycle."""
+    starts = sorted(d.isoformat() for d in cycle_data.get("period_starts") or ())
+    last   = cycle_data.get("last_period")
+    return json.dumps([starts, last.isoformat() if last else None, cycle_data.get("cycle_length")])
+
+
+def rollup(entries) -> dict:
+    """{phase: {"days", "energy_sum", "energy_days", "symptoms", "moods"}} for one cycle's entries."""
+    phases = {}
+    for entry in entries:
+        row = phases.setdefault(entry.get("phase") or "Unknown", {
+            "days": 0, "energy_sum": 0.0, "energy_days": 0, "symptoms": Counter(), "moods": Counter()})
+        row["days"] += 1
+        if entry.get("energy"):
+            row["energy_sum"]  += entry["energy"]
+            row["energy_days"] += 1
+        row["symptoms"].update(s for s in set(entry.get("symptoms", ())) if s != "None")
+        if entry.get("mood"):
+            row["moods"][entry["mood"]] += 1
+    return phases
+
+
+# ─────────────────────────────────────────────────
+# MAINTAINED ON WRITE
+# ─────────────────────────────────────────────────
+def record(folder: str, cycle_data) -> int:
+    """Brings the rollups up to date with the log. Returns the number of cycles recomputed."""
+    log         = cycle_data.get("symptoms_log", [])
+    fingerprint = _fingerprint(cycle_data)
+    with closing(connect(folder)) as conn, conn:
+        state = dict(conn.execute("SELECT key, value FROM rollup_state"))
+        if state.get("fingerprint") != fingerprint:
+            conn.execute("DELETE FROM cycle_rollups")
+        stored = dict(conn.execute("SELECT cycle_start, SUM(days) FROM cycle_rollups GROUP BY cycle_start"))
+        conn.executemany("INSERT OR REPLACE INTO rollup_state (key, value) VALUES (?, ?)",
+                         [("fingerprint", fingerprint), ("entries", str(len(log)))])
+        ordinals = np.fromiter((e["date"].toordinal() for e in log), dtype=np.int64, count=len(log))
+        starts   = analytics.cycle_starts(cycle_data, date.fromordinal(int(ordinals.min())) if len(log) else None)
+        if not starts or not len(log):
+            conn.execute("DELETE FROM cycle_rollups")
+            return 0
+
+        bounds = np.array([d.toordinal() for d in starts], dtype=np.int64)
+        which  = np.searchsorted(bounds, ordinals, side="right") - 1   # starts reach back past every entry
+        counts = np.bincount(which, minlength=len(starts))
+        keys   = [d.isoformat() for d in starts]
+        fresh  = np.fromiter((not isinstance(e, MappingProxyType) for e in log), dtype=bool, count=len(log))
+        dirty  = set(np.unique(which[fresh]).tolist())
+        dirty |= {i for i, key in enumerate(keys) if stored.get(key, 0) != counts[i]}
+        gone   = set(stored) - {keys[i] for i in np.flatnonzero(counts)}
+        conn.executemany("DELETE FROM cycle_rollups WHERE cycle_start = ?", [(k,) for k in gone | {keys[i] for i in dirty}])
+
+        order = np.argsort(which, kind="stable")
+        ends  = np.cumsum(counts)
+        rows  = []
+        for i in sorted(dirty):
+            length = (starts[i + 1] - starts[i]).days if i + 1 < len(starts) else None   # None: still running
+            for phase, r in rollup(log[j] for j in order[ends[i] - counts[i]:ends[i]]).items():
+                rows.append((keys[i], phase, length, r["days"], r["energy_sum"], r["energy_days"],
+                             json.dumps(r["symptoms"]), json.dumps(r["moods"])))
+        conn.executemany("INSERT INTO cycle_rollups (cycle_start, phase, length, days, energy_sum, energy_days,"
+                         " symptoms, moods) VALUES (?, ?, ?, ?, ?, ?, ?, ?)", rows)
+        return len(dirty)
+
+
+def ensure(folder: str, cycle_data) -> int:
+    """record() only if the rollups were made from different data (e.g. saved before rollups existed)."""
+    with closing(connect(folder)) as conn:
+        state = dict(conn.execute("SELECT key, value FROM rollup_state"))
+    if (state.get("fingerprint") == _fingerprint(cycle_data)
+            and state.get("entries") == str(len(cycle_data.get("symptoms_log", [])))):
+        return 0
+    return record(folder, cycle_data)
+
+
+# ─────────────────────────────────────────────────
+# READING
+# ─────────────────────────────────────────────────
+def recent(folder: str, cycles: int = WINDOW_CYCLES) -> list:
+    """The newest `cycles` rolled-up cycles, newest first:
+    [{"start", "length", "days", "phases": {phase: rollup}}]."""
+    with closing(connect(folder)) as conn:
+        rows = conn.execute(
+            "SELECT cycle_start, phase, length, days, energy_sum, energy_days, symptoms, moods FROM cycle_rollups"
+            " WHERE cycle_start IN (SELECT DISTINCT cycle_start FROM cycle_rollups ORDER BY cycle_start DESC LIMIT ?)"
+            " ORDER BY cycle_start DESC", (cycles,)).fetchall()
+    window = []
+    for start, phase, length, days, energy_sum, energy_days, symptoms, moods in rows:
+        if not window or window[-1]["start"] != date.fromisoformat(start):
+            window.append({"start": date.fromisoformat(start), "length": length, "days": 0, "phases": {}})
+        window[-1]["days"] += days
+        window[-1]["phases"][phase] = {"days": days, "energy_sum": energy_sum, "energy_days": energy_days,
+                                       "symptoms": Counter(json.loads(symptoms)), "moods": Counter(json.loads(moods))}
+    return window
+
+
+def logged_days(folder: str) -> int:
+    """Entries in the log when the rollups were last recorded."""
+    with closing(connect(folder)) as conn:
+        row = conn.execute("SELECT value FROM rollup_state WHERE key = 'entries'").fetchone()
+    return int(row[0]) if row else 0
+
+
+def weighted(window: list, decay: float = DECAY) -> dict:
+    """{phase: {"days", "energy", "symptoms": [(name, share of days)], "moods": [name]}},
+    each cycle counting `decay` times as much as the next newer one."""
+    totals = {}
+    for age, rolled in enumerate(window):
+        weight = decay ** age
+        for phase, r in rolled["phases"].items():
+            t = totals.setdefault(phase, {"days": 0.0, "raw_days": 0, "energy_sum": 0.0, "energy_days": 0.0,
+                                          "symptoms": Counter(), "moods": Counter()})
+            t["days"]        += weight * r["days"]
+            t["raw_days"]    += r["days"]
+            t["energy_sum"]  += weight * r["energy_sum"]
+            t["energy_days"] += weight * r["energy_days"]
+            for name, n in r["symptoms"].items():
+                t["symptoms"][name] += weight * n
+            for name, n in r["moods"].items():
+                t["moods"][name] += weight * n
+    return {phase: {"days": t["raw_days"],
+                    "energy": t["energy_sum"] / t["energy_days"] if t["energy_days"] else None,
+                    "symptoms": [(name, n / t["days"]) for name, n in t["symptoms"].most_common(TOP_SYMPTOMS)],
+                    "moods": [name for name, _ in t["moods"].most_common(TOP_MOODS)]}
+            for phase, t in totals.items()}
+
+
+def summary(window: list, decay: float = DECAY) -> str:
+    """Compact text for LLM prompts: recency-weighted phase patterns, then one line per cycle."""
+    if not window:
+        return ""
+    phases = weighted(window, decay)
+    lines  = []
+    for phase in cycle.PHASES:
+        p = phases.get(phase)
+        if not p:
+            lines.append(f"**{phase} Phase**: nothing logged in recent cycles")
+            continue
+        energy = f"{p['energy']:.1f}/5" if p["energy"] is not None else "N/A"
+        lines.append(f"**{phase} Phase** ({p['days']} days logged, average energy: {energy}):")
+        lines.append(f"  Symptoms: {', '.join(f'{s} ({share:.0%} of days)' for s, share in p['symptoms']) or 'none logged'}")
+        if p["moods"]:
+            lines.append(f"  Usual moods: {', '.join(p['moods'])}")
+    lines.append("\nCycle by cycle, newest first:")
+    for rolled in window:
+        rows     = rolled["phases"].values()
+        symptoms = sum((r["symptoms"] for r in rows), Counter())
+        e_days   = sum(r["energy_days"] for r in rows)
+        energy   = f"{sum(r['energy_sum'] for r in rows) / e_days:.1f}/5" if e_days else "N/A"
+        length   = f"{rolled['length']} days" if rolled["length"] else "current"
+        top      = "; " + ", ".join(f"{s} {n}d" for s, n in symptoms.most_common(3)) if symptoms else ""
+        lines.append(f"- {rolled['start']:%b %d, %Y} ({length}, {rolled['days']} logged): energy {energy}{top}")
+    return "\n".join(lines)
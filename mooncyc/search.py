@@ -0,0 +1,89 @@
+# ─────────────────────────────────────────────────
+# FULL-TEXT SEARCH
+# ─────────────────────────────────────────────────
+# An FTS5 inverted index in the user's database (see mooncyc/userdb.py) over
+# symptom notes and AI outputs (meditations, meal plans, remedies, fasting
+# advice, insights). Documents are added as they are saved, so searching never
+# scans the log; results are ranked with BM25.
+#
+#   search_docs(kind, day, ref, body)   kind/day/ref are stored, not indexed
+#
+# Notes logged before the index existed are added once on the first search
+# (see storage.search), tracked in search_meta.
+
+import re
+from contextlib import closing
+
+from mooncyc import userdb
+
+KIND_LABELS = {
+    "note": "📝 Note", "meditation": "🧘 Meditation", "meal_plan": "🍽️ Meal plan",
+    "remedy": "🌿 Remedies", "fasting": "⏱️ Fasting", "insights": "🧠 Insights",
+}
+
+_SCHEMA = """
+CREATE VIRTUAL TABLE IF NOT EXISTS search_docs USING fts5(
+    kind UNINDEXED, day UNINDEXED, ref UNINDEXED, body,
+    tokenize = 'porter unicode61 remove_diacritics 2'
+);
+CREATE TABLE IF NOT EXISTS search_meta (key TEXT PRIMARY KEY, value TEXT);"""
+_TERM = re.compile(r"\w+", re.UNICODE)
+
+
+def connect(folder: str):
+    return userdb.connect(folder, _SCHEMA)
+
+
+def add_documents(folder: str, docs):
+    """Indexes (kind, day, ref, text) tuples in one transaction. Empty texts are skipped."""
+    rows = [(kind, day.isoformat() if day else None, ref, text)
+            for kind, day, ref, text in docs if text and text.strip()]
+    if not rows:
+        return
+    with closing(connect(folder)) as conn, conn:
+        conn.executemany("INSERT INTO search_docs (kind, day, ref, body) VALUES (?, ?, ?, ?)", rows)
+
+
+def add_document(folder: str, kind: str, text: str, day=None, ref=None):
+    add_documents(folder, [(kind, day, None if ref is None else str(ref), text)])
+
+
+def notes_indexed(folder: str) -> bool:
+    if not userdb.exists(folder):
+        return False
+    with closing(connect(folder)) as conn:
+        return conn.execute("SELECT 1 FROM search_meta WHERE key = 'notes_indexed'").fetchone() is not None
+
+
+def mark_notes_indexed(folder: str):
+    with closing(connect(folder)) as conn, conn:
+        conn.execute("INSERT OR REPLACE INTO search_meta VALUES ('notes_indexed', '1')")
+
+
+def to_match_query(text: str) -> str:
+    """Turns free user input into an FTS5 query: every word must match, the last one as a prefix."""
+    terms = [t.replace('"', "") for t in _TERM.findall(text)]
+    if not terms:
+        return ""
+    quoted = [f'"{t}"' for t in terms]
+    quoted[-1] += "*"
+    return " ".join(quoted)
+
+
+def search(folder: str, text: str, limit: int = 20, kinds=None) -> list:
+    """Best matches first: [{kind, day, ref, snippet, score}]."""
+    query = to_match_query(text)
+    if not query or not userdb.exists(folder):
+        return []
+    sql = ("SELECT kind, day, ref, snippet(search_docs, 3, '**', '**', '…', 16), bm25(search_docs) "
+           "FROM search_docs WHERE search_docs MATCH ?")
+    params = [query]
+    if kinds:
+        sql += f" AND kind IN ({', '.join('?' * len(kinds))})"
+        params += list(kinds)
+    sql += " ORDER BY bm25(search_docs) LIMIT ?"
+    params.append(limit)
+    with closing(connect(folder)) as conn:
+        rows = conn.execute(sql, params).fetchall()
+    return [{"kind": kind, "day": day, "ref": ref, "snippet": snippet, "score": round(-score, 3)}
+            for kind, day, ref, snippet, score in rows]
@@ -0,0 +1,87 @@
+# ─────────────────────────────────────────────────
+# REQUEST COALESCING (single-flight)
+# ─────────────────────────────────────────────────
+# When several sessions ask for the same generation at the same time
+# (same phase, same symptom set, same age...), only the first one calls the
+# LLM. The others wait on its future and get a copy of the same result.
+# Nothing is cached after the call finishes — this only merges requests that
+# are in flight together.
+
+import copy
+import functools
+import inspect
+import json
+import threading
+from concurrent.futures import Future
+
+from mooncyc import usage
+
+
+class SingleFlight:
+    def __init__(self):
+        self._lock     = threading.Lock()
+        self._inflight = {}
+        self.leaders   = 0
+        self.coalesced = 0
+
+    def do(self, key: str, fn, *args, **kwargs) -> tuple:
+        """Runs fn once per key at a time. Returns (result, was_coalesced)."""
+        with self._lock:
+            future = self._inflight.get(key)
+            leader = future is None
+            if leader:
+                future = self._inflight[key] = Future()
+                self.leaders += 1
+            else:
+                self.coalesced += 1
+
+        if not leader:
+            return copy.deepcopy(future.result()), True
+
+        try:
+            result = fn(*args, **kwargs)
+            future.set_result(result)
+            return result, False
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        finally:
+            with self._lock:
+                del self._inflight[key]
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {"leaders": self.leaders, "coalesced": self.coalesced,
+                    "in_flight": len(self._inflight)}
+
+
+_flight = SingleFlight()
+
+
+def stats() -> dict:
+    return _flight.stats()
+
+
+def canonical_key(feature: str, params: dict, unordered=()) -> str:
+    """Order-insensitive for the `unordered` params (e.g. a symptom list built from a set)."""
+    normalized = {k: sorted(v) if k in unordered and v else v for k, v in params.items()}
+    return feature + ":" + json.dumps(normalized, sort_keys=True, default=str)
+
+
+def coalesced(feature: str, unordered=("symptoms",), flight: SingleFlight = None):
+    """Decorator: identical concurrent calls of the wrapped generation share one call.
+    Coalesced callers are written to the usage ledger as cache hits."""
+    def decorator(fn):
+        signature = inspect.signature(fn)
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            bound = signature.bind(*args, **kwargs)
+            bound.apply_defaults()
+            key = canonical_key(feature, bound.arguments, unordered)
+            result, was_coalesced = (flight or _flight).do(key, fn, *args, **kwargs)
+            if was_coalesced:
+                usage.record(feature, "", cache_hit=True)
+            return result
+        return wrapper
+    return decorator
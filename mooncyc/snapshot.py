@@ -0,0 +1,185 @@
+# ─────────────────────────────────────────────────
+# BINARY CYCLE-DATA SNAPSHOTS
+# ─────────────────────────────────────────────────
+# A compact columnar alternative to the pretty-printed cycle_data.json.
+#
+#   header   magic "MCYC", format version, length of the metadata block
+#   metadata JSON: settings, row count, string tables, column directory
+#   columns  packed arrays, 8-byte aligned, little-endian
+#
+#   date       int32  date ordinals
+#   phase      int8   index into the phase table (-1 = none)
+#   mood       int16  index into the mood table (-1 = none)
+#   energy     int8   1-5 (0 = none)
+#   sym_start  uint32 row i's symptoms are sym_codes[sym_start[i]:sym_start[i+1]]
+#   sym_codes  uint16 index into the symptom table
+#   note_id    int32  record in the user's notes blob (-1 = no note)
+#
+# Files are memory-mapped on load and only the structured columns are decoded.
+# Note text is not part of the snapshot (see mooncyc/notes.py).
+
+import json
+import mmap
+import struct
+import sys
+from array import array
+from datetime import date
+
+MAGIC   = b"MCYC"
+VERSION = 1
+HEADER  = struct.Struct("<4sHxxI")   # magic, version, padding, metadata length
+
+COLUMN_TYPES = {
+    "date": "i", "phase": "b", "mood": "h", "energy": "b",
+    "sym_start": "I", "sym_codes": "H", "note_id": "i",
+}
+WRITTEN_COLUMNS = ("date", "phase", "mood", "energy", "sym_start", "sym_codes", "note_id")
+
+
+def _align(n: int) -> int:
+    return (n + 7) & ~7
+
+
+def _to_le(arr: array) -> bytes:
+    if sys.byteorder == "big" and arr.itemsize > 1:
+        arr = array(arr.typecode, arr)
+        arr.byteswap()
+    return arr.tobytes()
+
+
+def _from_le(buf, typecode: str) -> array:
+    arr = array(typecode)
+    arr.frombytes(buf)
+    if sys.byteorder == "big" and arr.itemsize > 1:
+        arr.byteswap()
+    return arr
+
+
+def _index(table: list, lookup: dict, value) -> int:
+    if value is None or value == "":
+        return -1
+    if value not in lookup:
+        lookup[value] = len(table)
+        table.append(value)
+    return lookup[value]
+
+
+# ─────────────────────────────────────────────────
+# WRITE
+# ─────────────────────────────────────────────────
+def encode_snapshot(data: dict) -> bytes:
+    """Packs cycle data into snapshot bytes. Entries must reference their note
+    by "note_id" (storage moves inline notes into the notes blob first)."""
+    log = data.get("symptoms_log", [])
+    phases, moods, symptoms = [], [], []
+    phase_ix, mood_ix, symptom_ix = {}, {}, {}
+
+    cols = {name: array(COLUMN_TYPES[name]) for name in WRITTEN_COLUMNS}
+    cols["sym_start"].append(0)
+
+    for entry in log:
+        cols["date"].append(entry["date"].toordinal())
+        cols["phase"].append(_index(phases, phase_ix, entry.get("phase")))
+        cols["mood"].append(_index(moods, mood_ix, entry.get("mood")))
+        cols["energy"].append(int(entry.get("energy") or 0))
+        for s in entry.get("symptoms", ()):
+            cols["sym_codes"].append(_index(symptoms, symptom_ix, s))
+        cols["sym_start"].append(len(cols["sym_codes"]))
+        cols["note_id"].append(entry.get("note_id", -1))
+
+    blobs = {name: _to_le(arr) for name, arr in cols.items()}
+
+    directory, offset = {}, 0
+    for name, blob in blobs.items():
+        directory[name] = [offset, len(blob)]
+        offset = _align(offset + len(blob))
+
+    settings = {k: v for k, v in data.items() if k != "symptoms_log"}
+    if settings.get("last_period"):
+        settings["last_period"] = settings["last_period"].isoformat()
+    if settings.get("period_starts"):
+        settings["period_starts"] = [d.isoformat() for d in settings["period_starts"]]
+    meta = json.dumps({"settings": settings, "rows": len(log), "phases": phases,
+                       "moods": moods, "symptoms": symptoms, "columns": directory},
+                      default=str).encode("utf-8")
+
+    out = bytearray(HEADER.pack(MAGIC, VERSION, len(meta)))
+    out += meta
+    out += b"\0" * (_align(len(out)) - len(out))
+    start = len(out)
+    for name, blob in blobs.items():
+        out += b"\0" * (start + directory[name][0] - len(out))
+        out += blob
+    return bytes(out)
+
+
+def write_snapshot(path: str, data: dict):
+    with open(path, "wb") as f:
+        f.write(encode_snapshot(data))
+
+
+# ─────────────────────────────────────────────────
+# READ
+# ─────────────────────────────────────────────────
+class Snapshot:
+    """A memory-mapped snapshot. Columns are decoded only when asked for."""
+
+    def __init__(self, path: str):
+        self._file = open(path, "rb")
+        self._mm   = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, meta_len = HEADER.unpack_from(self._mm, 0)
+        if magic != MAGIC:
+            raise ValueError(f"{path} is not a Mooncyc snapshot")
+        if version != VERSION:
+            raise ValueError(f"{path} uses snapshot format v{version}; this build reads v{VERSION}")
+        self.meta    = json.loads(self._mm[HEADER.size:HEADER.size + meta_len])
+        self._start  = _align(HEADER.size + meta_len)
+        self.rows    = self.meta["rows"]
+
+    def column(self, name: str) -> array:
+        offset, length = self.meta["columns"][name]
+        start = self._start + offset
+        return _from_le(self._mm[start:start + length], COLUMN_TYPES[name])
+
+    def close(self):
+        self._mm.close()
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def read_snapshot(path: str) -> dict:
+    """Decodes a snapshot into the usual cycle-data dict (dates as `date`).
+    Entries with a note carry its "note_id", never the text."""
+    with Snapshot(path) as snap:
+        meta = snap.meta
+        data = dict(meta["settings"])
+        if data.get("last_period"):
+            data["last_period"] = date.fromisoformat(data["last_period"])
+        if data.get("period_starts"):
+            data["period_starts"] = [date.fromisoformat(d) for d in data["period_starts"]]
+
+        dates, phase_c, mood_c = snap.column("date"), snap.column("phase"), snap.column("mood")
+        energy, sym_start, sym_codes = snap.column("energy"), snap.column("sym_start"), snap.column("sym_codes")
+        phases, moods, symptoms = meta["phases"], meta["moods"], meta["symptoms"]
+        note_ids = snap.column("note_id")
+
+        log = []
+        for i in range(snap.rows):
+            entry = {
+                "date": date.fromordinal(dates[i]),
+                "phase": phases[phase_c[i]] if phase_c[i] >= 0 else None,
+                "mood": moods[mood_c[i]] if mood_c[i] >= 0 else None,
+                "energy": energy[i] or None,
+                "symptoms": [symptoms[c] for c in sym_codes[sym_start[i]:sym_start[i + 1]]],
+            }
+            if note_ids[i] >= 0:
+                entry["note_id"] = note_ids[i]
+            log.append(entry)
+        data["symptoms_log"] = log
+    return data
+
@@ -0,0 +1,421 @@
+# ─────────────────────────────────────────────────
+# PER-USER STORAGE
+# ─────────────────────────────────────────────────
+# Each user gets their own folder under DATA_ROOT, sharded by a hash prefix so
+# no directory holds more than a few hundred users even with tens of thousands
+# of them:
+#
+#   DATA_ROOT/users/3f/a2/<user_id>/cycle_data.json   (or cycle_data.mcyc)
+#   DATA_ROOT/users/3f/a2/<user_id>/tasks.json
+#   DATA_ROOT/users/3f/a2/<user_id>/notes.blob + notes.idx
+#
+# Free-text notes are moved out of the symptom log on save into the user's
+# append-only notes blob (see mooncyc/notes.py); entries keep a "note_id" and
+# the text is only read when someone looks at that day. New notes are also
+# added to the user's full-text index (see mooncyc/search.py), and the
+# per-cycle rollups of the cycles that changed are refreshed (see
+# mooncyc/rollups.py).
+#
+# With MOONCYC_STORAGE_FORMAT=binary, cycle data is saved as a compact
+# columnar snapshot (see mooncyc/snapshot.py) instead of JSON. JSON stays
+# available for import/export either way.
+#
+# Datasets are read lazily the first time a user shows up and kept parsed in
+# a process-wide LRU of hot users shared by every session. Each cached copy
+# remembers the file's mtime/size and is re-read only if the file changed on
+# disk (e.g. another server process wrote it); saves replace the cached copy.
+#
+# The single-user app kept cycle_data.json and tasks.json in its working
+# directory. They are moved into one named user's folder explicitly:
+#
+#   python -m mooncyc.storage --migrate-legacy <user_id> [--from DIR]
+#
+# Both files go to that user (who must have no data yet) and are then renamed
+# to <name>.migrated.
+#
+# Cached entries and tasks are frozen (read-only mappings), so sessions get
+# cheap copy-on-write views: their own top-level dict and list pointing at the
+# shared frozen entries. Appending or removing items only touches the
+# session's list; the shared data never changes under another session.
+
+import argparse
+import hashlib
+import json
+import os
+import re
+import tempfile
+import threading
+from collections import OrderedDict
+from datetime import date
+from types import MappingProxyType
+
+from mooncyc import notes, rollups, search as fulltext, snapshot
+
+DATA_ROOT  = os.getenv("MOONCYC_DATA_ROOT", "mooncyc_data")
+HOT_USERS  = int(os.getenv("MOONCYC_HOT_USERS", "256"))
+CYCLE_FILE = "cycle_data.json"
+TASKS_FILE = "tasks.json"
+SNAPSHOT_FILE  = "cycle_data.mcyc"
+STORAGE_FORMAT = os.getenv("MOONCYC_STORAGE_FORMAT", "json")   # "json" or "binary"
+
+_USER_ID = re.compile(r"^[A-Za-z0-9_-]{1,64}$")
+
+_lock     = threading.Lock()
+_hot      = OrderedDict()   # (user_id, file name) -> (file signature, frozen dataset)
+_versions = {}              # (user_id, file name) -> saves made by this process
+
+
+def valid_user_id(user_id) -> bool:
+    return isinstance(user_id, str) and bool(_USER_ID.match(user_id))
+
+
+def user_dir(user_id: str) -> str:
+    if not valid_user_id(user_id):
+        raise ValueError(f"Invalid user id: {user_id!r}")
+    digest = hashlib.sha1(user_id.encode("utf-8")).hexdigest()
+    return os.path.join(DATA_ROOT, "users", digest[:2], digest[2:4], user_id)
+
+
+def user_file(user_id: str, name: str) -> str:
+    return os.path.join(user_dir(user_id), name)
+
+
+def iter_user_ids():
+    """Yields every user id that has a folder under DATA_ROOT."""
+    users_root = os.path.join(DATA_ROOT, "users")
+    if not os.path.isdir(users_root):
+        return
+    for shard in sorted(os.listdir(users_root)):
+        for sub in sorted(os.listdir(os.path.join(users_root, shard))):
+            for user_id in sorted(os.listdir(os.path.join(users_root, shard, sub))):
+                if valid_user_id(user_id):
+                    yield user_id
+
+
+def _write_file(path: str, payload: bytes):
+    """Writes through a temp file in the same folder, so readers never see a half-written
+    file and concurrent saves don't share one. The temp file is removed if anything fails."""
+    folder = os.path.dirname(path)
+    os.makedirs(folder, exist_ok=True)
+    f = tempfile.NamedTemporaryFile(dir=folder, suffix=".tmp", delete=False)
+    try:
+        with f:
+            f.write(payload)
+        os.replace(f.name, path)
+    except BaseException:
+        os.remove(f.name)
+        raise
+
+
+def _write_json(path: str, payload):
+    _write_file(path, json.dumps(payload, indent=2).encode("utf-8"))
+
+
+# ─────────────────────────────────────────────────
+# PARSING / SERIALIZING
+# ─────────────────────────────────────────────────
+def empty_cycle_data() -> dict:
+    return {"last_period": None, "cycle_length": 28, "period_length": 5, "symptoms_log": []}
+
+
+def parse_cycle_data(data: dict) -> dict:
+    if data.get("last_period"):
+        data["last_period"] = date.fromisoformat(data["last_period"])
+    if data.get("period_starts"):
+        data["period_starts"] = [date.fromisoformat(d) for d in data["period_starts"]]
+    for entry in data.get("symptoms_log", []):
+        if "date" in entry:
+            entry["date"] = date.fromisoformat(entry["date"])
+    return data
+
+
+def serialize_cycle_data(data: dict) -> dict:
+    data_copy = dict(data)
+    if data_copy.get("last_period"):
+        data_copy["last_period"] = data_copy["last_period"].isoformat()
+    if data_copy.get("period_starts"):
+        data_copy["period_starts"] = [d.isoformat() for d in data_copy["period_starts"]]
+    symptoms_copy = []
+    for entry in data_copy.get("symptoms_log", []):
+        entry_copy = dict(entry)
+        if "date" in entry_copy:
+            entry_copy["date"] = entry_copy["date"].isoformat()
+        if isinstance(entry_copy.get("symptoms"), tuple):
+            entry_copy["symptoms"] = list(entry_copy["symptoms"])
+        symptoms_copy.append(entry_copy)
+    data_copy["symptoms_log"] = symptoms_copy
+    return data_copy
+
+
+def parse_tasks(tasks: list) -> list:
+    for task in tasks:
+        if task.get("deadline"):
+            task["deadline"] = date.fromisoformat(task["deadline"])
+    return tasks
+
+
+def serialize_tasks(tasks: list) -> list:
+    tasks_copy = []
+    for task in tasks:
+        t = dict(task)
+        if t.get("deadline"):
+            t["deadline"] = t["deadline"].isoformat()
+        tasks_copy.append(t)
+    return tasks_copy
+
+
+# ─────────────────────────────────────────────────
+# FROZEN SHARED DATA + COPY-ON-WRITE VIEWS
+# ─────────────────────────────────────────────────
+def freeze_entry(entry, owned: bool = False) -> MappingProxyType:
+    """Read-only version of an entry. `owned` entries (fresh from disk) are wrapped in place."""
+    if isinstance(entry, MappingProxyType):
+        return entry
+    frozen = entry if owned else dict(entry)
+    if isinstance(frozen.get("symptoms"), list):
+        frozen["symptoms"] = tuple(frozen["symptoms"])
+    return MappingProxyType(frozen)
+
+
+def freeze_cycle_data(data: dict, owned: bool = False) -> MappingProxyType:
+    log    = tuple(freeze_entry(e, owned) for e in data.get("symptoms_log", []))
+    frozen = {**data, "symptoms_log": log}
+    if "period_starts" in data:
+        frozen["period_starts"] = tuple(data["period_starts"])
+    return MappingProxyType(frozen)
+
+
+def freeze_tasks(tasks: list) -> tuple:
+    return tuple(t if isinstance(t, MappingProxyType) else MappingProxyType(dict(t)) for t in tasks)
+
+
+def cycle_data_view(frozen) -> dict:
+    """A private dict and list for one session, over the shared frozen entries."""
+    view = {**frozen, "symptoms_log": list(frozen["symptoms_log"])}
+    if "period_starts" in frozen:
+        view["period_starts"] = list(frozen["period_starts"])
+    return view
+
+
+def tasks_view(frozen) -> list:
+    return list(frozen)
+
+
+# ─────────────────────────────────────────────────
+# HOT-USER CACHE
+# ─────────────────────────────────────────────────
+def _signature(path: str):
+    try:
+        stat = os.stat(path)
+    except FileNotFoundError:
+        return None
+    return (stat.st_mtime_ns, stat.st_size)
+
+
+def _cached(user_id: str, name: str, path: str, read, freeze):
+    key       = (user_id, name)
+    signature = _signature(path)
+    with _lock:
+        hit = _hot.get(key)
+        if hit is not None and hit[0] == signature:
+            _hot.move_to_end(key)
+            return hit[1]
+    value = freeze(read())
+    _remember(key, signature, value)
+    return value
+
+
+def _remember(key: tuple, signature, value):
+    with _lock:
+        _hot[key] = (signature, value)
+        _hot.move_to_end(key)
+        while len(_hot) > HOT_USERS * 2:   # two datasets per user
+            _hot.popitem(last=False)
+
+
+def _saved(user_id: str, name: str, path: str, value):
+    key = (user_id, name)
+    with _lock:
+        _versions[key] = _versions.get(key, 0) + 1
+    _remember(key, _signature(path), value)
+
+
+def dataset_version(user_id: str, name: str = CYCLE_FILE) -> int:
+    """Goes up on every save in this process — a cheap cache key for derived data."""
+    with _lock:
+        return _versions.get((user_id, name), 0)
+
+
+def invalidate(user_id: str = None):
+    """Drops the cached datasets of one user (or of everyone)."""
+    with _lock:
+        for key in [k for k in _hot if user_id is None or k[0] == user_id]:
+            del _hot[key]
+
+
+def _cycle_path(user_id: str) -> str:
+    """The file cycle data is read from: the configured format's file if it exists, else the other one."""
+    json_path, snapshot_path = user_file(user_id, CYCLE_FILE), user_file(user_id, SNAPSHOT_FILE)
+    preferred, other = (snapshot_path, json_path) if STORAGE_FORMAT == "binary" else (json_path, snapshot_path)
+    return other if os.path.exists(other) and not os.path.exists(preferred) else preferred
+
+
+def _read_cycle_data(user_id: str) -> dict:
+    path = _cycle_path(user_id)
+    if not os.path.exists(path):
+        return empty_cycle_data()
+    if path.endswith(SNAPSHOT_FILE):
+        return snapshot.read_snapshot(path)
+    with open(path, "r") as f:
+        return parse_cycle_data(json.load(f))
+
+
+def entry_note(user_id: str, entry) -> str:
+    """An entry's note text, fetched from the notes blob on demand."""
+    if "notes" in entry:
+        return entry["notes"] or ""
+    if "note_id" in entry:
+        return notes.read_note(user_dir(user_id), entry["note_id"])
+    return ""
+
+
+def _read_tasks(user_id: str) -> list:
+    path = user_file(user_id, TASKS_FILE)
+    if not os.path.exists(path):
+        return []
+    with open(path, "r") as f:
+        return parse_tasks(json.load(f))
+
+
+# ─────────────────────────────────────────────────
+# PUBLIC API
+# ─────────────────────────────────────────────────
+def load_cycle_data(user_id: str) -> dict:
+    frozen = _cached(user_id, CYCLE_FILE, _cycle_path(user_id), lambda: _read_cycle_data(user_id),
+                     lambda data: freeze_cycle_data(data, owned=True))
+    return cycle_data_view(frozen)
+
+
+def _store_notes(user_id: str, data: dict):
+    """Moves inline notes into the notes blob. Entries are replaced in the
+    caller's list by ones carrying a note_id."""
+    folder  = user_dir(user_id)
+    log     = data.get("symptoms_log", [])
+    indexed = []
+    for i, entry in enumerate(log):
+        if "notes" not in entry:
+            continue
+        text  = entry_note(user_id, entry)
+        moved = {k: v for k, v in entry.items() if k != "notes"}
+        if text:
+            moved["note_id"] = notes.append_note(folder, text)
+            indexed.append(("note", moved.get("date"), str(moved["note_id"]), text))
+        log[i] = moved
+    if indexed and fulltext.notes_indexed(folder):   # otherwise the first search picks them up
+        fulltext.add_documents(folder, indexed)
+
+
+def save_cycle_data(user_id: str, data: dict):
+    _store_notes(user_id, data)
+    if STORAGE_FORMAT == "binary":
+        path = user_file(user_id, SNAPSHOT_FILE)
+        _write_file(path, snapshot.encode_snapshot(data))
+    else:
+        path = user_file(user_id, CYCLE_FILE)
+        _write_json(path, serialize_cycle_data(data))
+    rollups.record(user_dir(user_id), data)
+    _saved(user_id, CYCLE_FILE, path, freeze_cycle_data(data))
+
+
+def load_tasks(user_id: str) -> list:
+    path = user_file(user_id, TASKS_FILE)
+    return tasks_view(_cached(user_id, TASKS_FILE, path, lambda: _read_tasks(user_id), freeze_tasks))
+
+
+def save_tasks(user_id: str, tasks: list):
+    path = user_file(user_id, TASKS_FILE)
+    _write_json(path, serialize_tasks(tasks))
+    _saved(user_id, TASKS_FILE, path, freeze_tasks(tasks))
+
+
+# ─────────────────────────────────────────────────
+# JSON IMPORT / EXPORT
+# ─────────────────────────────────────────────────
+def with_notes(user_id: str, data: dict) -> dict:
+    """Cycle data with every note's text filled in (for JSON and exports)."""
+    if not any("note_id" in e for e in data.get("symptoms_log", [])):
+        return data
+    log = []
+    for entry in data["symptoms_log"]:
+        resolved = {k: v for k, v in entry.items() if k != "note_id"}
+        resolved["notes"] = entry_note(user_id, entry)
+        log.append(resolved)
+    return {**data, "symptoms_log": log}
+
+
+def export_json(user_id: str) -> str:
+    return json.dumps(serialize_cycle_data(with_notes(user_id, load_cycle_data(user_id))), indent=2)
+
+
+def import_json(user_id: str, text: str):
+    save_cycle_data(user_id, parse_cycle_data(json.loads(text)))
+
+
+# ─────────────────────────────────────────────────
+# SEARCH
+# ─────────────────────────────────────────────────
+def search(user_id: str, text: str, limit: int = 20, kinds=None) -> list:
+    """Ranked full-text search over the user's notes and saved AI outputs."""
+    folder = user_dir(user_id)
+    if not fulltext.notes_indexed(folder):
+        log = load_cycle_data(user_id)["symptoms_log"]
+        fulltext.add_documents(folder, [
+            ("note", e.get("date"), str(e["note_id"]) if "note_id" in e else None, entry_note(user_id, e))
+            for e in log if "note_id" in e or e.get("notes")])
+        fulltext.mark_notes_indexed(folder)
+    return fulltext.search(folder, text, limit, kinds)
+
+
+# ─────────────────────────────────────────────────
+# SINGLE-USER MIGRATION
+# ─────────────────────────────────────────────────
+def migrate_legacy(user_id: str, folder: str = ".") -> dict:
+    """Moves the single-user app's cycle_data.json and tasks.json from `folder`
+    into `user_id`'s data, then renames them to <name>.migrated."""
+    paths = {name: os.path.join(folder, name) for name in (CYCLE_FILE, TASKS_FILE)}
+    found = {name: path for name, path in paths.items() if os.path.exists(path)}
+    if not found:
+        raise ValueError(f"no {CYCLE_FILE} or {TASKS_FILE} in {folder}")
+    if os.path.exists(_cycle_path(user_id)) or os.path.exists(user_file(user_id, TASKS_FILE)):
+        raise ValueError(f"user {user_id} already has data; not overwriting it")
+    loaded = {}
+    for name, path in found.items():   # read both before saving either
+        with open(path, "r") as f:
+            loaded[name] = json.load(f)
+    if CYCLE_FILE in loaded:
+        save_cycle_data(user_id, parse_cycle_data(loaded[CYCLE_FILE]))
+    if TASKS_FILE in loaded:
+        save_tasks(user_id, parse_tasks(loaded[TASKS_FILE]))
+    for path in found.values():
+        os.replace(path, path + ".migrated")
+    return {"entries": len(loaded.get(CYCLE_FILE, {}).get("symptoms_log", [])),
+            "tasks": len(loaded.get(TASKS_FILE, []))}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Mooncyc per-user storage")
+    parser.add_argument("--migrate-legacy", metavar="USER_ID", required=True,
+                        help="move the single-user app's cycle_data.json and tasks.json to this user")
+    parser.add_argument("--from", dest="folder", default=".", help="where those files are (default: .)")
+    args = parser.parse_args(argv)
+    if not valid_user_id(args.migrate_legacy):
+        parser.error(f"invalid user id: {args.migrate_legacy!r}")
+    try:
+        moved = migrate_legacy(args.migrate_legacy, args.folder)
+    except ValueError as e:
+        parser.error(str(e))
+    print(f"Moved {moved['entries']} entries and {moved['tasks']} tasks to {user_dir(args.migrate_legacy)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,222 @@
+# ─────────────────────────────────────────────────
+# STRUCTURED LLM OUTPUT
+# ─────────────────────────────────────────────────
+# The meal plan and fasting advisor need a fixed set of fields back from the
+# LLM. We ask Cohere for a JSON object that follows a schema, validate it, and
+# if the model still answers in "LABEL: value" text (with markdown, bold labels
+# or values spread over several lines) we fall back to a tolerant label parser
+# that also accepts streamed chunks. Whatever is still missing afterwards can be
+# re-requested on its own instead of regenerating the whole answer.
+#
+# The cycle plan (mooncyc/plan.py) asks for every remaining day of the cycle
+# at once, grouped by phase: short per-day fields (PLAN_DAY_FIELDS) and the
+# explanations each phase shares (PLAN_PHASE_FIELDS). parse_plan() validates
+# it day by day, so only incomplete days need asking for again.
+
+import json
+import re
+
+# (key, label the model sees in text answers, what the field should contain)
+MEAL_PLAN_FIELDS = (
+    ("breakfast", "BREAKFAST", "breakfast meal with emoji"),
+    ("lunch",     "LUNCH",     "lunch meal with emoji"),
+    ("dinner",    "DINNER",    "dinner meal with emoji"),
+    ("snacks",    "SNACKS",    "snacks with emoji"),
+    ("why",       "WHY",       "1-2 sentences on the nutritional logic for this phase, symptoms, and age"),
+)
+
+FASTING_FIELDS = (
+    ("recommendation", "RECOMMENDATION", "Good day to fast / Not recommended today"),
+    ("max_hours",      "MAX HOURS",      "e.g. 14 hours, or N/A if not recommended"),
+    ("reason",         "REASON",         "2-3 sentences explaining why, referencing the specific phase and symptoms"),
+    ("tip",            "TIP",            "one specific, practical tip for today — either how to do the fast safely, or what to eat instead if not fasting"),
+)
+
+
+# A whole-cycle plan: short per-day fields, plus the explanations shared by a phase
+PLAN_DAY_FIELDS = (
+    ("breakfast",      "BREAKFAST",      "breakfast with emoji, at most 10 words"),
+    ("lunch",          "LUNCH",          "lunch with emoji, at most 10 words"),
+    ("dinner",         "DINNER",         "dinner with emoji, at most 10 words"),
+    ("snacks",         "SNACKS",         "snacks with emoji, at most 8 words"),
+    ("recommendation", "RECOMMENDATION", "Good day to fast / Not recommended today"),
+    ("max_hours",      "MAX HOURS",      "e.g. 14 hours, or N/A if not recommended"),
+    ("tip",            "TIP",            "one practical fasting or eating tip for the day, at most 20 words"),
+    ("theme",          "THEME",          "meditation theme for the day, at most 6 words"),
+    ("affirmation",    "AFFIRMATION",    "one-sentence affirmation for the day"),
+)
+
+PLAN_PHASE_FIELDS = (
+    ("why",    "WHY",    "1-2 sentences on the nutritional logic for this phase, symptoms, and age"),
+    ("reason", "REASON", "1-2 sentences on why fasting does or doesn't suit this phase"),
+)
+
+
+def json_schema(fields) -> dict:
+    return {
+        "type": "object",
+        "properties": {key: {"type": "string", "description": desc} for key, _, desc in fields},
+        "required": [key for key, _, _ in fields],
+    }
+
+
+def response_format(fields) -> dict:
+    """The `response_format` argument for co.chat asking for schema-valid JSON."""
+    return {"type": "json_object", "json_schema": json_schema(fields)}
+
+
+def plan_schema(days) -> dict:
+    """Schema for a plan of `days` [(date, phase)]: {phase: {why, reason, "<ISO date>": {day fields}}}."""
+    phases = {}
+    for day, phase in days:
+        group = phases.setdefault(phase, json_schema(PLAN_PHASE_FIELDS))
+        group["properties"][day.isoformat()] = json_schema(PLAN_DAY_FIELDS)
+        group["required"].append(day.isoformat())
+    return {"type": "object", "properties": phases, "required": list(phases)}
+
+
+def plan_response_format(days) -> dict:
+    return {"type": "json_object", "json_schema": plan_schema(days)}
+
+
+def format_instructions(fields) -> str:
+    lines = [f'  "{key}": {desc}' for key, _, desc in fields]
+    return "Respond ONLY with a JSON object with these keys:\n" + "\n".join(lines)
+
+
+def missing_fields(result: dict, fields) -> list:
+    return [key for key, _, _ in fields if not result.get(key)]
+
+
+# ─────────────────────────────────────────────────
+# JSON PARSING
+# ─────────────────────────────────────────────────
+def parse_json(raw: str, fields) -> dict:
+    """Returns the known fields found in a JSON answer (code fences allowed), or {}."""
+    start, end = raw.find("{"), raw.rfind("}")
+    if start == -1 or end <= start:
+        return {}
+    try:
+        data = json.loads(raw[start:end + 1])
+    except ValueError:
+        return {}
+    if not isinstance(data, dict):
+        return {}
+    result = {}
+    for key, _, _ in fields:
+        value = data.get(key)
+        if value is not None and str(value).strip():
+            result[key] = str(value).strip()
+    return result
+
+
+def _fields_of(data, fields) -> dict:
+    """The known, non-empty fields of one parsed JSON object."""
+    if not isinstance(data, dict):
+        return {}
+    return {key: str(data[key]).strip() for key, _, _ in fields
+            if data.get(key) is not None and str(data[key]).strip()}
+
+
+def parse_plan(raw: str, days) -> tuple:
+    """Returns ({date: day fields + its phase's fields}, [dates missing a field]) from a plan answer.
+    An answer cut off mid-way (output token limit) still yields every day that was completed."""
+    start, end = raw.find("{"), raw.rfind("}")
+    try:
+        data = json.loads(raw[start:end + 1]) if start != -1 and end > start else {}
+    except ValueError:
+        data = {}
+    if not isinstance(data, dict):
+        data = {}
+    # day objects are flat, so complete ones can be picked out of a truncated answer
+    loose = {m.group(1): m.group(2) for m in re.finditer(r'"(\d{4}-\d{2}-\d{2})"\s*:\s*(\{[^{}]*\})', raw)}
+
+    plan, missing = {}, []
+    for day, phase in days:
+        key   = day.isoformat()
+        group = data.get(phase) if isinstance(data.get(phase), dict) else {}
+        found = _fields_of(group.get(key) or data.get(key), PLAN_DAY_FIELDS)
+        if not found and key in loose:
+            try:
+                found = _fields_of(json.loads(loose[key]), PLAN_DAY_FIELDS)
+            except ValueError:
+                pass
+        if missing_fields(found, PLAN_DAY_FIELDS):
+            missing.append(day)
+            continue
+        shared    = _fields_of(group, PLAN_PHASE_FIELDS)
+        plan[day] = {**{k: shared.get(k, "") for k, _, _ in PLAN_PHASE_FIELDS}, **found}
+    return plan, missing
+
+
+# ─────────────────────────────────────────────────
+# TOLERANT LABEL PARSER
+# ─────────────────────────────────────────────────
+class LabelParser:
+    """Incremental "LABEL: value" parser.
+
+    Accepts `- **Breakfast:** ...`, `## LUNCH: ...`, `**Max hours**: ...` etc.
+    Lines after a label that don't start a new label are appended to that
+    field, so multi-line values survive. Feed it chunks as they stream in.
+    """
+
+    def __init__(self, fields):
+        self.fields  = fields
+        self.values  = {key: [] for key, _, _ in fields}
+        self.current = None
+        self._buffer = ""
+        by_label = {label.lower(): key for key, label, _ in fields}
+        labels   = sorted(by_label, key=len, reverse=True)
+        self._label_to_key = {re.sub(r"\s+", " ", label): key for label, key in by_label.items()}
+        alternation = "|".join(r"\s+".join(map(re.escape, label.split())) for label in labels)
+        self._pattern = re.compile(
+            r"^[\s>#*_\-•\d.\"]*?(?:\*\*|__)?\s*(" + alternation + r")\"?\s*(?:\*\*|__)?\s*:\s*(?:\*\*|__)?\s*(.*)$",
+            re.IGNORECASE)
+
+    def feed(self, chunk: str):
+        self._buffer += chunk
+        *lines, self._buffer = self._buffer.split("\n")
+        for line in lines:
+            self._feed_line(line)
+
+    def close(self) -> dict:
+        if self._buffer:
+            self._feed_line(self._buffer)
+            self._buffer = ""
+        return self.result()
+
+    def result(self) -> dict:
+        return {key: " ".join(parts).strip() for key, parts in self.values.items()}
+
+    def _feed_line(self, line: str):
+        match = self._pattern.match(line)
+        if match:
+            label = re.sub(r"\s+", " ", match.group(1).lower())
+            self.current = self._label_to_key[label]
+            line = match.group(2)
+        if self.current is None:
+            return   # preamble before the first label
+        text = line.strip().strip('*_",').strip()
+        if text:
+            self.values[self.current].append(text)
+
+
+def parse_labels(raw: str, fields) -> dict:
+    parser = LabelParser(fields)
+    parser.feed(raw)
+    return {k: v for k, v in parser.close().items() if v}
+
+
+def parse_structured(raw: str, fields) -> tuple:
+    """Returns (result_dict_with_every_key, missing_keys) from a JSON or labelled answer."""
+    found = parse_json(raw, fields) or parse_labels(raw, fields)
+    result = {key: found.get(key, "") for key, _, _ in fields}
+    return result, missing_fields(result, fields)
+
+
+def repair_message(missing: list, fields) -> str:
+    """Follow-up user message asking only for the fields that came back empty."""
+    wanted = [f for f in fields if f[0] in missing]
+    return ("Your previous answer was missing some fields. "
+            + format_instructions(wanted)
+            + "\nKeep everything else you said unchanged; only return these keys.")
@@ -0,0 +1,326 @@
+# ─────────────────────────────────────────────────
+# OFFLINE API STUBS
+# ─────────────────────────────────────────────────
+# A local HTTP server that answers like the external APIs the apps call, so
+# they (and the benchmarks) run without network access or API keys:
+#
+#   POST /v2/chat                        Cohere V2 chat (JSON or SSE with "stream": true)
+#   POST /v1/messages                    Anthropic messages (JSON or SSE with "stream": true)
+#   POST /v1/text-to-speech/<voice_id>   ElevenLabs TTS (chunked audio/mpeg)
+#   GET  /api/random                     ZenQuotes
+#
+# Run it and point the apps at it:
+#
+#   python -m mooncyc.stubs --port 8787 --seed 1
+#   MOONCYC_STUB_URL=http://127.0.0.1:8787 streamlit run app_v2.py
+#
+# Each provider has a latency distribution (log-normal: median ms and
+# spread), an error rate (answered as 429 with Retry-After, or 500), and a
+# payload size (characters of text; for audio, bytes per 1000 characters
+# read). Set them with --profile cohere.median_ms=1500 or a JSON file (--config). With a seed, the
+# n-th request of the server always gets the same latency, error and text.
+#
+# Chat answers that ask for a JSON schema (response_format) get an object with
+# every required property filled in (nested objects too, as in the cycle
+# plan), so structured parsing is exercised too.
+
+import argparse
+import itertools
+import json
+import math
+import random
+import threading
+import time
+import zlib
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+DEFAULT_PROFILES = {
+    "cohere":     {"median_ms": 1200, "spread": 0.5, "error_rate": 0.0, "error_status": 429, "size": 1800},
+    "anthropic":  {"median_ms": 1500, "spread": 0.5, "error_rate": 0.0, "error_status": 429, "size": 1800},
+    "elevenlabs": {"median_ms": 2500, "spread": 0.4, "error_rate": 0.0, "error_status": 429, "size": 400_000},
+    "zenquotes":  {"median_ms": 150,  "spread": 0.3, "error_rate": 0.0, "error_status": 429, "size": 90},
+}
+STREAM_CHUNK_CHARS = 24     # text per SSE delta
+AUDIO_CHUNK_BYTES  = 16384
+
+_WORDS = ("breathe slowly gentle warmth settle your body soft light rest notice the rhythm of each breath "
+          "let your shoulders drop you are allowed to slow down nourish with warm grounding foods").split()
+
+
+class StubState:
+    def __init__(self, profiles: dict, seed: int = None):
+        self.profiles = profiles
+        self.seed     = seed
+        self._counter = itertools.count()
+        self._lock    = threading.Lock()
+        self.requests = {}
+
+    def rng(self, provider: str) -> random.Random:
+        n = next(self._counter)
+        with self._lock:
+            self.requests[provider] = self.requests.get(provider, 0) + 1
+        return random.Random(f"{self.seed}:{n}") if self.seed is not None else random.Random()
+
+
+def _latency_s(profile: dict, rng: random.Random) -> float:
+    return profile["median_ms"] * math.exp(rng.gauss(0, profile["spread"])) / 1000
+
+
+def _text(rng: random.Random, size: int) -> str:
+    words, length = [], 0
+    while length < size:
+        word = rng.choice(_WORDS)
+        words.append(word)
+        length += len(word) + 1
+    return " ".join(words).capitalize() + "."
+
+
+def _leaves(schema: dict) -> int:
+    return sum(_leaves(p) if p.get("type") == "object" else 1 for p in schema.get("properties", {}).values())
+
+
+def _fill(schema: dict, rng: random.Random, per_field: int) -> dict:
+    return {name: _fill(p, rng, per_field) if p.get("type") == "object" else _text(rng, per_field)
+            for name, p in schema.get("properties", {}).items()}
+
+
+def _schema_answer(schema: dict, rng: random.Random, size: int) -> str:
+    return json.dumps(_fill(schema, rng, max(20, size // max(1, _leaves(schema)))))
+
+
+def _tokens(text: str) -> int:
+    return max(1, len(text) // 4)
+
+
+def make_handler(state: StubState):
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def log_message(self, *args):
+            pass
+
+        def _body(self) -> dict:
+            length = int(self.headers.get("Content-Length") or 0)
+            return json.loads(self.rfile.read(length) or b"{}") if length else {}
+
+        def _json(self, status: int, payload, headers=()):
+            data = json.dumps(payload).encode("utf-8")
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(data)))
+            for name, value in headers:
+                self.send_header(name, value)
+            self.end_headers()
+            self.wfile.write(data)
+
+        def _chunked_start(self, content_type: str):
+            self.send_response(200)
+            self.send_header("Content-Type", content_type)
+            self.send_header("Transfer-Encoding", "chunked")
+            self.end_headers()
+
+        def _chunk(self, data: bytes):
+            self.wfile.write(f"{len(data):x}\r\n".encode("ascii") + data + b"\r\n")
+            self.wfile.flush()
+
+        def _sse(self, event: str, payload: dict):
+            self._chunk(f"event: {event}\ndata: {json.dumps(payload)}\n\n".encode("utf-8"))
+
+        def _begin(self, provider: str):
+            """Latency and injected errors shared by every endpoint. Returns (rng, profile, latency), or None after an error."""
+            profile = state.profiles[provider]
+            rng     = state.rng(provider)
+            latency = _latency_s(profile, rng)
+            if rng.random() < profile["error_rate"]:
+                time.sleep(min(latency, 0.2))
+                status = profile["error_status"]
+                self._json(status, {"message": f"stub {provider} error"},
+                           [("Retry-After", "1")] if status == 429 else [])
+                return None
+            return rng, profile, latency
+
+        # ── routes ──────────────────────────────────────
+        def do_GET(self):
+            if self.path.startswith("/api/random"):
+                started = self._begin("zenquotes")
+                if started:
+                    rng, profile, latency = started
+                    time.sleep(latency)
+                    quote = _text(rng, profile["size"])
+                    self._json(200, [{"q": quote, "a": "Stub Author", "h": f"<blockquote>{quote}</blockquote>"}])
+            else:
+                self._json(404, {"message": "not found"})
+
+        def do_POST(self):
+            body = self._body()
+            if self.path.startswith("/v2/chat"):
+                self._chat(body, "cohere")
+            elif self.path.startswith("/v1/messages"):
+                self._chat(body, "anthropic")
+            elif self.path.startswith("/v1/text-to-speech/"):
+                self._tts(body)
+            else:
+                self._json(404, {"message": "not found"})
+
+        def _chat(self, body: dict, provider: str):
+            started = self._begin(provider)
+            if not started:
+                return
+            rng, profile, latency = started
+            schema = (body.get("response_format") or {}).get("json_schema")
+            text   = _schema_answer(schema, rng, profile["size"]) if schema else _text(rng, profile["size"])
+            prompt = json.dumps(body.get("messages", []))
+            usage  = (_tokens(prompt), _tokens(text))
+            if body.get("stream"):
+                self._chunked_start("text/event-stream")
+                pieces = [text[i:i + STREAM_CHUNK_CHARS] for i in range(0, len(text), STREAM_CHUNK_CHARS)]
+                first, rest = latency * 0.3, latency * 0.7 / max(1, len(pieces))   # time to first token, then steady
+                time.sleep(first)
+                stream = _cohere_stream if provider == "cohere" else _anthropic_stream
+                for event, payload, pause in stream(body, pieces, usage):
+                    time.sleep(rest if pause else 0)
+                    self._sse(event, payload)
+                self._chunk(b"")
+                return
+            time.sleep(latency)
+            self._json(200, _cohere_response(text, usage) if provider == "cohere"
+                       else _anthropic_response(body, text, usage))
+
+        def _tts(self, body: dict):
+            started = self._begin("elevenlabs")
+            if not started:
+                return
+            rng, profile, latency = started
+            size   = profile["size"] * max(1, len(body.get("text", ""))) // 1000 or profile["size"]
+            chunks = max(1, size // AUDIO_CHUNK_BYTES)
+            self._chunked_start("audio/mpeg")
+            time.sleep(latency * 0.3)
+            for i in range(chunks):
+                time.sleep(latency * 0.7 / chunks)
+                self._chunk(rng.randbytes(min(AUDIO_CHUNK_BYTES, size - i * AUDIO_CHUNK_BYTES)))
+            self._chunk(b"")
+
+    return Handler
+
+
+# ─────────────────────────────────────────────────
+# RESPONSE SHAPES
+# ─────────────────────────────────────────────────
+def _cohere_response(text: str, usage: tuple) -> dict:
+    return {
+        "id": f"stub-{zlib.crc32(text.encode('utf-8')):08x}",
+        "finish_reason": "COMPLETE",
+        "message": {"role": "assistant", "content": [{"type": "text", "text": text}]},
+        "usage": {"billed_units": {"input_tokens": usage[0], "output_tokens": usage[1]},
+                  "tokens": {"input_tokens": usage[0], "output_tokens": usage[1]}},
+    }
+
+
+def _cohere_stream(body: dict, pieces: list, usage: tuple):
+    yield "message-start", {"type": "message-start", "id": "stub", "delta": {"message": {"role": "assistant"}}}, False
+    yield "content-start", {"type": "content-start", "index": 0,
+                            "delta": {"message": {"content": {"type": "text", "text": ""}}}}, False
+    for piece in pieces:
+        yield "content-delta", {"type": "content-delta", "index": 0,
+                                "delta": {"message": {"content": {"text": piece}}}}, True
+    yield "content-end", {"type": "content-end", "index": 0}, False
+    yield "message-end", {"type": "message-end", "delta": {
+        "finish_reason": "COMPLETE",
+        "usage": {"billed_units": {"input_tokens": usage[0], "output_tokens": usage[1]},
+                  "tokens": {"input_tokens": usage[0], "output_tokens": usage[1]}}}}, False
+
+
+def _anthropic_response(body: dict, text: str, usage: tuple) -> dict:
+    return {
+        "id": "msg_stub", "type": "message", "role": "assistant", "model": body.get("model", "stub"),
+        "content": [{"type": "text", "text": text}],
+        "stop_reason": "end_turn", "stop_sequence": None,
+        "usage": {"input_tokens": usage[0], "output_tokens": usage[1]},
+    }
+
+
+def _anthropic_stream(body: dict, pieces: list, usage: tuple):
+    message = {**_anthropic_response(body, "", (usage[0], 0)), "content": [], "stop_reason": None}
+    yield "message_start", {"type": "message_start", "message": message}, False
+    yield "content_block_start", {"type": "content_block_start", "index": 0,
+                                  "content_block": {"type": "text", "text": ""}}, False
+    for piece in pieces:
+        yield "content_block_delta", {"type": "content_block_delta", "index": 0,
+                                      "delta": {"type": "text_delta", "text": piece}}, True
+    yield "content_block_stop", {"type": "content_block_stop", "index": 0}, False
+    yield "message_delta", {"type": "message_delta", "delta": {"stop_reason": "end_turn", "stop_sequence": None},
+                            "usage": {"output_tokens": usage[1]}}, False
+    yield "message_stop", {"type": "message_stop"}, False
+
+
+# ─────────────────────────────────────────────────
+# RUNNING
+# ─────────────────────────────────────────────────
+def profiles_with(overrides: dict = None) -> dict:
+    """DEFAULT_PROFILES with {"cohere": {"median_ms": 300}, ...} merged in."""
+    merged = {name: dict(profile) for name, profile in DEFAULT_PROFILES.items()}
+    for name, values in (overrides or {}).items():
+        for field, value in values.items():
+            merged[name][field] = _typed(name, field, value)
+    return merged
+
+
+def _typed(provider: str, field: str, value):
+    """`value` as the type of the default (size and error_status are whole numbers)."""
+    if field not in DEFAULT_PROFILES.get(provider, {}):
+        raise ValueError(f"unknown profile field {provider}.{field}")
+    value = float(value)
+    return int(value) if isinstance(DEFAULT_PROFILES[provider][field], int) else value
+
+
+def serve(host: str = "127.0.0.1", port: int = 0, profiles: dict = None, seed: int = None) -> tuple:
+    """Starts the stub server on a background thread. Returns (server, base_url)."""
+    state  = StubState(profiles or profiles_with(), seed)
+    server = ThreadingHTTPServer((host, port), make_handler(state))
+    server.daemon_threads = True
+    server.state = state
+    threading.Thread(target=server.serve_forever, daemon=True, name="mooncyc-stubs").start()
+    return server, f"http://{host}:{server.server_address[1]}"
+
+
+def _parse_profile(items) -> dict:
+    overrides = {}
+    for item in items or ():
+        key, value = item.split("=", 1)
+        provider, field = key.split(".", 1)
+        overrides.setdefault(provider, {})[field] = _typed(provider, field, value)
+    return overrides
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Offline stubs for the Cohere, Anthropic, ElevenLabs and ZenQuotes APIs")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8787)
+    parser.add_argument("--seed", type=int, default=None)
+    parser.add_argument("--config", help="JSON file of per-provider profile overrides")
+    parser.add_argument("--profile", action="append", metavar="PROVIDER.FIELD=VALUE",
+                        help="e.g. cohere.median_ms=300 or elevenlabs.error_rate=0.1 (repeatable)")
+    args = parser.parse_args(argv)
+
+    overrides = {}
+    if args.config:
+        with open(args.config) as f:
+            overrides = json.load(f)
+    try:
+        for provider, values in _parse_profile(args.profile).items():
+            overrides.setdefault(provider, {}).update(values)
+        profiles = profiles_with(overrides)
+    except ValueError as e:
+        parser.error(str(e))
+
+    server, url = serve(args.host, args.port, profiles, args.seed)
+    print(f"Mooncyc API stubs on {url} — set MOONCYC_STUB_URL={url}")
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
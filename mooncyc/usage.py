@@ -0,0 +1,150 @@
+# ─────────────────────────────────────────────────
+# LLM USAGE LEDGER
+# ─────────────────────────────────────────────────
+# Every LLM call goes through `tracked_call`, which records one row:
+#   feature, model, input/output tokens, latency, cache hit, error class.
+# Rows live in a bounded in-memory ring buffer (shared by every session in
+# the process) and are appended to a JSON-lines file every FLUSH_INTERVAL
+# seconds, so we can see which feature burns the most tokens or time.
+
+import atexit
+import json
+import os
+import threading
+import time
+from collections import defaultdict, deque
+from datetime import datetime
+
+LEDGER_FILE    = os.getenv("MOONCYC_USAGE_FILE", "usage_log.jsonl")
+LEDGER_SIZE    = 5000   # rows kept in memory
+FLUSH_INTERVAL = 30     # seconds between disk flushes
+
+_lock       = threading.Lock()
+_ring       = deque(maxlen=LEDGER_SIZE)
+_pending    = deque(maxlen=LEDGER_SIZE)
+_last_flush = time.monotonic()
+
+
+def record(feature: str, model: str, input_tokens: int = 0, output_tokens: int = 0,
+           latency_ms: float = 0.0, cache_hit: bool = False, error: str = None) -> dict:
+    """Adds one call to the ledger and flushes to disk if the interval has passed."""
+    row = {
+        "ts": datetime.now().isoformat(timespec="seconds"),
+        "feature": feature,
+        "model": model,
+        "input_tokens": int(input_tokens or 0),
+        "output_tokens": int(output_tokens or 0),
+        "latency_ms": round(latency_ms, 1),
+        "cache_hit": cache_hit,
+        "error": error,
+    }
+    with _lock:
+        _ring.append(row)
+        _pending.append(row)
+        due = time.monotonic() - _last_flush >= FLUSH_INTERVAL
+    if due:
+        flush()
+    return row
+
+
+def flush():
+    """Appends every row recorded since the last flush to LEDGER_FILE."""
+    global _last_flush
+    with _lock:
+        rows = list(_pending)
+        _pending.clear()
+        _last_flush = time.monotonic()
+    if not rows:
+        return
+    try:
+        with open(LEDGER_FILE, "a") as f:
+            for row in rows:
+                f.write(json.dumps(row) + "\n")
+    except OSError:
+        # Never let accounting break the app — keep the rows for the next try
+        with _lock:
+            _pending.extendleft(reversed(rows))
+
+
+atexit.register(flush)
+
+
+def response_tokens(response) -> tuple:
+    """Returns (input_tokens, output_tokens) from a Cohere V2 or Anthropic response."""
+    usage = getattr(response, "usage", None)
+    if usage is None:
+        return 0, 0
+    # Cohere V2: response.usage.tokens.{input,output}_tokens
+    tokens = getattr(usage, "tokens", None) or getattr(usage, "billed_units", None)
+    if tokens is not None:
+        return getattr(tokens, "input_tokens", 0) or 0, getattr(tokens, "output_tokens", 0) or 0
+    # Anthropic: response.usage.{input,output}_tokens
+    return getattr(usage, "input_tokens", 0) or 0, getattr(usage, "output_tokens", 0) or 0
+
+
+def tracked_call(feature: str, call, **kwargs):
+    """Runs `call(**kwargs)` (e.g. co.chat) and records its usage, latency and error class.
+    Exceptions are recorded and re-raised so callers keep their own error handling."""
+    model   = kwargs.get("model", "")
+    started = time.perf_counter()
+    try:
+        response = call(**kwargs)
+    except Exception as e:
+        record(feature, model, latency_ms=(time.perf_counter() - started) * 1000,
+               error=type(e).__name__)
+        raise
+    input_tokens, output_tokens = response_tokens(response)
+    record(feature, model, input_tokens, output_tokens,
+           latency_ms=(time.perf_counter() - started) * 1000)
+    return response
+
+
+# ─────────────────────────────────────────────────
+# AGGREGATE VIEWS
+# ─────────────────────────────────────────────────
+def recent_rows() -> list:
+    with _lock:
+        return list(_ring)
+
+
+def read_ledger_file(path: str = None):
+    """Yields every row flushed to disk so far (older history than the ring buffer)."""
+    path = path or LEDGER_FILE
+    if not os.path.exists(path):
+        return
+    with open(path, "r") as f:
+        for line in f:
+            if line.strip():
+                yield json.loads(line)
+
+
+def summarize(rows, by: str = "feature") -> list:
+    """Groups rows by "feature" or "day" and returns one totals dict per group,
+    sorted by total tokens (biggest spender first)."""
+    groups = defaultdict(lambda: {"calls": 0, "errors": 0, "cache_hits": 0,
+                                  "input_tokens": 0, "output_tokens": 0,
+                                  "total_latency_ms": 0.0, "max_latency_ms": 0.0})
+    for row in rows:
+        key = row["ts"][:10] if by == "day" else row["feature"]
+        g = groups[key]
+        g["calls"]            += 1
+        g["errors"]           += 1 if row.get("error") else 0
+        g["cache_hits"]       += 1 if row.get("cache_hit") else 0
+        g["input_tokens"]     += row.get("input_tokens", 0)
+        g["output_tokens"]    += row.get("output_tokens", 0)
+        g["total_latency_ms"] += row.get("latency_ms", 0.0)
+        g["max_latency_ms"]    = max(g["max_latency_ms"], row.get("latency_ms", 0.0))
+
+    summary = []
+    for key, g in groups.items():
+        summary.append({
+            by: key,
+            "calls": g["calls"],
+            "errors": g["errors"],
+            "cache_hits": g["cache_hits"],
+            "input_tokens": g["input_tokens"],
+            "output_tokens": g["output_tokens"],
+            "avg_latency_ms": round(g["total_latency_ms"] / g["calls"], 1),
+            "max_latency_ms": g["max_latency_ms"],
+        })
+    return sorted(summary, key=lambda s: s["input_tokens"] + s["output_tokens"], reverse=True)
@@ -0,0 +1,28 @@
+# ─────────────────────────────────────────────────
+# PER-USER SQLITE DATABASE
+# ─────────────────────────────────────────────────
+# mooncyc.db in the user's folder holds the indexed, query-heavy data: the
+# full-text index (mooncyc/search.py) and the generation history
+# (mooncyc/history.py). Each module creates its own tables.
+
+import os
+import sqlite3
+
+DB_FILE = "mooncyc.db"
+
+
+def path(folder: str) -> str:
+    return os.path.join(folder, DB_FILE)
+
+
+def exists(folder: str) -> bool:
+    return os.path.exists(path(folder))
+
+
+def connect(folder: str, schema: str = "") -> sqlite3.Connection:
+    os.makedirs(folder, exist_ok=True)
+    conn = sqlite3.connect(path(folder), timeout=10)
+    conn.execute("PRAGMA journal_mode=WAL")
+    if schema:
+        conn.executescript(schema)
+    return conn